@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workarea',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
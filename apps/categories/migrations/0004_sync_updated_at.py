@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_workarea_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['updated_at', 'id'], name='categories_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workarea',
+            index=models.Index(fields=['updated_at', 'id'], name='work_areas_sync_idx'),
+        ),
+    ]
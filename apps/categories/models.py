@@ -1,8 +1,46 @@
 from django.db import models
+from django.db.models import Count, Q
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+OPEN_TARJETA_STATUSES = ['open', 'in_progress']
+
+class CategoryQuerySet(models.QuerySet):
+    def with_tarjeta_counts(self):
+        """Anota los contadores de tarjetas en la misma consulta (GROUP BY)"""
+        return self.annotate(
+            tarjetas_total=Count('tarjetas', filter=Q(tarjetas__is_active=True)),
+            open_tarjetas_total=Count('tarjetas', filter=Q(
+                tarjetas__is_active=True, tarjetas__status__in=OPEN_TARJETA_STATUSES
+            )),
+        )
+
+def attach_tarjeta_counts(categories):
+    """
+    Carga los contadores de varias instancias de Category con una sola consulta.
+    Útil cuando las categorías llegan por select_related y no pueden anotarse.
+    """
+    from apps.tarjetas.models import TarjetaRoja
+    
+    categories = [category for category in categories if category is not None]
+    ids = {category.id for category in categories}
+    if not ids:
+        return
+    
+    rows = TarjetaRoja.objects.filter(is_active=True, category_id__in=ids).values(
+        'category_id'
+    ).annotate(
+        total=Count('id'),
+        open_total=Count('id', filter=Q(status__in=OPEN_TARJETA_STATUSES)),
+    ).order_by()
+    counts = {row['category_id']: row for row in rows}
+    
+    for category in categories:
+        row = counts.get(category.id, {})
+        category.tarjetas_total = row.get('total', 0)
+        category.open_tarjetas_total = row.get('open_total', 0)
+
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True, verbose_name='Nombre')
     description = models.TextField(blank=True, verbose_name='Descripción')
@@ -14,24 +52,34 @@ class Category(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CategoryQuerySet.as_manager()
+    
     class Meta:
         db_table = 'categories'
         verbose_name = 'Categoría'
         verbose_name_plural = 'Categorías'
         ordering = ['name']
+        indexes = [
+            # Cambios desde el último /api/sync/
+            models.Index(fields=['updated_at', 'id'], name='categories_sync_idx'),
+        ]
     
     def __str__(self):
         return self.name
     
     @property
     def tarjetas_count(self):
+        if hasattr(self, 'tarjetas_total'):
+            return self.tarjetas_total
         return self.tarjetas.filter(is_active=True).count()
     
     @property
     def open_tarjetas_count(self):
+        if hasattr(self, 'open_tarjetas_total'):
+            return self.open_tarjetas_total
         return self.tarjetas.filter(
             is_active=True, 
-            status__in=['open', 'in_progress']
+            status__in=OPEN_TARJETA_STATUSES
         ).count()
 
 class WorkArea(models.Model):
@@ -45,6 +93,7 @@ class WorkArea(models.Model):
                                   verbose_name='Responsable')
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'work_areas'
@@ -52,6 +101,9 @@ class WorkArea(models.Model):
         verbose_name_plural = 'Áreas de Trabajo'
         unique_together = ['name', 'category']
         ordering = ['category', 'name']
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='work_areas_sync_idx'),
+        ]
     
     def __str__(self):
         return f"{self.category.name} - {self.name}"
\ No newline at end of file
@@ -25,6 +25,20 @@ class CategorySerializer(serializers.ModelSerializer):
                  'tarjetas_count', 'open_tarjetas_count']
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
 
+class CategoryStubSerializer(serializers.ModelSerializer):
+    """Referencia compacta a una categoría"""
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'color']
+        read_only_fields = fields
+
+class WorkAreaStubSerializer(serializers.ModelSerializer):
+    """Referencia compacta a un área de trabajo"""
+    class Meta:
+        model = WorkArea
+        fields = ['id', 'name']
+        read_only_fields = fields
+
 class CategoryCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -2,16 +2,34 @@ from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import Prefetch
+from apps.tarjetas.conditional import last_updated, make_etag, not_modified, set_validators
+from apps.tarjetas.models import TarjetaRoja
 from .models import Category, WorkArea
 from .serializers import CategorySerializer, CategoryCreateSerializer, WorkAreaSerializer
 
+def category_queryset():
+    """Categorías con contadores anotados y relaciones precargadas para CategorySerializer"""
+    return Category.objects.with_tarjeta_counts().select_related('created_by').prefetch_related(
+        Prefetch('work_areas', queryset=WorkArea.objects.select_related('responsible'))
+    )
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def categories_list(request):
     if request.method == 'GET':
-        categories = Category.objects.filter(is_active=True).prefetch_related('work_areas')
+        # Los contadores de tarjetas también forman parte de la respuesta
+        last_modified = last_updated(
+            Category.objects.all(), WorkArea.objects.all(), TarjetaRoja.objects.all()
+        )
+        etag = make_etag(request, last_modified, Category.objects.filter(is_active=True).count())
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        
+        categories = category_queryset().filter(is_active=True)
         serializer = CategorySerializer(categories, many=True)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag, last_modified)
     
     elif request.method == 'POST':
         if not request.user.is_supervisor():
@@ -29,7 +47,7 @@ def categories_list(request):
 @permission_classes([IsAuthenticated])
 def category_detail(request, pk):
     try:
-        category = Category.objects.get(pk=pk, is_active=True)
+        category = category_queryset().get(pk=pk, is_active=True)
     except Category.DoesNotExist:
         return Response({'error': 'Categoría no encontrada'}, status=status.HTTP_404_NOT_FOUND)
     
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.media.models import MediaBlob
+from apps.media.services import acquire_blobs, collect_garbage
+from apps.media.storage import blob_storage, is_blob_name
+from apps.tarjetas.models import TarjetaImage
+from apps.users.models import User
+
+
+def _size_label(size):
+    return f'{size / (1024 * 1024):.1f} MB'
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve los archivos anteriores al almacenamiento por contenido (un blob '
+        'por SHA-256) y borra los blobs sin referencias'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orphans', action='store_true',
+                            help='Borrar también archivos de blobs/ sin registro')
+        parser.add_argument('--gc-only', action='store_true',
+                            help='Solo recolectar blobs sin referencias')
+
+    def handle(self, *args, **options):
+        if not options['gc_only']:
+            before = MediaBlob.objects.count()
+            legacy_bytes = 0
+            moved = 0
+
+            for image in TarjetaImage.objects.only('id', 'image', 'variants').iterator():
+                names = [image.image.name, *image.variants.values()]
+                mapping = {name: self._to_blob(name) for name in names if not is_blob_name(name)}
+                mapping = {old: new for old, new in mapping.items() if new}
+                if not mapping:
+                    continue
+
+                legacy_bytes += sum(size for _, size in mapping.values())
+                variants = {
+                    key: mapping.get(path, (path,))[0] for key, path in image.variants.items()
+                }
+                new_image = mapping.get(image.image.name, (image.image.name,))[0]
+                TarjetaImage.objects.filter(pk=image.pk).update(
+                    image=new_image, variants=variants, updated_at=timezone.now()
+                )
+                acquire_blobs([new for new, _ in mapping.values()])
+                for old in mapping:
+                    blob_storage.delete(old)
+                moved += len(mapping)
+
+            for user in User.objects.exclude(avatar='').exclude(avatar__isnull=True).only('id', 'avatar').iterator():
+                if is_blob_name(user.avatar.name):
+                    continue
+                result = self._to_blob(user.avatar.name)
+                if not result:
+                    continue
+                new, size = result
+                User.objects.filter(pk=user.pk).update(avatar=new)
+                acquire_blobs([new])
+                blob_storage.delete(user.avatar.name)
+                legacy_bytes += size
+                moved += 1
+
+            created = MediaBlob.objects.count() - before
+            self.stdout.write(
+                f'{moved} archivos migrados ({_size_label(legacy_bytes)}) en {created} blobs nuevos'
+            )
+
+        deleted, freed = collect_garbage(orphans=options['orphans'])
+        self.stdout.write(
+            f'{deleted} archivos sin referencias borrados ({_size_label(freed)})'
+        )
+
+        total = MediaBlob.objects.aggregate(total=Sum('size'))['total'] or 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{MediaBlob.objects.count()} blobs, {_size_label(total)} en disco'
+        ))
+
+    def _to_blob(self, name):
+        """Copia un archivo existente a su blob; devuelve (nombre_blob, tamaño)"""
+        if not name or not blob_storage.exists(name):
+            self.stderr.write(f'  No existe: {name}')
+            return None
+        size = blob_storage.size(name)
+        with blob_storage.open(name, 'rb') as content:
+            return blob_storage.save(name, content), size
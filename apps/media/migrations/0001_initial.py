@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Ruta')),
+                ('size', models.BigIntegerField(verbose_name='Tamaño (bytes)')),
+                ('ref_count', models.IntegerField(default=0, verbose_name='Referencias')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('released_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Archivo',
+                'verbose_name_plural': 'Archivos',
+                'db_table': 'media_blobs',
+                'indexes': [models.Index(fields=['ref_count', 'released_at'], name='media_blobs_gc_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import models
+
+class MediaBlob(models.Model):
+    """
+    Archivo almacenado una sola vez bajo su SHA-256. ``ref_count`` cuenta las
+    filas que lo referencian (imágenes de tarjetas, variantes y avatares).
+    """
+    sha256 = models.CharField(max_length=64, db_index=True)
+    name = models.CharField(max_length=255, unique=True, verbose_name='Ruta')
+    size = models.BigIntegerField(verbose_name='Tamaño (bytes)')
+    ref_count = models.IntegerField(default=0, verbose_name='Referencias')
+    created_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'media_blobs'
+        verbose_name = 'Archivo'
+        verbose_name_plural = 'Archivos'
+        indexes = [
+            # Recolección de archivos sin referencias
+            models.Index(fields=['ref_count', 'released_at'], name='media_blobs_gc_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
@@ -0,0 +1,112 @@
+"""
+Conteo de referencias de los blobs de ``ContentAddressedStorage``.
+
+Los modelos registrados en signals.py ajustan los contadores al guardarse y
+borrarse; quien escribe rutas con ``update()`` o ``bulk_create()`` debe llamar
+a ``acquire_blobs`` / ``release_blobs``. Los blobs sin referencias se borran
+con ``collect_garbage`` pasado un margen, para no competir con un upload
+idéntico que acaba de reutilizarlos.
+"""
+import os
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import MediaBlob
+from .storage import BLOB_DIR, TMP_DIR, blob_storage, is_blob_name
+
+GC_GRACE = timedelta(hours=1)
+
+
+def _by_count(names):
+    """Agrupa los nombres por cantidad de referencias: un UPDATE por grupo"""
+    groups = defaultdict(list)
+    for name, count in Counter(name for name in names if is_blob_name(name)).items():
+        groups[count].append(name)
+    return groups
+
+
+def acquire_blobs(names, storage=blob_storage):
+    groups = _by_count(names)
+    if not groups:
+        return
+
+    wanted = [name for group in groups.values() for name in group]
+    existing = set(MediaBlob.objects.filter(name__in=wanted).values_list('name', flat=True))
+    MediaBlob.objects.bulk_create([
+        MediaBlob(
+            name=name,
+            sha256=os.path.splitext(os.path.basename(name))[0],
+            size=storage.size(name)
+        )
+        for name in wanted if name not in existing
+    ], ignore_conflicts=True)
+
+    for count, group in groups.items():
+        MediaBlob.objects.filter(name__in=group).update(
+            ref_count=F('ref_count') + count, released_at=None
+        )
+
+
+def release_blobs(names):
+    now = timezone.now()
+    for count, group in _by_count(names).items():
+        MediaBlob.objects.filter(name__in=group).update(
+            ref_count=F('ref_count') - count, released_at=now
+        )
+
+
+def collect_garbage(grace=GC_GRACE, orphans=False, storage=blob_storage):
+    """
+    Borra los blobs sin referencias liberados hace más de ``grace`` y los
+    temporales abandonados. Con ``orphans`` también los archivos de blobs/
+    sin fila en la tabla (uploads cuyo request falló después de escribir).
+    Devuelve (archivos borrados, bytes liberados).
+    """
+    cutoff = timezone.now() - grace
+    deleted, freed = 0, 0
+
+    with transaction.atomic():
+        blobs = list(
+            MediaBlob.objects.select_for_update().filter(ref_count__lte=0, released_at__lt=cutoff)
+        )
+        for blob in blobs:
+            storage.delete(blob.name)
+            deleted += 1
+            freed += blob.size
+        MediaBlob.objects.filter(id__in=[blob.id for blob in blobs]).delete()
+
+    stale = []
+    if storage.exists(TMP_DIR):
+        stale += [f'{TMP_DIR}/{name}' for name in storage.listdir(TMP_DIR)[1]]
+    if orphans:
+        stale += _orphan_blobs(storage)
+
+    for name in stale:
+        if storage.get_modified_time(name) < cutoff:
+            freed += storage.size(name)
+            storage.delete(name)
+            deleted += 1
+
+    return deleted, freed
+
+
+def _orphan_blobs(storage):
+    names = []
+    if not storage.exists(BLOB_DIR):
+        return names
+    for first in storage.listdir(BLOB_DIR)[0]:
+        if f'{BLOB_DIR}/{first}' == TMP_DIR:
+            continue
+        for second in storage.listdir(f'{BLOB_DIR}/{first}')[0]:
+            prefix = f'{BLOB_DIR}/{first}/{second}'
+            names += [f'{prefix}/{name}' for name in storage.listdir(prefix)[1]]
+
+    known = set()
+    for start in range(0, len(names), 1000):
+        batch = names[start:start + 1000]
+        known.update(MediaBlob.objects.filter(name__in=batch).values_list('name', flat=True))
+    return [name for name in names if name not in known]
@@ -0,0 +1,61 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+
+from .services import acquire_blobs, release_blobs
+
+# Campos de archivo guardados en ContentAddressedStorage
+TRACKED_FIELDS = [
+    ('tarjetas.TarjetaImage', 'image'),
+    ('users.User', 'avatar'),
+]
+
+
+def _file_name(value):
+    name = getattr(value, 'name', value)
+    return name or ''
+
+
+def track_blob_field(model, field_name):
+    """Mantiene ``MediaBlob.ref_count`` al día con los cambios del campo"""
+    attr = f'_stored_{field_name}'
+
+    def remember(sender, instance, **kwargs):
+        # Campo diferido (only/defer): no se conoce el valor anterior
+        if field_name in instance.__dict__:
+            instance.__dict__[attr] = _file_name(instance.__dict__[field_name])
+
+    def on_save(sender, instance, created, update_fields=None, **kwargs):
+        if update_fields is not None and field_name not in update_fields:
+            return
+        if not created and attr not in instance.__dict__:
+            return
+        old = '' if created else instance.__dict__[attr]
+        new = _file_name(getattr(instance, field_name))
+        if old != new:
+            with transaction.atomic():
+                acquire_blobs([new])
+                release_blobs([old])
+        instance.__dict__[attr] = new
+
+    def on_delete(sender, instance, **kwargs):
+        release_blobs([instance.__dict__.get(attr) or _file_name(getattr(instance, field_name))])
+
+    uid = f'media_blobs:{model._meta.label}.{field_name}'
+    post_init.connect(remember, sender=model, weak=False, dispatch_uid=f'{uid}:init')
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f'{uid}:save')
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f'{uid}:delete')
+
+
+def release_image_variants(sender, instance, **kwargs):
+    """Las miniaturas las referencia process_image; se liberan junto con la imagen"""
+    release_blobs(list((instance.variants or {}).values()))
+
+
+for label, field_name in TRACKED_FIELDS:
+    track_blob_field(apps.get_model(label), field_name)
+
+post_delete.connect(
+    release_image_variants, sender=apps.get_model('tarjetas.TarjetaImage'), weak=False,
+    dispatch_uid='media_blobs:tarjetas.TarjetaImage.variants:delete'
+)
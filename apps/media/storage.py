@@ -0,0 +1,67 @@
+"""
+Almacenamiento direccionado por contenido.
+
+Cada archivo se guarda como ``blobs/ab/cd/<sha256><ext>``. El hash se calcula
+leyendo el upload por bloques; si el blob ya existe (por ejemplo, un reintento
+del teléfono) no se vuelve a escribir. Los archivos que Django ya dejó en
+disco (uploads grandes) se mueven sin copiarse.
+"""
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.functional import LazyObject
+
+BLOB_DIR = 'blobs'
+TMP_DIR = 'blobs/tmp'
+
+
+def blob_name(digest, ext=''):
+    return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}'
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f'{BLOB_DIR}/') and not name.startswith(f'{TMP_DIR}/')
+
+
+def hash_content(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # El nombre final lo decide _save a partir del contenido
+        return name
+
+    def _save(self, name, content):
+        # Quien ya conoce el hash (p. ej. uploads por partes) evita releer el archivo
+        digest = getattr(content, 'sha256', None) or hash_content(content)
+        target = blob_name(digest, os.path.splitext(name)[1])
+
+        if self.exists(target):
+            return target
+
+        # Se escribe con nombre temporal y se renombra: dos uploads iguales en
+        # paralelo nunca dejan un blob a medio escribir
+        tmp = super()._save(f'{TMP_DIR}/{uuid.uuid4().hex}', content)
+        os.makedirs(os.path.dirname(self.path(target)), exist_ok=True)
+        os.replace(self.path(tmp), self.path(target))
+        return target
+
+
+class DefaultBlobStorage(LazyObject):
+    def _setup(self):
+        self._wrapped = ContentAddressedStorage()
+
+
+blob_storage = DefaultBlobStorage()
+
+
+def get_blob_storage():
+    """Callable para ``FileField(storage=...)``: las migraciones guardan la referencia"""
+    return blob_storage
@@ -0,0 +1,212 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.tarjetas.images import process_image
+from apps.tarjetas.models import TarjetaImage, TarjetaRoja, TarjetaUpload
+from apps.tarjetas.uploads import partial_path, purge_expired_uploads
+from .models import MediaBlob
+
+User = get_user_model()
+
+
+def jpeg(size):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 10, 10)).save(buffer, 'JPEG')
+    return SimpleUploadedFile('foto.jpg', buffer.getvalue(), 'image/jpeg')
+
+
+class TempMediaMixin:
+    def use_temp_media_root(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class BlobReferenceTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        self.use_temp_media_root()
+
+        self.user = User.objects.create_user(username='op', email='op@example.com', password='x')
+        self.tarjeta = TarjetaRoja.objects.create(descripcion='Fuga', created_by=self.user)
+
+    def processed_image(self, size):
+        image = TarjetaImage.objects.create(
+            tarjeta=self.tarjeta, image=jpeg(size), uploaded_by=self.user
+        )
+        process_image(image.id)
+        # Instancia nueva, como la que carga la vista de borrado
+        image = TarjetaImage.objects.get(pk=image.pk)
+        self.assertEqual(image.processing_status, 'ready')
+        return image
+
+    def ref_counts(self, image):
+        names = [image.image.name, *image.variants.values()]
+        return dict(MediaBlob.objects.filter(name__in=names).values_list('name', 'ref_count'))
+
+    def assert_all_released(self):
+        self.assertTrue(MediaBlob.objects.exists())
+        self.assertEqual(
+            dict(MediaBlob.objects.exclude(ref_count=0).values_list('name', 'ref_count')), {}
+        )
+
+    def test_delete_processed_image_releases_variants(self):
+        image = self.processed_image((2000, 1500))
+        # Original limpio y tres miniaturas distintas, una referencia cada una
+        self.assertEqual(list(self.ref_counts(image).values()), [1] * 4)
+
+        image.delete()
+        self.assert_all_released()
+
+    def test_delete_small_image_sharing_blob_with_variants(self):
+        # Sin agrandar: las variantes son el mismo blob que el original
+        image = self.processed_image((100, 80))
+        self.assertEqual(MediaBlob.objects.get(name=image.image.name).ref_count, 4)
+
+        image.delete()
+        self.assert_all_released()
+
+    def test_reprocessing_releases_previous_variants(self):
+        image = self.processed_image((2000, 1500))
+        TarjetaImage.objects.filter(pk=image.pk).update(processing_status='pending')
+        process_image(image.id)
+        # Mismo contenido: cada blob sigue con una sola referencia
+        image = TarjetaImage.objects.get(pk=image.pk)
+        self.assertEqual(list(self.ref_counts(image).values()), [1] * 4)
+
+        self.tarjeta.delete()
+        self.assert_all_released()
+
+
+class ChunkedUploadTests(TempMediaMixin, TestCase):
+    CHUNK = 1024
+
+    def setUp(self):
+        self.use_temp_media_root()
+        self.user = User.objects.create_user(username='op', email='op@example.com', password='x')
+        self.tarjeta = TarjetaRoja.objects.create(descripcion='Fuga', created_by=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.content = jpeg((400, 300)).read()
+        self.assertGreater(len(self.content), 2 * self.CHUNK)
+
+    def start(self, **extra):
+        response = self.client.post(f'/api/tarjetas/{self.tarjeta.pk}/uploads/', {
+            'filename': 'foto.jpg', 'size': len(self.content), **extra
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def put(self, upload_id, offset, data, **headers):
+        end = offset + len(data) - 1
+        return self.client.put(
+            f'/api/tarjetas/uploads/{upload_id}/', data,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {offset}-{end}/{len(self.content)}', **headers
+        )
+
+    def send_all(self, upload_id, start=0):
+        for offset in range(start, len(self.content), self.CHUNK):
+            response = self.put(upload_id, offset, self.content[offset:offset + self.CHUNK])
+            self.assertEqual(response.status_code, 200)
+
+    def complete(self, upload_id):
+        return self.client.post(f'/api/tarjetas/uploads/{upload_id}/complete/')
+
+    def test_resume_after_interruption(self):
+        upload_id = self.start(sha256=hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(self.put(upload_id, 0, self.content[:self.CHUNK]).status_code, 200)
+
+        # El cliente perdió la respuesta: consulta dónde quedó y sigue desde ahí
+        received = self.client.get(f'/api/tarjetas/uploads/{upload_id}/').data['received']
+        self.assertEqual(received, self.CHUNK)
+        self.send_all(upload_id, start=received)
+
+        response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 201)
+        image = TarjetaImage.objects.get(pk=response.data['id'])
+        with image.image.open('rb') as stored:
+            self.assertEqual(stored.read(), self.content)
+        self.assertFalse(TarjetaUpload.objects.exists())
+        self.assertFalse(os.listdir(os.path.dirname(partial_path(TarjetaUpload(id=upload_id)))))
+
+    def test_offset_mismatch_returns_received(self):
+        upload_id = self.start()
+        self.put(upload_id, 0, self.content[:self.CHUNK])
+
+        for offset in (0, 2 * self.CHUNK):
+            response = self.put(upload_id, offset, self.content[offset:offset + self.CHUNK])
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.data['received'], self.CHUNK)
+
+    def test_chunk_checksum_mismatch_is_not_recorded(self):
+        upload_id = self.start()
+        response = self.put(upload_id, 0, self.content[:self.CHUNK],
+                            HTTP_X_CHUNK_SHA256=hashlib.sha256(b'otro').hexdigest())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(TarjetaUpload.objects.get(id=upload_id).received, 0)
+
+    def test_chunk_beyond_declared_size(self):
+        upload_id = self.start()
+        self.send_all(upload_id)
+        response = self.client.put(
+            f'/api/tarjetas/uploads/{upload_id}/?offset={len(self.content)}', b'x',
+            content_type='application/octet-stream'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_complete_before_all_bytes_arrive(self):
+        upload_id = self.start()
+        self.put(upload_id, 0, self.content[:self.CHUNK])
+
+        response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['received'], self.CHUNK)
+        self.assertFalse(TarjetaImage.objects.exists())
+
+    def test_complete_with_wrong_hash(self):
+        upload_id = self.start(sha256=hashlib.sha256(b'otro archivo').hexdigest())
+        self.send_all(upload_id)
+
+        response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['sha256'], hashlib.sha256(self.content).hexdigest())
+        self.assertFalse(TarjetaImage.objects.exists())
+        # La subida sigue ahí: el cliente puede cancelarla
+        self.assertEqual(
+            self.client.delete(f'/api/tarjetas/uploads/{upload_id}/').status_code, 200
+        )
+        self.assertFalse(TarjetaUpload.objects.exists())
+
+    def test_other_users_cannot_touch_the_upload(self):
+        upload_id = self.start()
+        other = User.objects.create_user(username='op2', email='op2@example.com', password='x')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.put(upload_id, 0, self.content[:self.CHUNK]).status_code, 404)
+        self.assertEqual(self.complete(upload_id).status_code, 404)
+
+    def test_purge_abandoned_uploads(self):
+        abandoned, active = self.start(), self.start()
+        self.put(abandoned, 0, self.content[:self.CHUNK])
+        TarjetaUpload.objects.filter(id=abandoned).update(
+            updated_at=timezone.now() - timedelta(days=2)
+        )
+
+        self.assertEqual(purge_expired_uploads(), 1)
+        self.assertEqual([str(pk) for pk in TarjetaUpload.objects.values_list('id', flat=True)],
+                         [active])
+        self.assertFalse(os.path.exists(partial_path(TarjetaUpload(id=abandoned))))
+        self.assertTrue(os.path.exists(partial_path(TarjetaUpload(id=active))))
+        self.assertEqual(self.client.get(f'/api/tarjetas/uploads/{abandoned}/').status_code, 404)
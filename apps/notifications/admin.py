@@ -1,11 +1,12 @@
 from django.contrib import admin
-from .models import Notification, NotificationPreference, DeviceToken
+from .models import Notification, NotificationPreference, DeviceToken, OutboxEvent
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ['title', 'recipient', 'notification_type', 'priority', 
                    'is_read', 'created_at']
-    list_filter = ['notification_type', 'priority', 'is_read', 'created_at', 'send_email', 'send_push']
+    list_filter = ['notification_type', 'priority', 'is_read', 'is_active', 'created_at',
+                   'send_email', 'send_push']
     search_fields = ['title', 'message', 'recipient__first_name', 'recipient__last_name', 
                     'recipient__email']
     readonly_fields = ['created_at', 'read_at']
@@ -19,7 +20,7 @@ class NotificationAdmin(admin.ModelAdmin):
             'fields': ('title', 'message')
         }),
         ('Estado', {
-            'fields': ('is_read', 'read_at')
+            'fields': ('is_read', 'read_at', 'is_active')
         }),
         ('Entrega', {
             'fields': ('send_email', 'email_sent', 'send_push', 'push_sent')
@@ -47,4 +48,10 @@ class DeviceTokenAdmin(admin.ModelAdmin):
     list_display = ['user', 'platform', 'device_name', 'is_active', 'last_used']
     list_filter = ['platform', 'is_active', 'created_at', 'last_used']
     search_fields = ['user__first_name', 'user__last_name', 'user__email', 'device_name']
-    readonly_fields = ['created_at', 'last_used']
\ No newline at end of file
+    readonly_fields = ['created_at', 'last_used']
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event', 'created_at', 'processed_at', 'attempts']
+    list_filter = ['event', 'processed_at', 'attempts']
+    readonly_fields = ['event', 'payload', 'created_at', 'processed_at', 'attempts', 'last_error']
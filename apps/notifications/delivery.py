@@ -0,0 +1,135 @@
+"""
+Envío de notificaciones por email.
+
+El worker toma por lotes las notificaciones con ``send_email`` pendientes, las
+agrupa por destinatario (varias notificaciones -> un único email resumen) y
+las envía por una sola conexión SMTP por lote (``get_connection``).
+
+Ninguna transacción queda abierta durante el SMTP: el lote se reclama en una
+transacción corta (``email_claimed_at``), se envía fuera de ella y las enviadas
+se marcan en otra transacción corta con un único UPDATE. Un reclamo de un
+worker que murió vence a los ``CLAIM_TIMEOUT`` y el lote se vuelve a tomar.
+
+Si el servidor SMTP falla, el lote se corta y lo no enviado se libera para la
+próxima corrida. Un destinatario sin email o rechazado por el servidor no se
+reintenta: se le apaga ``send_email``.
+"""
+import logging
+import smtplib
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+EMAIL_BATCH_SIZE = 500
+# Un lote reclamado hace más que esto se considera abandonado
+CLAIM_TIMEOUT = timedelta(minutes=15)
+
+
+def build_message(recipient, notifications):
+    """Un email con la notificación, o un resumen si hay varias"""
+    if len(notifications) == 1:
+        notification = notifications[0]
+        subject = notification.title
+        body = notification.message
+    else:
+        subject = f'Tienes {len(notifications)} notificaciones nuevas'
+        body = '\n\n'.join(
+            f'- {notification.title}\n  {notification.message}' for notification in notifications
+        )
+    return EmailMessage(
+        subject=f'{settings.EMAIL_SUBJECT_PREFIX}{subject}',
+        body=f'Hola {recipient.first_name or recipient.username},\n\n{body}\n',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[recipient.email],
+    )
+
+
+def claim_batch(batch_size=EMAIL_BATCH_SIZE):
+    """Reclama un lote de notificaciones pendientes en una transacción corta"""
+    now = timezone.now()
+    with transaction.atomic():
+        # skip_locked: dos workers en paralelo no reclaman las mismas filas
+        ids = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(send_email=True, email_sent=False)
+            .filter(Q(email_claimed_at__isnull=True) | Q(email_claimed_at__lt=now - CLAIM_TIMEOUT))
+            .order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        # email_claimed_at no forma parte de la representación de /api/sync/:
+        # no hace falta mover updated_at (tampoco al marcar email_sent)
+        Notification.objects.filter(id__in=ids).update(email_claimed_at=now)
+    return list(
+        Notification.objects.filter(id__in=ids).select_related('recipient').order_by('id')
+    )
+
+
+def deliver_batch(batch_size=EMAIL_BATCH_SIZE, connection=None):
+    """
+    Envía un lote de notificaciones pendientes. Devuelve (tomadas, emails
+    enviados); lanza la excepción de SMTP si el servidor falla.
+    """
+    pending = claim_batch(batch_size)
+    if not pending:
+        return 0, 0
+
+    by_recipient = defaultdict(list)
+    for notification in pending:
+        by_recipient[notification.recipient].append(notification)
+
+    sent, undeliverable = [], []
+    messages = 0
+    error = None
+    connection = connection or get_connection()
+    try:
+        with connection:
+            for recipient, notifications in by_recipient.items():
+                ids = [notification.id for notification in notifications]
+                if not recipient.is_active or not recipient.email:
+                    undeliverable.extend(ids)
+                    continue
+                try:
+                    connection.send_messages([build_message(recipient, notifications)])
+                except smtplib.SMTPRecipientsRefused:
+                    logger.warning('El servidor SMTP rechazó a %s', recipient.email)
+                    undeliverable.extend(ids)
+                    continue
+                sent.extend(ids)
+                messages += 1
+    except (smtplib.SMTPException, OSError) as exc:
+        # Lo enviado hasta acá se marca igual, para no duplicar emails
+        error = exc
+
+    handled = set(sent) | set(undeliverable)
+    with transaction.atomic():
+        if sent:
+            Notification.objects.filter(id__in=sent).update(email_sent=True)
+        if undeliverable:
+            Notification.objects.filter(id__in=undeliverable).update(send_email=False)
+        # Lo que no se llegó a enviar queda libre para la próxima corrida
+        unsent = [notification.id for notification in pending if notification.id not in handled]
+        if unsent:
+            Notification.objects.filter(id__in=unsent).update(email_claimed_at=None)
+
+    if error is not None:
+        raise error
+    return len(pending), messages
+
+
+def deliver_emails(batch_size=EMAIL_BATCH_SIZE):
+    """Envía todo lo pendiente por lotes; devuelve (notificaciones, emails)"""
+    total = emails = 0
+    while True:
+        taken, sent = deliver_batch(batch_size)
+        total += taken
+        emails += sent
+        if taken < batch_size:
+            return total, emails
@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.notifications.models import OutboxEvent
+from apps.notifications.outbox import MAX_ATTEMPTS, dispatch_outbox, purge_processed
+
+
+class Command(BaseCommand):
+    help = (
+        'Procesa los eventos pendientes del outbox de notificaciones. Con --loop '
+        'queda corriendo como dispatcher (instalaciones sin Celery)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Repetir indefinidamente')
+        parser.add_argument('--interval', type=float, default=2,
+                            help='Segundos de espera con la cola vacía (con --loop)')
+        parser.add_argument('--purge-days', type=int,
+                            help='Borrar los eventos procesados hace más de N días')
+
+    def handle(self, *args, **options):
+        if options['purge_days'] is not None:
+            deleted = purge_processed(timezone.now() - timedelta(days=options['purge_days']))
+            self.stdout.write(f'{deleted} eventos procesados borrados')
+
+        if not options['loop']:
+            self._dispatch()
+            return
+
+        try:
+            while True:
+                close_old_connections()
+                if not dispatch_outbox():
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def _dispatch(self):
+        processed = dispatch_outbox()
+        failed = OutboxEvent.objects.filter(
+            processed_at__isnull=True, attempts__gte=MAX_ATTEMPTS
+        ).count()
+        self.stdout.write(self.style.SUCCESS(f'{processed} eventos procesados'))
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                f'{failed} eventos fallaron {MAX_ATTEMPTS} veces (ver last_error en el admin)'
+            ))
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.notifications.delivery import EMAIL_BATCH_SIZE, deliver_emails
+
+
+class Command(BaseCommand):
+    help = (
+        'Envía por email las notificaciones pendientes, un resumen por destinatario. '
+        'Con --loop repite cada NOTIFICATION_EMAIL_INTERVAL segundos (instalaciones sin Celery beat)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Repetir indefinidamente')
+        parser.add_argument('--interval', type=int, default=settings.NOTIFICATION_EMAIL_INTERVAL,
+                            help='Segundos entre corridas con --loop')
+        parser.add_argument('--batch-size', type=int, default=EMAIL_BATCH_SIZE,
+                            help='Notificaciones por lote (una conexión SMTP por lote)')
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self._deliver(options['batch_size'])
+            return
+
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    self._deliver(options['batch_size'])
+                except Exception as exc:
+                    # Lo no enviado queda pendiente para la próxima corrida
+                    self.stderr.write(f'Falló el envío de emails: {exc!r}')
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def _deliver(self, batch_size):
+        notifications, emails = deliver_emails(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'{notifications} notificaciones procesadas, {emails} emails enviados'
+        ))
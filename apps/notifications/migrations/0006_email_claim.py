@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:30
+
+from django.db import migrations, models
+
+
+def skip_backlog(apps, schema_editor):
+    # Hasta ahora nada enviaba emails: sin esto, el primer despliegue del
+    # worker mandaría todas las notificaciones históricas
+    apps.get_model('notifications', 'Notification').objects.filter(
+        send_email=True, email_sent=False
+    ).update(send_email=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_email_pending_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='email_claimed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(skip_backlog, migrations.RunPython.noop),
+    ]
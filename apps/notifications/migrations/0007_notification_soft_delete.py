@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_email_claim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+    ]
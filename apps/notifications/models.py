@@ -49,10 +49,16 @@ class Notification(models.Model):
     # Configuración de entrega
     send_email = models.BooleanField(default=False)
     email_sent = models.BooleanField(default=False)
+    # Lote tomado por el worker de emails (ver delivery.py)
+    email_claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
     send_push = models.BooleanField(default=True)
     push_sent = models.BooleanField(default=False)
     
+    # Baja lógica: /api/sync/ informa la eliminación a los otros dispositivos
+    is_active = models.BooleanField(default=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'notifications'
@@ -62,6 +68,11 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=['recipient', '-created_at']),
             models.Index(fields=['recipient', 'is_read']),
+            # Cambios desde el último /api/sync/
+            models.Index(fields=['recipient', 'updated_at', 'id'], name='notifications_sync_idx'),
+            # Emails pendientes del worker de envío (ver delivery.py)
+            models.Index(fields=['id'], name='notifications_email_idx',
+                         condition=models.Q(send_email=True, email_sent=False)),
         ]
     
     def __str__(self):
@@ -134,4 +145,40 @@ class DeviceToken(models.Model):
         unique_together = ['user', 'token']
     
     def __str__(self):
-        return f"{self.user.full_name} - {self.platform} - {self.device_name}"
\ No newline at end of file
+        return f"{self.user.full_name} - {self.platform} - {self.device_name}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Evento pendiente de notificar. Se escribe en la misma transacción que el
+    cambio que lo origina y un dispatcher en segundo plano lo convierte en
+    notificaciones (ver outbox.py).
+    """
+    EVENT_CHOICES = [
+        ('tarjeta_created', 'Tarjetas creadas'),
+        ('tarjeta_status_changed', 'Cambio de estado de tarjetas'),
+        ('tarjeta_assigned', 'Tarjeta asignada'),
+        ('comment_added', 'Comentarios agregados'),
+        ('team_added', 'Agregado a equipo'),
+        ('team_removed', 'Removido de equipo'),
+    ]
+    
+    event = models.CharField(max_length=50, choices=EVENT_CHOICES)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    
+    class Meta:
+        db_table = 'notification_outbox'
+        verbose_name = 'Evento de Notificación'
+        verbose_name_plural = 'Eventos de Notificación'
+        indexes = [
+            # Cola del dispatcher: solo los eventos sin procesar
+            models.Index(fields=['id'], name='outbox_pending_idx',
+                        condition=models.Q(processed_at__isnull=True)),
+        ]
+    
+    def __str__(self):
+        return f"{self.event} #{self.id}"
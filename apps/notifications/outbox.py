@@ -0,0 +1,181 @@
+"""
+Outbox de notificaciones.
+
+Los cambios (alta de tarjetas, aprobaciones, comentarios, equipos) solo
+registran un ``OutboxEvent`` en su propia transacción: si el cambio se revierte,
+el evento también. Tras el commit se encola el dispatcher, que toma los eventos
+pendientes por lotes, arma las notificaciones de todo el lote (la expansión a
+cada supervisor ocurre acá, fuera del request) y las inserta con un bulk_create.
+"""
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import services
+from .models import Notification, OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_BATCH_SIZE = 500
+# Un evento que falla esta cantidad de veces queda en la tabla con last_error
+MAX_ATTEMPTS = 5
+
+
+def publish(event, **payload):
+    """Registra el evento en la transacción en curso; el dispatcher corre después del commit"""
+    OutboxEvent.objects.create(event=event, payload=payload)
+    transaction.on_commit(schedule_dispatch)
+
+
+def schedule_dispatch():
+    from .tasks import dispatch_notifications
+    dispatch_notifications.enqueue()
+
+
+def _tarjeta_created(payloads):
+    from apps.tarjetas.models import TarjetaRoja
+
+    ids = [pk for payload in payloads for pk in payload['tarjeta_ids']]
+    tarjetas = TarjetaRoja.objects.filter(id__in=ids).select_related('created_by').order_by('id')
+    return services.tarjeta_created_notifications(list(tarjetas))
+
+
+def _tarjeta_status_changed(payloads):
+    from apps.tarjetas.models import TarjetaComment, TarjetaRoja
+    from apps.users.models import User
+
+    tarjetas = TarjetaRoja.objects.in_bulk(
+        {pk for payload in payloads for pk in payload['tarjeta_ids']}
+    )
+    senders = User.objects.in_bulk({payload['sender_id'] for payload in payloads} - {None})
+    comments = TarjetaComment.objects.in_bulk(
+        {pk for payload in payloads for pk in payload.get('comment_ids', [])}
+    )
+
+    notifications = []
+    for payload in payloads:
+        batch = [tarjetas[pk] for pk in payload['tarjeta_ids'] if pk in tarjetas]
+        for tarjeta in batch:
+            # El estado del evento, no el actual (pudo cambiar otra vez)
+            tarjeta.status = payload['status']
+        notifications.extend(services.status_change_notifications(
+            batch, senders.get(payload['sender_id']),
+            [comments[pk] for pk in payload.get('comment_ids', []) if pk in comments]
+        ))
+    return notifications
+
+
+def _tarjeta_assigned(payloads):
+    from apps.tarjetas.models import TarjetaRoja
+
+    tarjetas = TarjetaRoja.objects.in_bulk({payload['tarjeta_id'] for payload in payloads})
+    content_type = services.tarjeta_content_type()
+    notifications = []
+    for payload in payloads:
+        tarjeta = tarjetas.get(payload['tarjeta_id'])
+        if tarjeta is None:
+            continue
+        tarjeta.assigned_to_id = payload['assigned_to_id']
+        notifications.append(
+            services.tarjeta_assigned_notification(tarjeta, payload['sender_id'], content_type)
+        )
+    return notifications
+
+
+def _comment_added(payloads):
+    from apps.tarjetas.models import TarjetaComment
+
+    ids = [pk for payload in payloads for pk in payload['comment_ids']]
+    comments = TarjetaComment.objects.filter(id__in=ids).select_related('tarjeta', 'user').order_by('id')
+    return services.comment_notifications(list(comments))
+
+
+def _team_membership(added):
+    def handler(payloads):
+        from apps.teams.models import TeamMembership
+
+        memberships = TeamMembership.objects.filter(
+            id__in=[payload['membership_id'] for payload in payloads]
+        ).select_related('team').order_by('id')
+        return services.team_notifications(list(memberships), added)
+    return handler
+
+
+HANDLERS = {
+    'tarjeta_created': _tarjeta_created,
+    'tarjeta_status_changed': _tarjeta_status_changed,
+    'tarjeta_assigned': _tarjeta_assigned,
+    'comment_added': _comment_added,
+    'team_added': _team_membership(added=True),
+    'team_removed': _team_membership(added=False),
+}
+
+
+def _build(events):
+    """Notificaciones de un lote: una llamada por tipo de evento"""
+    payloads = defaultdict(list)
+    for event in events:
+        payloads[event.event].append(event.payload)
+    notifications = []
+    for event, group in payloads.items():
+        notifications.extend(HANDLERS[event](group))
+    return notifications
+
+
+def dispatch_batch(batch_size=DISPATCH_BATCH_SIZE):
+    """Procesa un lote de eventos pendientes; devuelve cuántos tomó"""
+    with transaction.atomic():
+        # skip_locked: varios dispatchers en paralelo no toman el mismo evento
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True, attempts__lt=MAX_ATTEMPTS)
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        # Cada armado corre en su savepoint: en PostgreSQL un error de base
+        # aborta la transacción y sin el savepoint fallaría todo lo que sigue
+        failed = {}
+        try:
+            with transaction.atomic():
+                notifications = _build(events)
+        except Exception:
+            # Se arma evento por evento para que uno con error no frene al resto
+            notifications = []
+            for event in events:
+                try:
+                    with transaction.atomic():
+                        notifications.extend(_build([event]))
+                except Exception as exc:
+                    logger.exception('Falló el evento de notificación %s', event.id)
+                    failed[event.id] = exc
+
+        Notification.objects.bulk_create(notifications, batch_size=1000)
+        OutboxEvent.objects.filter(
+            id__in=[event.id for event in events if event.id not in failed]
+        ).update(processed_at=timezone.now(), attempts=F('attempts') + 1)
+        for event_id, exc in failed.items():
+            OutboxEvent.objects.filter(id=event_id).update(
+                attempts=F('attempts') + 1, last_error=repr(exc)
+            )
+    return len(events)
+
+
+def dispatch_outbox(batch_size=DISPATCH_BATCH_SIZE):
+    """Vacía la cola por lotes; devuelve la cantidad de eventos tomados"""
+    total = 0
+    while True:
+        taken = dispatch_batch(batch_size)
+        total += taken
+        if taken < batch_size:
+            return total
+
+
+def purge_processed(before):
+    """Borra los eventos procesados antes de ``before``"""
+    deleted, _ = OutboxEvent.objects.filter(processed_at__lt=before).delete()
+    return deleted
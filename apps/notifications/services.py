@@ -0,0 +1,286 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from .models import Notification, NotificationPreference
+
+# Las funciones ``*_notification(s)`` arman notificaciones sin guardarlas: el
+# dispatcher del outbox (outbox.py) las inserta con un único bulk_create por lote.
+
+def _excerpt(text, length=50):
+    return f'{text[:length]}{"..." if len(text) > length else ""}'
+
+def load_preferences(user_ids):
+    """
+    Preferencias de varios usuarios con una consulta. Quien no tiene fila
+    recibe los valores por defecto del modelo.
+    """
+    return defaultdict(NotificationPreference, {
+        pref.user_id: pref
+        for pref in NotificationPreference.objects.filter(user_id__in=user_ids)
+    })
+
+def tarjeta_content_type():
+    from apps.tarjetas.models import TarjetaRoja
+    return ContentType.objects.get_for_model(TarjetaRoja)
+
+def tarjeta_created_notification(tarjeta, recipient_id, content_type, pref):
+    """Notificación (sin guardar) de nueva tarjeta para un supervisor"""
+    return Notification(
+        recipient_id=recipient_id,
+        sender_id=tarjeta.created_by_id,
+        notification_type='tarjeta_created',
+        title=f'Nueva Tarjeta Roja: {tarjeta.code}',
+        message=f'{tarjeta.created_by.full_name} ha creado una nueva tarjeta roja: {_excerpt(tarjeta.descripcion)}',
+        content_type=content_type,
+        object_id=tarjeta.id,
+        priority='normal' if tarjeta.priority == 'low' else 'high',
+        send_email=pref.email_tarjeta_created,
+        send_push=pref.push_tarjeta_created
+    )
+
+def tarjeta_created_notifications(tarjetas):
+    """
+    Notificaciones de un lote de tarjetas nuevas para todos los supervisores
+    activos. Supervisores y preferencias se leen una vez por lote, no por tarjeta.
+    """
+    from apps.users.models import User
+    
+    supervisor_ids = list(
+        User.objects.filter(role__in=['admin', 'supervisor'], is_active=True)
+        .order_by('id').values_list('id', flat=True)
+    )
+    if not tarjetas or not supervisor_ids:
+        return []
+    preferences = load_preferences(supervisor_ids)
+    content_type = tarjeta_content_type()
+    return [
+        tarjeta_created_notification(tarjeta, user_id, content_type, preferences[user_id])
+        for tarjeta in tarjetas for user_id in supervisor_ids
+    ]
+
+def tarjeta_status_notification(tarjeta, sender, content_type):
+    """Notificación (sin guardar) al creador cuando su tarjeta se aprueba o rechaza"""
+    if tarjeta.status == 'approved':
+        return Notification(
+            recipient_id=tarjeta.created_by_id,
+            sender=sender,
+            notification_type='tarjeta_approved',
+            title=f'Tarjeta Aprobada: {tarjeta.code}',
+            message=(f'Tu tarjeta roja ha sido aprobada por {sender.full_name}' if sender
+                     else 'Tu tarjeta roja ha sido aprobada'),
+            content_type=content_type,
+            object_id=tarjeta.id,
+            priority='normal'
+        )
+    if tarjeta.status == 'rejected':
+        return Notification(
+            recipient_id=tarjeta.created_by_id,
+            notification_type='tarjeta_rejected',
+            title=f'Tarjeta Rechazada: {tarjeta.code}',
+            message='Tu tarjeta roja ha sido rechazada. Por favor revisa los comentarios.',
+            content_type=content_type,
+            object_id=tarjeta.id,
+            priority='high'
+        )
+    return None
+
+def status_change_notifications(tarjetas, sender, comments=()):
+    """
+    Notificaciones de un cambio de estado (individual o masivo): las de
+    aprobación/rechazo y, si se agregó un comentario interno en el lote, las
+    que enviaría el signal de comentarios.
+    """
+    from apps.users.models import User
+    
+    content_type = tarjeta_content_type()
+    notifications = [
+        notification for notification in (
+            tarjeta_status_notification(tarjeta, sender, content_type) for tarjeta in tarjetas
+        ) if notification is not None
+    ]
+    
+    if comments:
+        by_id = {tarjeta.id: tarjeta for tarjeta in tarjetas}
+        recipient_ids = {
+            user_id for tarjeta in tarjetas
+            for user_id in (tarjeta.created_by_id, tarjeta.assigned_to_id)
+            if user_id and user_id != sender.id
+        }
+        # Los comentarios masivos son internos: sólo los ven los supervisores
+        supervisors = set(
+            User.objects.filter(id__in=recipient_ids, role__in=['admin', 'supervisor'])
+            .values_list('id', flat=True)
+        )
+        preferences = load_preferences(supervisors)
+        
+        for comment in comments:
+            tarjeta = by_id[comment.tarjeta_id]
+            for user_id in dict.fromkeys((tarjeta.created_by_id, tarjeta.assigned_to_id)):
+                if user_id not in supervisors:
+                    continue
+                pref = preferences[user_id]
+                notifications.append(Notification(
+                    recipient_id=user_id,
+                    sender=sender,
+                    notification_type='comment_added',
+                    title=f'Nuevo comentario en {tarjeta.code}',
+                    message=f'{sender.full_name} ha agregado un comentario',
+                    content_type=content_type,
+                    object_id=tarjeta.id,
+                    priority='normal',
+                    send_email=pref.email_comment_added,
+                    send_push=pref.push_comment_added
+                ))
+    
+    return notifications
+
+def tarjeta_assigned_notification(tarjeta, sender_id, content_type):
+    """Notificación (sin guardar) al nuevo responsable de una tarjeta"""
+    return Notification(
+        recipient_id=tarjeta.assigned_to_id,
+        sender_id=sender_id,
+        notification_type='tarjeta_assigned',
+        title=f'Tarjeta Asignada: {tarjeta.code}',
+        message=f'Te han asignado una tarjeta roja: {_excerpt(tarjeta.descripcion)}',
+        content_type=content_type,
+        object_id=tarjeta.id,
+        priority='high' if tarjeta.priority in ['high', 'critical'] else 'normal'
+    )
+
+def comment_notifications(comments):
+    """
+    Notificaciones de comentarios nuevos para el creador y el responsable de
+    la tarjeta (salvo quien comentó). Los internos solo llegan a supervisores.
+    ``comments`` debe traer ``tarjeta`` y ``user`` con select_related.
+    """
+    from apps.users.models import User
+    
+    recipients = {
+        comment.id: [
+            user_id for user_id in dict.fromkeys(
+                (comment.tarjeta.created_by_id, comment.tarjeta.assigned_to_id)
+            ) if user_id and user_id != comment.user_id
+        ]
+        for comment in comments
+    }
+    user_ids = {user_id for ids in recipients.values() for user_id in ids}
+    supervisors = set(
+        User.objects.filter(id__in=user_ids, role__in=['admin', 'supervisor'])
+        .values_list('id', flat=True)
+    )
+    preferences = load_preferences(user_ids)
+    content_type = tarjeta_content_type()
+    
+    notifications = []
+    for comment in comments:
+        for user_id in recipients[comment.id]:
+            if comment.is_internal and user_id not in supervisors:
+                continue
+            pref = preferences[user_id]
+            notifications.append(Notification(
+                recipient_id=user_id,
+                sender_id=comment.user_id,
+                notification_type='comment_added',
+                title=f'Nuevo comentario en {comment.tarjeta.code}',
+                message=f'{comment.user.full_name} ha agregado un comentario',
+                content_type=content_type,
+                object_id=comment.tarjeta_id,
+                priority='normal',
+                send_email=pref.email_comment_added,
+                send_push=pref.push_comment_added
+            ))
+    return notifications
+
+def team_notifications(memberships, added):
+    """
+    Notificaciones de altas (``added``) o bajas de equipos. ``memberships``
+    debe traer ``team`` con select_related.
+    """
+    from apps.teams.models import Team
+    
+    content_type = ContentType.objects.get_for_model(Team)
+    notifications = []
+    for membership in memberships:
+        team = membership.team
+        if added:
+            notifications.append(Notification(
+                recipient_id=membership.user_id,
+                sender_id=membership.added_by_id,
+                notification_type='team_added',
+                title=f'Agregado al equipo: {team.name}',
+                message=f'Has sido agregado al equipo {team.name} como {membership.get_role_display()}',
+                content_type=content_type,
+                object_id=team.id,
+                priority='normal'
+            ))
+        else:
+            notifications.append(Notification(
+                recipient_id=membership.user_id,
+                notification_type='team_removed',
+                title=f'Removido del equipo: {team.name}',
+                message=f'Has sido removido del equipo {team.name}',
+                content_type=content_type,
+                object_id=team.id,
+                priority='normal'
+            ))
+    return notifications
+
+def overdue_recipient_ids(tarjetas):
+    """
+    Destinatarios del aviso de vencimiento por tarjeta: responsable asignado,
+    creador y responsable del área (o todos los supervisores si el área no
+    tiene responsable). Dos consultas en total, sin importar el lote.
+    """
+    from apps.users.models import User
+    from apps.categories.models import WorkArea
+    
+    area_ids = {tarjeta.work_area_id for tarjeta in tarjetas if tarjeta.work_area_id}
+    area_responsible = dict(
+        WorkArea.objects.filter(id__in=area_ids, responsible__isnull=False)
+        .values_list('id', 'responsible_id')
+    )
+    supervisors = None
+    
+    recipients = {}
+    for tarjeta in tarjetas:
+        responsible_id = area_responsible.get(tarjeta.work_area_id)
+        if responsible_id:
+            supervisor_ids = [responsible_id]
+        else:
+            if supervisors is None:
+                supervisors = list(
+                    User.objects.filter(role__in=['admin', 'supervisor'], is_active=True)
+                    .values_list('id', flat=True)
+                )
+            supervisor_ids = supervisors
+        recipients[tarjeta.id] = [
+            user_id for user_id in dict.fromkeys(
+                (tarjeta.assigned_to_id, tarjeta.created_by_id, *supervisor_ids)
+            ) if user_id
+        ]
+    return recipients
+
+def notify_tarjetas_overdue(tarjetas):
+    """Avisos de vencimiento de un lote de tarjetas en un único bulk_create"""
+    content_type = tarjeta_content_type()
+    recipients = overdue_recipient_ids(tarjetas)
+    user_ids = {user_id for ids in recipients.values() for user_id in ids}
+    preferences = load_preferences(user_ids)
+    
+    notifications = []
+    for tarjeta in tarjetas:
+        for user_id in recipients[tarjeta.id]:
+            pref = preferences[user_id]
+            notifications.append(Notification(
+                recipient_id=user_id,
+                notification_type='tarjeta_overdue',
+                title=f'Tarjeta Vencida: {tarjeta.code}',
+                message=f'La tarjeta roja venció el {tarjeta.fecha_final:%d/%m/%Y} y sigue abierta',
+                content_type=content_type,
+                object_id=tarjeta.id,
+                priority='urgent' if tarjeta.priority == 'critical' else 'high',
+                send_email=pref.email_tarjeta_overdue,
+                send_push=pref.push_tarjeta_overdue
+            ))
+    
+    return Notification.objects.bulk_create(notifications, batch_size=1000)
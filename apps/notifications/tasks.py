@@ -0,0 +1,13 @@
+from formokaizen_backend.background import background_task
+
+
+@background_task
+def dispatch_notifications():
+    from .outbox import dispatch_outbox
+    return dispatch_outbox()
+
+
+@background_task
+def send_notification_emails():
+    from .delivery import deliver_emails
+    return deliver_emails()
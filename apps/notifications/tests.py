@@ -0,0 +1,246 @@
+import smtplib
+import socket
+from unittest import mock, skipIf
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import delivery
+from .models import Notification
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    Controller = None
+
+User = get_user_model()
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class EmailDeliveryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = User.objects.create_user(username='ana', email='ana@example.com', password='x',
+                                           first_name='Ana')
+        cls.beto = User.objects.create_user(username='beto', email='beto@example.com', password='x')
+        cls.sin_email = User.objects.create_user(username='nadie', email='', password='x')
+
+    def notify(self, recipient, count, send_email=True):
+        return Notification.objects.bulk_create([
+            Notification(recipient=recipient, notification_type='system_update',
+                         title=f'Aviso {i}', message=f'Mensaje {i}', send_email=send_email)
+            for i in range(count)
+        ])
+
+    def deliver(self, batch_size=delivery.EMAIL_BATCH_SIZE):
+        with mock.patch.object(delivery, 'get_connection', wraps=delivery.get_connection) as opened:
+            result = delivery.deliver_emails(batch_size)
+        return result, opened.call_count
+
+    def test_one_digest_per_recipient_over_one_connection(self):
+        self.notify(self.ana, 3)
+        self.notify(self.beto, 1)
+        self.notify(self.beto, 1, send_email=False)
+
+        with CaptureQueriesContext(connection) as ctx:
+            (taken, emails), connections = self.deliver()
+
+        self.assertEqual((taken, emails, connections), (4, 2, 1))
+        messages = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn('Tienes 3 notificaciones nuevas', messages['ana@example.com'].subject)
+        for i in range(3):
+            self.assertIn(f'Aviso {i}', messages['ana@example.com'].body)
+        self.assertIn('Aviso 0', messages['beto@example.com'].subject)
+
+        # Las enviadas se marcan con un único UPDATE
+        marks = [query for query in ctx.captured_queries
+                 if query['sql'].startswith('UPDATE') and '"email_sent"' in query['sql']]
+        self.assertEqual(len(marks), 1)
+        self.assertEqual(Notification.objects.filter(send_email=True, email_sent=False).count(), 0)
+        self.assertEqual(Notification.objects.filter(email_sent=True).count(), 4)
+
+        self.assertEqual(self.deliver()[0], (0, 0))
+
+    def test_one_connection_per_batch(self):
+        self.notify(self.ana, 3)
+        self.notify(self.beto, 2)
+
+        (taken, emails), connections = self.deliver(batch_size=3)
+
+        # Lotes de 3 y 2: una conexión cada uno
+        self.assertEqual(taken, 5)
+        self.assertEqual(connections, 2)
+        self.assertEqual(Notification.objects.filter(email_sent=True).count(), 5)
+
+    def test_undeliverable_recipients_are_not_retried(self):
+        self.notify(self.sin_email, 2)
+
+        self.assertEqual(self.deliver()[0], (2, 0))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(Notification.objects.filter(send_email=True).exists())
+
+    def test_smtp_failure_releases_unsent_notifications(self):
+        self.notify(self.ana, 1)
+        self.notify(self.beto, 1)
+
+        send = mock.Mock(side_effect=[1, smtplib.SMTPServerDisconnected('caído')])
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', send):
+            with self.assertRaises(smtplib.SMTPServerDisconnected):
+                delivery.deliver_batch()
+
+        # La primera se marcó enviada; la otra queda libre para la próxima corrida
+        pending = Notification.objects.get(send_email=True, email_sent=False)
+        self.assertIsNone(pending.email_claimed_at)
+        self.assertEqual(Notification.objects.filter(email_sent=True).count(), 1)
+        self.assertEqual(self.deliver()[0], (1, 1))
+
+    def test_claimed_notifications_are_skipped_until_the_claim_expires(self):
+        notification, = self.notify(self.ana, 1)
+        Notification.objects.filter(pk=notification.pk).update(email_claimed_at=timezone.now())
+        self.assertEqual(self.deliver()[0], (0, 0))
+
+        expired = timezone.now() - delivery.CLAIM_TIMEOUT * 2
+        Notification.objects.filter(pk=notification.pk).update(email_claimed_at=expired)
+        self.assertEqual(self.deliver()[0], (1, 1))
+
+
+class NotificationDeleteSyncTests(TestCase):
+    """Las eliminaciones llegan a /api/sync/ como bajas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='ana', email='ana@example.com', password='x')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.notifications = Notification.objects.bulk_create([
+            Notification(recipient=self.user, notification_type='system_update',
+                         title=f'Aviso {i}', message='Mensaje', send_email=True)
+            for i in range(3)
+        ])
+
+    def sync(self, token=None):
+        response = self.client.get('/api/sync/', {'since': token} if token else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_deleted_notifications_are_reported_as_tombstones(self):
+        first, second, third = self.notifications
+        token = self.sync()['token']
+
+        response = self.client.delete(f'/api/notifications/{first.pk}/delete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.delete(f'/api/notifications/{first.pk}/delete/').status_code,
+                         404)
+
+        data = self.sync(token)
+        self.assertEqual(data['deleted']['notifications'], [first.pk])
+        self.assertNotIn(first.pk, [item['id'] for item in data['changes']['notifications']])
+
+        listed = self.client.get('/api/notifications/').data
+        self.assertEqual(listed['count'], 2)
+
+        self.client.delete('/api/notifications/clear-all/')
+        data = self.sync(token)
+        self.assertEqual(sorted(data['deleted']['notifications']),
+                         [first.pk, second.pk, third.pk])
+        self.assertEqual(self.client.get('/api/notifications/').data['count'], 0)
+
+        # Una sincronización desde cero no trae las bajas
+        self.assertEqual(self.sync()['changes']['notifications'], [])
+
+    def test_deleted_notifications_are_not_emailed(self):
+        self.client.delete('/api/notifications/clear-all/')
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            self.assertEqual(delivery.deliver_emails(), (0, 0))
+
+
+class SMTPStandIn:
+    """Handler de aiosmtpd: guarda los mensajes, cuenta conexiones y rechaza 'rechazado@'"""
+
+    def __init__(self):
+        self.connections = 0
+        self.messages = []
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        # smtplib saluda una vez por conexión
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith('rechazado@'):
+            return '550 No existe el destinatario'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode()))
+        return '250 Message accepted for delivery'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@skipIf(Controller is None, 'aiosmtpd no está instalado')
+class SMTPDeliveryTests(TestCase):
+    """Contra un servidor SMTP local real, con el backend SMTP de Django"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = User.objects.create_user(username='ana', email='ana@example.com', password='x')
+        cls.beto = User.objects.create_user(username='beto', email='beto@example.com', password='x')
+        cls.rechazado = User.objects.create_user(username='rechazado',
+                                                 email='rechazado@example.com', password='x')
+
+    def setUp(self):
+        self.smtp = SMTPStandIn()
+        port = free_port()
+        controller = Controller(self.smtp, hostname='127.0.0.1', port=port)
+        controller.start()
+        self.addCleanup(controller.stop)
+
+        settings_override = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=port, EMAIL_USE_TLS=False, EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='', EMAIL_TIMEOUT=5,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def notify(self, recipient, count):
+        Notification.objects.bulk_create([
+            Notification(recipient=recipient, notification_type='system_update',
+                         title=f'Aviso {i}', message=f'Mensaje {i}', send_email=True)
+            for i in range(count)
+        ])
+
+    def test_batches_reuse_one_connection_and_skip_refused_recipients(self):
+        self.notify(self.ana, 2)
+        self.notify(self.rechazado, 1)
+        self.notify(self.beto, 2)
+
+        # Lotes de 4 (ana x2, rechazado, beto) y 1 (beto): una conexión SMTP cada uno
+        self.assertEqual(delivery.deliver_emails(batch_size=4), (5, 3))
+        self.assertEqual(self.smtp.connections, 2)
+
+        recipients = [rcpt_tos for rcpt_tos, _ in self.smtp.messages]
+        self.assertEqual(recipients, [['ana@example.com'], ['beto@example.com'],
+                                      ['beto@example.com']])
+        self.assertIn('Tienes 2 notificaciones nuevas', self.smtp.messages[0][1])
+        self.assertEqual(Notification.objects.filter(email_sent=True).count(), 4)
+        # Rechazado por el servidor: no se reintenta
+        self.assertFalse(
+            Notification.objects.filter(recipient=self.rechazado, send_email=True).exists()
+        )
+        self.assertEqual(delivery.deliver_emails(), (0, 0))
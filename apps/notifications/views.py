@@ -4,16 +4,29 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
 from django.utils import timezone
+from apps.tarjetas.pagination import page_size
 from .models import Notification, NotificationPreference, DeviceToken
 from .serializers import (
     NotificationSerializer, NotificationPreferenceSerializer,
     DeviceTokenSerializer, CreateNotificationSerializer
 )
 
+def soft_delete(queryset):
+    """
+    Baja lógica de las notificaciones activas del queryset; devuelve cuántas.
+    La fila queda como baja para /api/sync/ y ya no se envía por email.
+    """
+    now = timezone.now()
+    return queryset.filter(is_active=True).update(
+        is_active=False, send_email=False, updated_at=now
+    )
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def notifications_list(request):
-    queryset = Notification.objects.filter(recipient=request.user).select_related('sender')
+    queryset = Notification.objects.filter(
+        recipient=request.user, is_active=True
+    ).select_related('sender')
     
     # Filtros
     unread_only = request.GET.get('unread_only', 'false').lower() == 'true'
@@ -29,13 +42,22 @@ def notifications_list(request):
         queryset = queryset.filter(priority=priority)
     
     # Paginación
-    page = int(request.GET.get('page', 1))
-    per_page = int(request.GET.get('per_page', 50))
+    try:
+        page = int(request.GET.get('page', 1))
+        if page < 1:
+            raise ValueError(page)
+        per_page = page_size(request, default=50)
+    except ValueError:
+        return Response({
+            'error': 'per_page y page deben ser enteros positivos'
+        }, status=status.HTTP_400_BAD_REQUEST)
     start = (page - 1) * per_page
     end = start + per_page
     
     total_count = queryset.count()
-    unread_count = Notification.objects.filter(recipient=request.user, is_read=False).count()
+    unread_count = Notification.objects.filter(
+        recipient=request.user, is_active=True, is_read=False
+    ).count()
     notifications = queryset[start:end]
     
     serializer = NotificationSerializer(notifications, many=True)
@@ -53,7 +75,7 @@ def notifications_list(request):
 @permission_classes([IsAuthenticated])
 def mark_notification_read(request, pk):
     try:
-        notification = Notification.objects.get(pk=pk, recipient=request.user)
+        notification = Notification.objects.get(pk=pk, recipient=request.user, is_active=True)
     except Notification.DoesNotExist:
         return Response({'error': 'Notificación no encontrada'}, status=status.HTTP_404_NOT_FOUND)
     
@@ -65,10 +87,12 @@ def mark_notification_read(request, pk):
 def mark_all_read(request):
     updated_count = Notification.objects.filter(
         recipient=request.user, 
+        is_active=True,
         is_read=False
     ).update(
         is_read=True, 
-        read_at=timezone.now()
+        read_at=timezone.now(),
+        updated_at=timezone.now()
     )
     
     return Response({
@@ -78,19 +102,16 @@ def mark_all_read(request):
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_notification(request, pk):
-    try:
-        notification = Notification.objects.get(pk=pk, recipient=request.user)
-    except Notification.DoesNotExist:
+    deleted = soft_delete(Notification.objects.filter(pk=pk, recipient=request.user))
+    if not deleted:
         return Response({'error': 'Notificación no encontrada'}, status=status.HTTP_404_NOT_FOUND)
     
-    notification.delete()
     return Response({'message': 'Notificación eliminada'})
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def clear_all_notifications(request):
-    deleted_count = Notification.objects.filter(recipient=request.user).count()
-    Notification.objects.filter(recipient=request.user).delete()
+    deleted_count = soft_delete(Notification.objects.filter(recipient=request.user))
     
     return Response({
         'message': f'{deleted_count} notificaciones eliminadas'
@@ -141,12 +162,12 @@ def create_notification(request):
         from django.contrib.auth import get_user_model
         User = get_user_model()
         
-        recipients = User.objects.filter(id__in=data['recipient_ids'])
-        notifications_created = []
+        recipient_ids = User.objects.filter(id__in=data['recipient_ids']).values_list('id', flat=True)
         
-        for recipient in recipients:
-            notification = Notification.objects.create(
-                recipient=recipient,
+        # Los emails los envía el worker de delivery.py (send_notification_emails)
+        notifications_created = Notification.objects.bulk_create([
+            Notification(
+                recipient_id=recipient_id,
                 sender=request.user,
                 notification_type=data['notification_type'],
                 title=data['title'],
@@ -155,9 +176,8 @@ def create_notification(request):
                 send_email=data['send_email'],
                 send_push=data['send_push']
             )
-            notifications_created.append(notification)
-        
-        # TODO: Aquí se enviarían las notificaciones push y email
+            for recipient_id in recipient_ids
+        ])
         
         return Response({
             'message': f'{len(notifications_created)} notificaciones creadas',
@@ -170,8 +190,9 @@ def create_notification(request):
 @permission_classes([IsAuthenticated])
 def notification_stats(request):
     """Estadísticas de notificaciones para el usuario actual"""
-    total = Notification.objects.filter(recipient=request.user).count()
-    unread = Notification.objects.filter(recipient=request.user, is_read=False).count()
+    notifications = Notification.objects.filter(recipient=request.user, is_active=True)
+    total = notifications.count()
+    unread = notifications.filter(is_read=False).count()
     
     # Notificaciones por tipo (últimos 30 días)
     from datetime import datetime, timedelta
@@ -179,8 +200,7 @@ def notification_stats(request):
     
     type_stats = {}
     for notification_type, _ in Notification.TYPE_CHOICES:
-        count = Notification.objects.filter(
-            recipient=request.user,
+        count = notifications.filter(
             notification_type=notification_type,
             created_at__gte=thirty_days_ago
         ).count()
@@ -0,0 +1,51 @@
+from rest_framework import serializers
+
+from apps.categories.models import Category, WorkArea
+from apps.notifications.models import Notification
+from apps.tarjetas.models import TarjetaRoja, TarjetaComment
+from apps.tarjetas.serializers import TarjetaImageSerializer
+
+# Representaciones planas para /api/sync/: las relaciones van como ids y los
+# usuarios referenciados una sola vez en 'users'. Sin campos calculados
+# (is_overdue, days_open): cambian con la fecha sin que cambie updated_at.
+
+class SyncTarjetaSerializer(serializers.ModelSerializer):
+    code = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = TarjetaRoja
+        fields = ['id', 'code', 'numero', 'fecha', 'sector', 'descripcion', 'razon_motivo',
+                 'quien_lo_hizo', 'destino_final', 'fecha_final', 'status', 'priority',
+                 'category', 'work_area', 'created_by', 'assigned_to', 'approved_by',
+                 'resolution_notes', 'created_at', 'updated_at', 'approved_at', 'closed_at']
+
+class SyncCommentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TarjetaComment
+        fields = ['id', 'tarjeta', 'user', 'comment', 'is_internal', 'created_at', 'updated_at']
+
+class SyncImageSerializer(TarjetaImageSerializer):
+    uploaded_by = serializers.PrimaryKeyRelatedField(read_only=True)
+    
+    class Meta(TarjetaImageSerializer.Meta):
+        fields = ['id', 'tarjeta', 'image', 'description', 'uploaded_by', 'uploaded_at',
+                 'processing_status', 'variants', 'updated_at']
+
+class SyncCategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'description', 'color', 'icon', 'updated_at']
+
+class SyncWorkAreaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WorkArea
+        fields = ['id', 'name', 'category', 'description', 'responsible', 'updated_at']
+
+class SyncNotificationSerializer(serializers.ModelSerializer):
+    # 'tarjetaroja', 'team', ...: junto con object_id identifica el objeto
+    content_type = serializers.SlugRelatedField(slug_field='model', read_only=True)
+    
+    class Meta:
+        model = Notification
+        fields = ['id', 'notification_type', 'title', 'message', 'priority', 'sender',
+                 'content_type', 'object_id', 'is_read', 'read_at', 'created_at', 'updated_at']
@@ -0,0 +1,149 @@
+"""
+Sincronización incremental de la app móvil.
+
+El token guarda, por colección, la posición (updated_at, id) hasta la que el
+cliente ya recibió cambios. Cada consulta recorre el índice (updated_at, id)
+desde esa posición: el costo depende de cuántas filas cambiaron y no del tamaño
+de las tablas, y un cliente al día recibe solo el token nuevo.
+
+Una transacción puede confirmarse después de que otra fila con updated_at
+posterior ya se entregó. Por eso, al ponerse al día, la posición retrocede hasta
+``now - OVERLAP`` y la sincronización siguiente vuelve a pedir esa ventana. El
+cliente aplica los cambios por id, así que recibir una fila dos veces no tiene efecto.
+"""
+import base64
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.categories.models import Category, WorkArea
+from apps.notifications.models import Notification
+from apps.tarjetas.models import TarjetaRoja, TarjetaComment, TarjetaImage
+from apps.users.models import User
+from apps.users.serializers import UserStubSerializer
+
+from .serializers import (
+    SyncCategorySerializer, SyncCommentSerializer, SyncImageSerializer,
+    SyncNotificationSerializer, SyncTarjetaSerializer, SyncWorkAreaSerializer
+)
+
+TOKEN_VERSION = 1
+# Filas por colección y por respuesta; con más, has_more=true
+BATCH_SIZE = 500
+OVERLAP = timedelta(seconds=30)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+# (colección, serializer, baja lógica con is_active, campos que referencian usuarios)
+COLLECTIONS = [
+    ('tarjetas', SyncTarjetaSerializer, True,
+     ['created_by_id', 'assigned_to_id', 'approved_by_id']),
+    ('comments', SyncCommentSerializer, False, ['user_id']),
+    ('images', SyncImageSerializer, False, ['uploaded_by_id']),
+    ('categories', SyncCategorySerializer, True, []),
+    ('work_areas', SyncWorkAreaSerializer, True, ['responsible_id']),
+    ('notifications', SyncNotificationSerializer, True, ['sender_id']),
+]
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def collection_querysets(user):
+    # Comentarios e imágenes de una tarjeta dada de baja no se envían: el
+    # cliente los descarta junto con la tarjeta al recibir su baja
+    return {
+        'tarjetas': TarjetaRoja.objects.all(),
+        'comments': TarjetaComment.objects.filter(tarjeta__is_active=True),
+        'images': TarjetaImage.objects.filter(tarjeta__is_active=True),
+        'categories': Category.objects.all(),
+        'work_areas': WorkArea.objects.all(),
+        'notifications': Notification.objects.filter(recipient=user).select_related('content_type'),
+    }
+
+
+def encode_token(user, positions):
+    """Token opaco: versión, usuario y (microsegundos, id) por colección"""
+    raw = [TOKEN_VERSION, user.pk] + [
+        [(positions[name][0] - EPOCH) // MICROSECOND, positions[name][1]]
+        if positions.get(name) else None
+        for name, *_ in COLLECTIONS
+    ]
+    encoded = json.dumps(raw, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(encoded).decode().rstrip('=')
+
+
+def decode_token(user, token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        version, user_id, *raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if version != TOKEN_VERSION or user_id != user.pk or len(raw) != len(COLLECTIONS):
+            raise InvalidToken(token)
+        return {
+            name: (EPOCH + int(position[0]) * MICROSECOND, int(position[1])) if position else None
+            for (name, *_), position in zip(COLLECTIONS, raw)
+        }
+    except (ValueError, TypeError, IndexError, OverflowError):
+        raise InvalidToken(token)
+
+
+def changed_rows(queryset, position, soft_delete):
+    """Hasta BATCH_SIZE filas posteriores a la posición, en orden (updated_at, id)"""
+    queryset = queryset.order_by('updated_at', 'id')
+    if position is None:
+        # Primera sincronización: las bajas anteriores no hacen falta
+        if soft_delete:
+            queryset = queryset.filter(is_active=True)
+    else:
+        value, pk = position
+        queryset = queryset.filter(updated_at__gte=value).filter(
+            Q(updated_at__gt=value) | Q(id__gt=pk)
+        )
+    rows = list(queryset[:BATCH_SIZE + 1])
+    return rows[:BATCH_SIZE], len(rows) > BATCH_SIZE
+
+
+def next_position(rows, has_more, horizon):
+    if has_more:
+        return rows[-1].updated_at, rows[-1].id
+    if rows and rows[-1].updated_at <= horizon:
+        return rows[-1].updated_at, rows[-1].id
+    # Al día: la ventana reciente se vuelve a pedir (ver docstring del módulo)
+    return horizon, 0
+
+
+def collect_changes(user, positions, request=None):
+    horizon = timezone.now() - OVERLAP
+    querysets = collection_querysets(user)
+    context = {'request': request}
+
+    changes, deleted, new_positions = {}, {}, {}
+    user_ids = set()
+    has_more = False
+
+    for name, serializer_class, soft_delete, user_fields in COLLECTIONS:
+        position = positions.get(name)
+        rows, more = changed_rows(querysets[name], position, soft_delete)
+        has_more = has_more or more
+        new_positions[name] = next_position(rows, more, horizon)
+
+        if soft_delete:
+            deleted[name] = [row.id for row in rows if not row.is_active]
+            rows = [row for row in rows if row.is_active]
+        changes[name] = serializer_class(rows, many=True, context=context).data
+        user_ids.update(
+            getattr(row, field) for row in rows for field in user_fields if getattr(row, field)
+        )
+
+    users = User.objects.filter(id__in=user_ids) if user_ids else []
+    return {
+        'token': encode_token(user, new_positions),
+        'has_more': has_more,
+        'changes': changes,
+        'deleted': deleted,
+        'users': {str(item.id): UserStubSerializer(item).data for item in users},
+    }
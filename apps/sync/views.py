@@ -0,0 +1,23 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .services import InvalidToken, collect_changes, decode_token
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync_changes(request):
+    """
+    Cambios desde ``?since=<token>``. Sin token devuelve todo lo vigente; el
+    cliente guarda el token de la respuesta y repite mientras ``has_more``.
+    """
+    since = request.GET.get('since')
+    try:
+        positions = decode_token(request.user, since) if since else {}
+    except InvalidToken:
+        return Response({
+            'error': 'Token de sincronización inválido: sincronizar desde cero'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(collect_changes(request.user, positions, request))
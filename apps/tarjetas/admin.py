@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TarjetaRoja, TarjetaImage, TarjetaComment, TarjetaHistory
+from .models import TarjetaRoja, TarjetaImage, TarjetaComment, TarjetaHistory, TarjetaStats
 
 class TarjetaImageInline(admin.TabularInline):
     model = TarjetaImage
@@ -65,4 +65,10 @@ class TarjetaCommentAdmin(admin.ModelAdmin):
 class TarjetaHistoryAdmin(admin.ModelAdmin):
     list_display = ['tarjeta', 'action', 'user', 'timestamp']
     list_filter = ['action', 'timestamp', 'user']
-    readonly_fields = ['user', 'timestamp']
\ No newline at end of file
+    readonly_fields = ['user', 'timestamp']
+
+@admin.register(TarjetaStats)
+class TarjetaStatsAdmin(admin.ModelAdmin):
+    list_display = ['day', 'status', 'priority', 'sector', 'category', 'work_area', 'count']
+    list_filter = ['status', 'priority', 'day']
+    readonly_fields = ['day', 'status', 'priority', 'sector', 'category', 'work_area', 'count']
\ No newline at end of file
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class TarjetasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tarjetas'
-    verbose_name = 'Tarjetas Rojas'
\ No newline at end of file
+    verbose_name = 'Tarjetas Rojas'
+    
+    def ready(self):
+        import apps.tarjetas.signals
@@ -0,0 +1,117 @@
+"""
+Altas masivas de tarjetas rojas.
+
+Las claves foráneas y la unicidad de ``numero`` se validan para todo el lote
+con una consulta por modelo, y las tarjetas e historiales se insertan con
+``bulk_create`` dentro de una sola transacción. Las tarjetas sin número
+reciben un bloque consecutivo de su serie (ver numbering.py).
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework import serializers
+
+from apps.categories.models import Category, WorkArea
+from apps.notifications.outbox import publish
+
+from .models import TarjetaRoja, TarjetaHistory
+from .numbering import allocate_numeros
+from .search import update_search_index
+from .serializers import TarjetaRojaBulkItemSerializer, initial_status_fields
+from .stats import apply_stats_changes, stats_key
+
+User = get_user_model()
+
+MAX_BULK_ITEMS = 1000
+
+FOREIGN_KEYS = [
+    ('assigned_to_id', 'assigned_to', User, 'Usuario no encontrado'),
+    ('category_id', 'category', Category, 'Categoría no encontrada'),
+    ('work_area_id', 'work_area', WorkArea, 'Área de trabajo no encontrada'),
+]
+
+
+def finalize_bulk_created(tarjetas, user):
+    """
+    Efectos que en el alta individual hacen la vista, el serializer y los
+    signals, y que ``bulk_create`` no dispara.
+    """
+    TarjetaHistory.objects.bulk_create([
+        TarjetaHistory(tarjeta=tarjeta, user=user, action='created', new_value=tarjeta.status)
+        for tarjeta in tarjetas
+    ], batch_size=1000)
+    update_search_index([tarjeta.id for tarjeta in tarjetas])
+    apply_stats_changes([(None, stats_key(tarjeta)) for tarjeta in tarjetas])
+    # Un solo evento para el lote: el dispatcher expande a los supervisores
+    publish('tarjeta_created', tarjeta_ids=[tarjeta.id for tarjeta in tarjetas])
+
+
+def bulk_create_tarjetas(items, user):
+    """Crea las tarjetas válidas del lote y devuelve un resultado por ítem"""
+    results = [None] * len(items)
+
+    # Una sola instancia del serializer: los campos se construyen una vez por lote
+    serializer = TarjetaRojaBulkItemSerializer()
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, serializer.run_validation(item)))
+        except serializers.ValidationError as exc:
+            results[index] = {'index': index, 'status': 'error', 'errors': exc.detail}
+
+    # Una consulta por modelo para todas las referencias del lote
+    lookups = {}
+    for field, _, model, _ in FOREIGN_KEYS:
+        ids = {data[field] for _, data in valid if data.get(field)}
+        lookups[field] = model.objects.in_bulk(ids) if ids else {}
+
+    numeros = [data['numero'] for _, data in valid if data.get('numero')]
+    existing = set(
+        TarjetaRoja.objects.filter(numero__in=numeros).values_list('numero', flat=True)
+    )
+
+    seen = set()
+    pending = []
+    for index, data in valid:
+        fields = dict(data)
+        numero = fields.get('numero')
+        errors = {}
+
+        # Sin número: se asigna de la serie al insertar
+        if numero and (numero in existing or numero in seen):
+            errors['numero'] = ['Ya existe una tarjeta con este número.']
+
+        for field, relation, _, message in FOREIGN_KEYS:
+            value = fields.pop(field, None)
+            if not value:
+                continue
+            if value in lookups[field]:
+                fields[relation] = lookups[field][value]
+            else:
+                errors[field] = [message]
+
+        if errors:
+            results[index] = {'index': index, 'status': 'error', 'errors': errors}
+            continue
+
+        if numero:
+            seen.add(numero)
+        fields.update(initial_status_fields(user))
+        pending.append((index, TarjetaRoja(created_by=user, **fields)))
+
+    if pending:
+        with transaction.atomic():
+            # Un bloque de números por serie para todo el lote
+            allocate_numeros([tarjeta for _, tarjeta in pending])
+            created = TarjetaRoja.objects.bulk_create([tarjeta for _, tarjeta in pending])
+            finalize_bulk_created(created, user)
+
+    for index, tarjeta in pending:
+        results[index] = {
+            'index': index,
+            'status': 'created',
+            'id': tarjeta.id,
+            'code': tarjeta.code,
+            'numero': tarjeta.numero,
+        }
+
+    return results
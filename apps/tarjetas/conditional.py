@@ -0,0 +1,130 @@
+"""
+GET condicionales (ETag / Last-Modified) para tarjetas y categorías.
+
+Las huellas se calculan con una consulta liviana antes de los prefetch y la
+serialización, de modo que un cliente con la versión vigente recibe un 304
+sin que se arme la respuesta completa.
+"""
+import hashlib
+from datetime import datetime, time
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils import timezone
+from django.utils.http import http_date, quote_etag
+
+from apps.categories.models import Category, WorkArea
+from .models import TarjetaRoja, TarjetaComment, TarjetaImage, TarjetaHistory
+
+User = get_user_model()
+
+
+def make_etag(request, *parts):
+    """
+    ETag fuerte a partir de las partes de la huella. Incluye la URL completa
+    (filtros, ``fields``, ``expand``) y el usuario, porque ``me`` depende de él.
+    """
+    raw = '|'.join(str(part) for part in (request.get_full_path(), request.user.pk) + parts)
+    return quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value else None
+
+
+def not_modified(request, etag, last_modified=None):
+    """Devuelve la respuesta 304/412 si la condición del cliente se cumple, si no None"""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=_timestamp(last_modified)
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(_timestamp(last_modified))
+    # El cliente puede guardarla pero debe revalidar; depende del token
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def as_of_today(last_modified):
+    """
+    ``days_open`` e ``is_overdue`` cambian con la fecha: la representación de una
+    tarjeta nunca es anterior al inicio del día. Devuelve (partes, last_modified).
+    """
+    today = timezone.localdate()
+    start = timezone.make_aware(datetime.combine(today, time.min))
+    return [today], max(last_modified, start) if last_modified else start
+
+
+def _latest(model, field):
+    return Subquery(
+        model.objects.filter(tarjeta=OuterRef('pk')).order_by(f'-{field}').values(field)[:1]
+    )
+
+
+def related_count(model):
+    """COUNT de las filas de ``model`` de cada tarjeta, como subconsulta"""
+    return Coalesce(Subquery(
+        model.objects.filter(tarjeta=OuterRef('pk')).order_by().values('tarjeta').annotate(
+            total=Count('id')
+        ).values('total'),
+        output_field=IntegerField()
+    ), 0)
+
+
+def tarjeta_fingerprint(pk):
+    """
+    Huella del detalle: ``updated_at`` de la tarjeta y lo más reciente de
+    comentarios, imágenes e historial, en una sola consulta. None si no existe.
+    """
+    row = TarjetaRoja.objects.filter(pk=pk, is_active=True).annotate(
+        last_comment=_latest(TarjetaComment, 'created_at'),
+        last_image=_latest(TarjetaImage, 'uploaded_at'),
+        last_history=_latest(TarjetaHistory, 'timestamp'),
+        comments_total=related_count(TarjetaComment),
+        images_total=related_count(TarjetaImage),
+    ).values(
+        'updated_at', 'last_comment', 'last_image', 'last_history',
+        'comments_total', 'images_total'
+    ).first()
+
+    if row is None:
+        return None
+
+    embedded = last_updated(*embedded_querysets())
+    last_modified = max(
+        value for value in (
+            row['updated_at'], row['last_comment'], row['last_image'], row['last_history'],
+            embedded
+        ) if value
+    )
+    today, last_modified = as_of_today(last_modified)
+    return [row[key] for key in sorted(row)] + [embedded] + today, last_modified
+
+
+def last_updated(*querysets):
+    """
+    MAX(updated_at) sobre tablas completas (con índice). A diferencia del
+    máximo del queryset filtrado, también cambia cuando una fila sale del filtro.
+    """
+    values = [
+        queryset.aggregate(last=Max('updated_at'))['last'] for queryset in querysets
+    ]
+    values = [value for value in values if value]
+    return max(values) if values else None
+
+
+def embedded_querysets():
+    """
+    Tablas cuyos datos embebe la representación de una tarjeta (campos anidados
+    e ``included``): renombrar una categoría o un usuario cambia la respuesta.
+    """
+    return [Category.objects.all(), WorkArea.objects.all(), User.objects.all()]
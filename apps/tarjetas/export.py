@@ -0,0 +1,176 @@
+"""
+Exportación del registro de tarjetas en CSV, NDJSON o XLSX.
+
+Las filas salen de ``values_list()`` recorrido con ``iterator()`` (cursor del
+lado del servidor en PostgreSQL), sin instanciar modelos ni serializers, y se
+envían por bloques: la memoria no depende de la cantidad de tarjetas.
+"""
+import csv
+import json
+import tempfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+CHUNK_SIZE = 2000
+
+# (encabezado, lookup para values_list)
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('numero', 'numero'),
+    ('fecha', 'fecha'),
+    ('sector', 'sector'),
+    ('descripcion', 'descripcion'),
+    ('razon_motivo', 'razon_motivo'),
+    ('quien_lo_hizo', 'quien_lo_hizo'),
+    ('destino_final', 'destino_final'),
+    ('fecha_final', 'fecha_final'),
+    ('status', 'status'),
+    ('priority', 'priority'),
+    ('category', 'category__name'),
+    ('work_area', 'work_area__name'),
+    ('created_by', 'created_by__email'),
+    ('assigned_to', 'assigned_to__email'),
+    ('approved_by', 'approved_by__email'),
+    ('resolution_notes', 'resolution_notes'),
+    ('created_at', 'created_at'),
+    ('approved_at', 'approved_at'),
+    ('closed_at', 'closed_at'),
+]
+
+HEADERS = [header for header, _ in EXPORT_COLUMNS]
+
+# Caracteres con los que una planilla interpreta la celda como fórmula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Solo habilita ``?format=`` en la negociación de DRF: las exportaciones
+    devuelven su propia respuesta y los errores se renderizan como JSON.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class XLSXRenderer(ExportRenderer):
+    media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    format = 'xlsx'
+    charset = None
+
+
+def export_rows(queryset):
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    return queryset.order_by('id').values_list(*lookups).iterator(chunk_size=CHUNK_SIZE)
+
+
+def spreadsheet_cell(value):
+    """
+    Texto del usuario (descripción, notas) que empieza como una fórmula se
+    prefija con ' para que Excel/LibreOffice lo muestren como texto.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """Pseudo-archivo para csv.writer: devuelve la línea en lugar de guardarla"""
+    def write(self, value):
+        return value
+
+
+def _batched(lines):
+    # Un yield por bloque: menos overhead que uno por fila
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= CHUNK_SIZE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def _csv_lines(queryset):
+    writer = csv.writer(_Echo())
+    # BOM para que Excel detecte UTF-8
+    yield '\ufeff' + writer.writerow(HEADERS)
+    for row in export_rows(queryset):
+        yield writer.writerow([spreadsheet_cell(value) for value in row])
+
+
+def _ndjson_lines(queryset):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in export_rows(queryset):
+        yield encoder.encode(dict(zip(HEADERS, row))) + '\n'
+
+
+def _filename(extension):
+    return f'tarjetas_{timezone.localdate():%Y%m%d}.{extension}'
+
+
+def _attachment(response, extension):
+    response['Content-Disposition'] = f'attachment; filename="{_filename(extension)}"'
+    return response
+
+
+def csv_response(queryset):
+    return _attachment(StreamingHttpResponse(
+        _batched(_csv_lines(queryset)), content_type='text/csv; charset=utf-8'
+    ), 'csv')
+
+
+def ndjson_response(queryset):
+    return _attachment(StreamingHttpResponse(
+        _batched(_ndjson_lines(queryset)), content_type='application/x-ndjson; charset=utf-8'
+    ), 'ndjson')
+
+
+def xlsx_response(queryset):
+    """
+    XLSX es un ZIP y no se puede enviar antes de cerrarlo: el libro se escribe
+    en modo write-only (memoria constante) a un archivo temporal y se envía
+    desde el disco.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Tarjetas')
+    sheet.append(HEADERS)
+    for row in export_rows(queryset):
+        # Excel no admite fechas con zona horaria; openpyxl guarda '=...' como fórmula
+        sheet.append([
+            timezone.localtime(value).replace(tzinfo=None)
+            if hasattr(value, 'tzinfo') and value.tzinfo else spreadsheet_cell(value)
+            for value in row
+        ])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output, as_attachment=True, filename=_filename('xlsx'),
+        content_type=XLSXRenderer.media_type
+    )
+
+
+EXPORTERS = {
+    'csv': csv_response,
+    'ndjson': ndjson_response,
+    'xlsx': xlsx_response,
+}
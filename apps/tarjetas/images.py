@@ -0,0 +1,142 @@
+"""
+Procesamiento de imágenes de tarjetas.
+
+La foto original se recodifica como JPEG sin metadatos EXIF (ubicación GPS,
+modelo del teléfono) respetando su orientación, y se generan miniaturas en
+los tamaños de ``VARIANT_SIZES``. Se ejecuta fuera del request (ver tasks.py).
+"""
+import logging
+import os
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from apps.media.services import acquire_blobs, release_blobs
+from apps.media.storage import is_blob_name
+
+from .models import TarjetaImage, TarjetaRoja
+
+logger = logging.getLogger(__name__)
+
+# Lado mayor en píxeles de cada variante
+VARIANT_SIZES = {
+    'small': 160,
+    'medium': 640,
+    'large': 1280,
+}
+JPEG_QUALITY = 85
+# Una imagen en 'processing' por más tiempo quedó huérfana (el worker murió)
+PROCESSING_TIMEOUT = timedelta(minutes=10)
+
+
+def _encode(image):
+    buffer = BytesIO()
+    # Sin exif=: Pillow no copia los metadatos del original
+    image.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _to_rgb(image):
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        # JPEG no tiene canal alfa: se compone sobre fondo blanco
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.convert('RGBA').split()[-1])
+        return background
+    return image.convert('RGB') if image.mode != 'RGB' else image
+
+
+def render_variants(source):
+    """
+    Devuelve (original_limpio, {variante: bytes}) a partir de un archivo de imagen.
+    """
+    with Image.open(source) as image:
+        # Aplica la rotación de EXIF antes de descartarlo
+        image = _to_rgb(ImageOps.exif_transpose(image))
+        clean = _encode(image)
+
+        variants = {}
+        for name, size in VARIANT_SIZES.items():
+            if max(image.size) <= size:
+                # No se agranda: la variante es el original limpio
+                variants[name] = clean
+                continue
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size), Image.LANCZOS)
+            variants[name] = _encode(thumbnail)
+
+    return clean, variants
+
+
+def process_image(image_id):
+    # Solo un worker procesa cada imagen aunque la tarea se encole dos veces
+    claimed = TarjetaImage.objects.filter(
+        pk=image_id, processing_status='pending'
+    ).update(processing_status='processing', updated_at=timezone.now())
+    if not claimed:
+        return
+
+    tarjeta_image = TarjetaImage.objects.get(pk=image_id)
+    field = tarjeta_image.image
+    storage = field.storage
+    original_name = field.name
+    stem = os.path.splitext(original_name)[0]
+
+    try:
+        with field.open('rb') as source:
+            clean, rendered = render_variants(source)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        logger.warning('No se pudo procesar la imagen %s: %s', image_id, exc)
+        with transaction.atomic():
+            TarjetaImage.objects.filter(pk=image_id).update(
+                processing_status='failed', updated_at=timezone.now()
+            )
+            # processing_status es parte del detalle: invalida sus ETag
+            TarjetaRoja.objects.filter(pk=tarjeta_image.tarjeta_id).update(updated_at=timezone.now())
+        return
+
+    variants = {
+        name: storage.save(f'{stem}_{name}.jpg', ContentFile(content))
+        for name, content in rendered.items()
+    }
+
+    # El original se reemplaza por la versión sin EXIF
+    clean_name = storage.save(f'{stem}.jpg', ContentFile(clean))
+    with transaction.atomic():
+        TarjetaImage.objects.filter(pk=image_id).update(
+            image=clean_name, variants=variants, processing_status='ready',
+            updated_at=timezone.now()
+        )
+        # update() no dispara los signals de apps.media: referencias explícitas
+        acquire_blobs([clean_name, *variants.values()])
+        release_blobs([original_name, *tarjeta_image.variants.values()])
+        # La tarjeta cambia de representación (miniaturas): invalida sus ETag
+        TarjetaRoja.objects.filter(pk=tarjeta_image.tarjeta_id).update(updated_at=timezone.now())
+    
+    # Archivos anteriores al almacenamiento por contenido: nadie más los usa
+    if not is_blob_name(original_name) and clean_name != original_name:
+        storage.delete(original_name)
+
+
+def requeue_stale_images(timeout=PROCESSING_TIMEOUT):
+    """
+    Vuelve a encolar las imágenes que quedaron en 'processing' más de
+    ``timeout`` (el worker murió después de tomarlas). Devuelve cuántas.
+    """
+    from .tasks import process_tarjeta_image
+
+    now = timezone.now()
+    stale = TarjetaImage.objects.filter(
+        processing_status='processing', updated_at__lt=now - timeout
+    )
+    ids = list(stale.values_list('id', flat=True))
+    # El filtro por estado evita devolver a 'pending' una que terminó recién
+    TarjetaImage.objects.filter(id__in=ids, processing_status='processing').update(
+        processing_status='pending', updated_at=now
+    )
+    for image_id in ids:
+        process_tarjeta_image.enqueue(image_id)
+    return len(ids)
@@ -0,0 +1,379 @@
+"""
+Importación de registros históricos de tarjetas desde CSV o XLSX.
+
+El archivo se lee fila por fila (CSV con ``csv.reader`` sobre el stream,
+XLSX con openpyxl en modo read-only). Categorías, áreas, usuarios y sectores
+se resuelven contra diccionarios que se cargan una sola vez, y las tarjetas se
+insertan en lotes con ``bulk_create``: un lote por transacción, sin signals por
+fila ni notificaciones. Las filas cuyo número ya existe se informan como error,
+de modo que un import interrumpido puede repetirse sin duplicar tarjetas.
+
+Acepta los encabezados de la exportación (ver export.py) y sus equivalentes en
+español (``categoria``, ``area``, ``estado``, ``prioridad``...).
+"""
+import csv
+import io
+import os
+import unicodedata
+from datetime import date, datetime, time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from apps.categories.models import Category, WorkArea
+
+from .export import FORMULA_PREFIXES
+from .models import TarjetaHistory, TarjetaRoja
+from .search import update_search_index
+from .serializers import initial_status_fields
+from .stats import apply_stats_changes, invalidate_dashboard_stats, stats_key
+
+User = get_user_model()
+
+IMPORT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 100
+
+TEXT_FIELDS = ['numero', 'sector', 'descripcion', 'razon_motivo', 'quien_lo_hizo',
+               'destino_final', 'resolution_notes']
+
+# Encabezado normalizado -> campo
+COLUMN_ALIASES = {
+    'numero': 'numero', 'nro': 'numero', 'n': 'numero',
+    'fecha': 'fecha',
+    'sector': 'sector',
+    'descripcion': 'descripcion',
+    'razon_motivo': 'razon_motivo', 'razon': 'razon_motivo', 'motivo': 'razon_motivo',
+    'quien_lo_hizo': 'quien_lo_hizo',
+    'destino_final': 'destino_final', 'destino': 'destino_final',
+    'fecha_final': 'fecha_final',
+    'status': 'status', 'estado': 'status',
+    'priority': 'priority', 'prioridad': 'priority',
+    'category': 'category', 'categoria': 'category',
+    'work_area': 'work_area', 'area': 'work_area', 'area_de_trabajo': 'work_area',
+    'created_by': 'created_by', 'creado_por': 'created_by',
+    'assigned_to': 'assigned_to', 'asignado_a': 'assigned_to', 'responsable': 'assigned_to',
+    'approved_by': 'approved_by', 'aprobado_por': 'approved_by',
+    'resolution_notes': 'resolution_notes', 'notas_de_resolucion': 'resolution_notes',
+    'created_at': 'created_at', 'creada': 'created_at',
+    'approved_at': 'approved_at', 'aprobada': 'approved_at',
+    'closed_at': 'closed_at', 'cerrada': 'closed_at',
+}
+
+APPROVED_STATUSES = {'approved', 'in_progress', 'resolved', 'closed'}
+
+DATE_FORMATS = ['%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%Y/%m/%d']
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+def normalize(value):
+    """Minúsculas, sin acentos y con espacios simples: 'Área  Pintura ' -> 'area pintura'"""
+    text = unicodedata.normalize('NFKD', str(value))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.casefold().split())
+
+
+def _column(header):
+    key = normalize(header or '').replace(' ', '_').replace('/', '_').strip('_.#')
+    return COLUMN_ALIASES.get(key)
+
+
+def _csv_rows(file, encoding):
+    stream = io.TextIOWrapper(file, encoding=encoding, newline='')
+    sample = stream.readline()
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(stream, dialect)
+    yield next(csv.reader([sample], dialect), [])
+    yield from reader
+
+
+def _xlsx_rows(file):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_rows(file, filename, encoding='utf-8-sig'):
+    """
+    Recorre el archivo y devuelve (número_de_línea, {campo: valor}) por fila.
+    Las columnas desconocidas se ignoran.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        rows = _csv_rows(file, encoding)
+    elif extension in ('.xlsx', '.xlsm'):
+        rows = _xlsx_rows(file)
+    else:
+        raise ImportFormatError('Formato no soportado: use un archivo .csv o .xlsx')
+
+    header = next(rows, None) or []
+    columns = [_column(name) for name in header]
+    if 'numero' not in columns:
+        raise ImportFormatError('El archivo debe tener una columna "numero"')
+
+    for line, values in enumerate(rows, start=2):
+        row = {
+            field: value for field, value in zip(columns, values)
+            if field and value not in (None, '')
+        }
+        if row:
+            yield line, row
+
+
+def _text(value):
+    # Excel guarda los números de tarjeta como float: 1234.0 -> '1234'
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    # La exportación prefija con ' las celdas que parecen fórmulas
+    if text.startswith("'") and text[1:].startswith(FORMULA_PREFIXES):
+        text = text[1:]
+    return text
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    parsed = parse_date(text[:10]) if len(text) >= 10 and text[4] == '-' else None
+    if parsed:
+        return parsed
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Fecha inválida: {text}')
+
+
+def _parse_datetime(value):
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = str(value).strip()
+        try:
+            parsed = parse_datetime(text)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            parsed = datetime.combine(_parse_date(text), time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class LookupMaps:
+    """Referencias por nombre normalizado, cargadas una vez por import"""
+
+    def __init__(self):
+        self.categories = {
+            normalize(name): pk for pk, name in Category.objects.values_list('id', 'name')
+        }
+
+        self.work_areas = {}
+        by_name = {}
+        for pk, name, category_id in WorkArea.objects.values_list('id', 'name', 'category_id'):
+            self.work_areas[(category_id, normalize(name))] = (pk, category_id)
+            by_name.setdefault(normalize(name), []).append((pk, category_id))
+        # Sin categoría solo se resuelven nombres de área que no se repiten
+        self.work_areas_by_name = {
+            name: matches[0] if len(matches) == 1 else None for name, matches in by_name.items()
+        }
+
+        self.users = {}
+        for pk, email, username, first, last in User.objects.values_list(
+            'id', 'email', 'username', 'first_name', 'last_name'
+        ):
+            self.users[normalize(email)] = pk
+            self.users.setdefault(normalize(username), pk)
+            full_name = normalize(f'{first} {last}')
+            if full_name:
+                # Nombres repetidos quedan ambiguos (None)
+                self.users[full_name] = None if full_name in self.users else pk
+
+        # Variantes de escritura de un sector existente se unifican
+        self.sectors = {}
+        for sector in TarjetaRoja.objects.values_list('sector', flat=True).distinct():
+            self.sectors.setdefault(normalize(sector), sector)
+
+        self.statuses = self._choices(TarjetaRoja.STATUS_CHOICES)
+        self.priorities = self._choices(TarjetaRoja.PRIORITY_CHOICES)
+
+    @staticmethod
+    def _choices(choices):
+        values = {}
+        for value, label in choices:
+            values[normalize(value)] = value
+            values[normalize(label)] = value
+        return values
+
+    def sector(self, value):
+        return self.sectors.setdefault(normalize(value), ' '.join(str(value).split()))
+
+    def user(self, value):
+        return self.users.get(normalize(value), False)
+
+
+def build_tarjeta(row, maps, user):
+    """Convierte una fila en TarjetaRoja; devuelve (tarjeta, None) o (None, errores)"""
+    errors = {}
+    fields = {}
+
+    for name in TEXT_FIELDS:
+        if name in row:
+            value = _text(row[name])
+            max_length = TarjetaRoja._meta.get_field(name).max_length
+            if max_length and len(value) > max_length:
+                errors[name] = [f'Máximo {max_length} caracteres']
+            fields[name] = value
+    if not fields.get('numero'):
+        errors['numero'] = ['Este campo es requerido.']
+    if 'sector' in fields:
+        fields['sector'] = maps.sector(fields['sector'])
+
+    for name in ('fecha', 'fecha_final'):
+        if name in row:
+            try:
+                fields[name] = _parse_date(row[name])
+            except ValueError as exc:
+                errors[name] = [str(exc)]
+    for name in ('created_at', 'approved_at', 'closed_at'):
+        if name in row:
+            try:
+                fields[name] = _parse_datetime(row[name])
+            except ValueError as exc:
+                errors[name] = [str(exc)]
+
+    for name, choices in (('status', maps.statuses), ('priority', maps.priorities)):
+        if name in row:
+            value = choices.get(normalize(row[name]))
+            if value is None:
+                errors[name] = [f'Valor inválido: {row[name]}']
+            fields[name] = value
+
+    if 'category' in row:
+        fields['category_id'] = maps.categories.get(normalize(row['category']))
+        if fields['category_id'] is None:
+            errors['category'] = ['Categoría no encontrada']
+    if 'work_area' in row:
+        name = normalize(row['work_area'])
+        if fields.get('category_id'):
+            match = maps.work_areas.get((fields['category_id'], name))
+        else:
+            match = maps.work_areas_by_name.get(name)
+        if match is None:
+            errors['work_area'] = ['Área de trabajo no encontrada o ambigua']
+        else:
+            fields['work_area_id'], fields['category_id'] = match
+
+    for name in ('created_by', 'assigned_to', 'approved_by'):
+        if name in row:
+            pk = maps.user(row[name])
+            if not pk:
+                errors[name] = ['Usuario no encontrado' if pk is False else 'Usuario ambiguo']
+            fields[f'{name}_id'] = pk
+
+    if errors:
+        return None, errors
+
+    fields.setdefault('created_by_id', user.id)
+    # Registros históricos: la fecha de la tarjeta es su fecha de alta
+    if 'created_at' not in fields and 'fecha' in fields:
+        fields['created_at'] = timezone.make_aware(datetime.combine(fields['fecha'], time.min))
+
+    if 'status' not in fields:
+        fields['status'] = initial_status_fields(user)['status']
+    if fields['status'] in APPROVED_STATUSES:
+        fields.setdefault('approved_by_id', user.id)
+        fields.setdefault('approved_at', fields.get('created_at') or timezone.now())
+    if fields['status'] == 'closed' and 'closed_at' not in fields:
+        closed = fields.get('fecha_final')
+        fields['closed_at'] = (
+            timezone.make_aware(datetime.combine(closed, time.min)) if closed
+            else fields.get('created_at') or timezone.now()
+        )
+
+    return TarjetaRoja(**fields), None
+
+
+def _insert_batch(batch, user):
+    """Inserta un lote y aplica los efectos que bulk_create no dispara"""
+    with transaction.atomic():
+        created = TarjetaRoja.objects.bulk_create(batch, batch_size=IMPORT_BATCH_SIZE)
+        TarjetaHistory.objects.bulk_create([
+            TarjetaHistory(tarjeta=tarjeta, user=user, action='imported', new_value=tarjeta.status)
+            for tarjeta in created
+        ], batch_size=IMPORT_BATCH_SIZE)
+        update_search_index([tarjeta.id for tarjeta in created])
+        apply_stats_changes([(None, stats_key(tarjeta)) for tarjeta in created])
+    return len(created)
+
+
+def import_tarjetas(file, filename, user, encoding='utf-8-sig', batch_size=IMPORT_BATCH_SIZE,
+                    dry_run=False, progress=None):
+    """
+    Importa las tarjetas del archivo en nombre de ``user``. Devuelve un resumen
+    con las filas leídas, creadas y con error (las primeras MAX_REPORTED_ERRORS).
+    ``progress`` recibe la cantidad de filas creadas tras cada lote.
+    """
+    maps = LookupMaps()
+    seen = set()
+    summary = {'rows': 0, 'created': 0, 'failed': 0, 'errors': []}
+
+    def fail(line, errors):
+        summary['failed'] += 1
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append({'line': line, 'errors': errors})
+
+    def flush(pending):
+        # Una consulta por lote para los números que ya existen en la base
+        existing = set(TarjetaRoja.objects.filter(
+            numero__in=[tarjeta.numero for _, tarjeta in pending]
+        ).values_list('numero', flat=True))
+        batch = []
+        for line, tarjeta in pending:
+            if tarjeta.numero in existing:
+                fail(line, {'numero': ['Ya existe una tarjeta con este número.']})
+            else:
+                batch.append(tarjeta)
+        if batch and not dry_run:
+            summary['created'] += _insert_batch(batch, user)
+        elif batch:
+            summary['created'] += len(batch)
+        if progress:
+            progress(summary['created'])
+
+    pending = []
+    for line, row in read_rows(file, filename, encoding):
+        summary['rows'] += 1
+        tarjeta, errors = build_tarjeta(row, maps, user)
+        if errors:
+            fail(line, errors)
+            continue
+        if tarjeta.numero in seen:
+            fail(line, {'numero': ['Número repetido en el archivo']})
+            continue
+        seen.add(tarjeta.numero)
+        pending.append((line, tarjeta))
+        if len(pending) >= batch_size:
+            flush(pending)
+            pending = []
+    if pending:
+        flush(pending)
+
+    if summary['created'] and not dry_run:
+        invalidate_dashboard_stats()
+    return summary
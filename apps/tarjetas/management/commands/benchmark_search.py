@@ -0,0 +1,88 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.tarjetas.models import TarjetaRoja
+from apps.tarjetas.search import is_ranked, rebuild_search_index, search_tarjetas
+from apps.tarjetas.stats import apply_stats_changes, invalidate_dashboard_stats, stats_key
+
+User = get_user_model()
+
+WORDS = [
+    'máquina', 'empacadora', 'fuga', 'aceite', 'compresor', 'rodamientos', 'soldadura',
+    'ventilación', 'filtros', 'resistencias', 'lote', 'proveedor', 'calibración', 'sensor',
+    'motor', 'correa', 'desgaste', 'vibración', 'tablero', 'eléctrico', 'seguridad',
+    'limpieza', 'almacén', 'herramientas', 'desorden', 'etiquetas', 'inspección', 'válvula',
+]
+SECTORS = ['Producción', 'Mantenimiento', 'Calidad', 'Logística', 'Soldadura', 'Electrónicos']
+QUERIES = ['maquina', 'fugas aceite', 'rodamiento', 'valvulas', 'soldadura ventilacion',
+           'calibracion sensor', 'TR-BENCH-12', 'electrico', 'desgaste motor', 'almacen']
+
+
+class Command(BaseCommand):
+    help = 'Mide la latencia (p50/p95/p99) de la búsqueda de tarjetas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Cantidad de tarjetas sintéticas a insertar antes de medir')
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--per-page', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'])
+
+        total = TarjetaRoja.objects.filter(is_active=True).count()
+        self.stdout.write(f'Tarjetas activas: {total}')
+
+        timings = []
+        for i in range(options['iterations']):
+            query = QUERIES[i % len(QUERIES)]
+            queryset = search_tarjetas(TarjetaRoja.objects.filter(is_active=True), query)
+            if is_ranked(queryset):
+                queryset = queryset.order_by('-search_rank', '-created_at')
+
+            start = time.perf_counter()
+            list(queryset.values_list('id', flat=True)[:options['per_page']])
+            timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        self.stdout.write(self.style.SUCCESS(
+            f'p50={statistics.median(timings):.2f}ms p95={p95:.2f}ms '
+            f'p99={p99:.2f}ms max={timings[-1]:.2f}ms'
+        ))
+
+    def seed(self, count, batch_size=5000):
+        user, _ = User.objects.get_or_create(
+            username='benchmark',
+            defaults={'email': 'benchmark@formokaizen.local', 'role': 'user'}
+        )
+        offset = TarjetaRoja.objects.filter(numero__startswith='TR-BENCH-').count()
+        rng = random.Random(42)
+
+        for start in range(0, count, batch_size):
+            batch = [
+                TarjetaRoja(
+                    numero=f'TR-BENCH-{offset + start + i}',
+                    sector=rng.choice(SECTORS),
+                    descripcion=' '.join(rng.choices(WORDS, k=12)),
+                    quien_lo_hizo=rng.choice(['Juan Pérez', 'María García', 'Carlos Rodríguez']),
+                    created_by=user,
+                )
+                for i in range(min(batch_size, count - start))
+            ]
+            # bulk_create no dispara los signals: la tabla agregada se mantiene acá.
+            # Los números TR-BENCH-* no usan las series de numbering.py
+            with transaction.atomic():
+                TarjetaRoja.objects.bulk_create(batch)
+                apply_stats_changes([(None, stats_key(tarjeta)) for tarjeta in batch])
+            self.stdout.write(f'  {start + len(batch)}/{count} insertadas')
+
+        rebuild_search_index()
+        invalidate_dashboard_stats()
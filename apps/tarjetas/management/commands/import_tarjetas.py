@@ -0,0 +1,52 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tarjetas.importer import IMPORT_BATCH_SIZE, ImportFormatError, import_tarjetas
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Importa tarjetas rojas históricas desde un archivo CSV o XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo .csv o .xlsx')
+        parser.add_argument('--user', required=True,
+                            help='Email del usuario a cargo del import (creador por defecto)')
+        parser.add_argument('--encoding', default='utf-8-sig',
+                            help='Codificación del CSV (p. ej. cp1252 para exportaciones de Excel)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validar el archivo sin crear tarjetas')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'Usuario no encontrado: {options["user"]}')
+
+        started = time.monotonic()
+        try:
+            with open(options['path'], 'rb') as file:
+                summary = import_tarjetas(
+                    file, options['path'], user,
+                    encoding=options['encoding'],
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                    progress=lambda created: self.stdout.write(f'  {created} tarjetas...'),
+                )
+        except (OSError, ImportFormatError, UnicodeDecodeError) as exc:
+            raise CommandError(str(exc))
+
+        for error in summary['errors']:
+            self.stderr.write(f'  Línea {error["line"]}: {error["errors"]}')
+        if summary['failed'] > len(summary['errors']):
+            self.stderr.write(f'  ... y {summary["failed"] - len(summary["errors"])} errores más')
+
+        action = 'válidas (simulación)' if options['dry_run'] else 'importadas'
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary["created"]} de {summary["rows"]} filas {action}, '
+            f'{summary["failed"]} con error, en {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.tarjetas.images import PROCESSING_TIMEOUT, process_image
+from apps.tarjetas.models import TarjetaImage
+
+
+class Command(BaseCommand):
+    help = 'Procesa las imágenes pendientes (EXIF, recodificación y miniaturas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Reintentar también las imágenes con error')
+
+    def handle(self, *args, **options):
+        statuses = ['pending', 'failed'] if options['retry_failed'] else ['pending']
+        # También las que quedaron en 'processing' porque el worker murió
+        stale = Q(processing_status='processing',
+                  updated_at__lt=timezone.now() - PROCESSING_TIMEOUT)
+        ids = list(
+            TarjetaImage.objects.filter(Q(processing_status__in=statuses) | stale)
+            .values_list('id', flat=True)
+        )
+        TarjetaImage.objects.filter(id__in=ids).update(
+            processing_status='pending', updated_at=timezone.now()
+        )
+
+        for image_id in ids:
+            process_image(image_id)
+
+        ready = TarjetaImage.objects.filter(id__in=ids, processing_status='ready').count()
+        self.stdout.write(self.style.SUCCESS(
+            f'{ready} de {len(ids)} imágenes procesadas'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.tarjetas.uploads import purge_expired_uploads
+
+
+class Command(BaseCommand):
+    help = 'Elimina las subidas por partes abandonadas (sin actividad en 24 horas)'
+
+    def handle(self, *args, **options):
+        purged = purge_expired_uploads()
+        self.stdout.write(self.style.SUCCESS(f'{purged} subidas eliminadas'))
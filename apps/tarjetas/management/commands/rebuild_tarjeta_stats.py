@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tarjetas.stats import (
+    compute_stats_buckets, invalidate_dashboard_stats, rebuild_stats, stored_stats_buckets
+)
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye la tabla agregada TarjetaStats o verifica sus diferencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Solo verificar diferencias, sin reconstruir')
+
+    def handle(self, *args, **options):
+        expected = compute_stats_buckets()
+        stored = stored_stats_buckets()
+
+        drift = {
+            key: (stored.get(key, 0), expected.get(key, 0))
+            for key in set(expected) | set(stored)
+            if stored.get(key, 0) != expected.get(key, 0)
+        }
+
+        for key, (actual, real) in sorted(drift.items(), key=str):
+            self.stdout.write(f'  {key}: almacenado={actual} real={real}')
+
+        if options['check']:
+            if drift:
+                raise CommandError(f'{len(drift)} buckets con diferencias')
+            self.stdout.write(self.style.SUCCESS(f'Sin diferencias ({len(expected)} buckets)'))
+            return
+
+        rebuild_stats()
+        invalidate_dashboard_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'TarjetaStats reconstruida: {len(expected)} buckets, {len(drift)} corregidos'
+        ))
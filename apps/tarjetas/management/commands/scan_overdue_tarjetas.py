@@ -0,0 +1,51 @@
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.tarjetas.overdue import SCAN_LIMIT, scan_overdue
+
+
+class Command(BaseCommand):
+    help = (
+        'Notifica las tarjetas vencidas desde la última corrida. Con --loop queda '
+        'corriendo y repite el escaneo cada OVERDUE_SCAN_INTERVAL segundos '
+        '(para instalaciones sin Celery beat)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Repetir el escaneo indefinidamente')
+        parser.add_argument('--interval', type=int, default=settings.OVERDUE_SCAN_INTERVAL,
+                            help='Segundos entre corridas con --loop')
+        parser.add_argument('--limit', type=int, default=SCAN_LIMIT,
+                            help='Máximo de tarjetas por corrida')
+        parser.add_argument('--date', help='Fecha de referencia AAAA-MM-DD (por defecto, hoy)')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('Fecha inválida, usar AAAA-MM-DD')
+
+        if not options['loop']:
+            self._scan(today, options['limit'])
+            return
+
+        try:
+            while True:
+                close_old_connections()
+                self._scan(today, options['limit'])
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def _scan(self, today, limit):
+        tarjetas, notifications = scan_overdue(today, limit=limit)
+        self.stdout.write(self.style.SUCCESS(
+            f'{tarjetas} tarjetas vencidas avisadas, {notifications} notificaciones creadas'
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarjetas', '0004_tarjetaroja_category_tarjetaroja_work_area'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tarjetaroja',
+            index=models.Index(fields=['-created_at', '-id'], name='tarjetas_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+from django.db import migrations
+
+SEARCH_FIELDS = 'numero, descripcion, sector, quien_lo_hizo'
+
+PG_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'es_unaccent') THEN
+            CREATE TEXT SEARCH CONFIGURATION es_unaccent (COPY = spanish);
+            ALTER TEXT SEARCH CONFIGURATION es_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+        END IF;
+    END
+    $$
+    """,
+    "ALTER TABLE tarjetas_rojas ADD COLUMN search_vector tsvector",
+    "CREATE INDEX tarjetas_search_vector_gin ON tarjetas_rojas USING GIN (search_vector)",
+    """
+    UPDATE tarjetas_rojas SET search_vector =
+        setweight(to_tsvector('es_unaccent', coalesce(numero, '')), 'A') ||
+        setweight(to_tsvector('es_unaccent', coalesce(sector, '')), 'B') ||
+        setweight(to_tsvector('es_unaccent', coalesce(descripcion, '')), 'C') ||
+        setweight(to_tsvector('es_unaccent', coalesce(quien_lo_hizo, '')), 'D')
+    """,
+]
+
+PG_BACKWARD = [
+    "DROP INDEX IF EXISTS tarjetas_search_vector_gin",
+    "ALTER TABLE tarjetas_rojas DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE tarjetas_search USING fts5(
+        {SEARCH_FIELDS}, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    INSERT INTO tarjetas_search (rowid, {SEARCH_FIELDS})
+    SELECT id, {SEARCH_FIELDS} FROM tarjetas_rojas
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS tarjetas_search",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarjetas', '0005_tarjetaroja_cursor_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': PG_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': PG_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:19
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def populate_stats(apps, schema_editor):
+    TarjetaRoja = apps.get_model('tarjetas', 'TarjetaRoja')
+    TarjetaStats = apps.get_model('tarjetas', 'TarjetaStats')
+    
+    buckets = TarjetaRoja.objects.filter(is_active=True).annotate(
+        day=TruncDate('created_at')
+    ).values(
+        'status', 'priority', 'sector', 'category_id', 'work_area_id', 'day'
+    ).annotate(count=Count('id')).order_by()
+    
+    TarjetaStats.objects.bulk_create(
+        [TarjetaStats(**bucket) for bucket in buckets], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0002_initial'),
+        ('tarjetas', '0006_tarjetaroja_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarjetaStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('open', 'Abierta'), ('pending_approval', 'Pendiente de Aprobación'), ('approved', 'Aprobada'), ('in_progress', 'En Progreso'), ('resolved', 'Resuelta'), ('closed', 'Cerrada'), ('rejected', 'Rechazada')], max_length=20)),
+                ('priority', models.CharField(choices=[('low', 'Baja'), ('medium', 'Media'), ('high', 'Alta'), ('critical', 'Crítica')], max_length=20)),
+                ('sector', models.CharField(max_length=100)),
+                ('day', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='categories.category')),
+                ('work_area', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='categories.workarea')),
+            ],
+            options={
+                'verbose_name': 'Estadística de Tarjetas',
+                'verbose_name_plural': 'Estadísticas de Tarjetas',
+                'db_table': 'tarjeta_stats',
+                'indexes': [models.Index(fields=['status', 'priority', 'sector', 'category', 'work_area', 'day'], name='tarjeta_stats_bucket_idx')],
+            },
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
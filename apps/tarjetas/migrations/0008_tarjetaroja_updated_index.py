@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarjetas', '0007_tarjetastats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tarjetaroja',
+            index=models.Index(fields=['updated_at'], name='tarjetas_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarjetas', '0008_tarjetaroja_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tarjetacomment',
+            index=models.Index(fields=['tarjeta', '-created_at', '-id'], name='tarjeta_comments_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarjetahistory',
+            index=models.Index(fields=['tarjeta', '-timestamp', '-id'], name='tarjeta_history_page_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarjetas', '0009_tarjeta_subresource_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarjetaimage',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('processing', 'Procesando'), ('ready', 'Lista'), ('failed', 'Error')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='tarjetaimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:31
+
+import apps.media.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarjetas', '0010_tarjetaimage_processing'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tarjetaimage',
+            name='image',
+            field=models.ImageField(storage=apps.media.storage.get_blob_storage, upload_to='tarjetas/%Y/%m/%d/'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tarjetas', '0011_alter_tarjetaimage_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarjetaUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('description', models.CharField(blank=True, max_length=200)),
+                ('size', models.BigIntegerField(verbose_name='Tamaño total (bytes)')),
+                ('received', models.BigIntegerField(default=0, verbose_name='Bytes recibidos')),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tarjeta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='tarjetas.tarjetaroja')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tarjeta_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Subida en curso',
+                'verbose_name_plural': 'Subidas en curso',
+                'db_table': 'tarjeta_uploads',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:48
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarjetas', '0012_tarjetaupload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tarjetaroja',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
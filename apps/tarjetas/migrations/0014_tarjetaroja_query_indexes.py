@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarjetas', '0013_tarjetaroja_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tarjetaroja',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['status', '-created_at', '-id'], name='tarjetas_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarjetaroja',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['priority', '-created_at', '-id'], name='tarjetas_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarjetaroja',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['assigned_to', 'status', '-created_at'], name='tarjetas_assigned_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarjetaroja',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_by', '-created_at', '-id'], name='tarjetas_creator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarjetaroja',
+            index=models.Index(condition=models.Q(('is_active', True), ('status__in', ['open', 'in_progress', 'approved'])), fields=['fecha_final'], name='tarjetas_overdue_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarjetas', '0014_tarjetaroja_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumeroSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series', models.CharField(max_length=50, unique=True)),
+                ('last_value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Serie de Números',
+                'verbose_name_plural': 'Series de Números',
+                'db_table': 'tarjeta_numero_sequences',
+            },
+        ),
+        migrations.AlterField(
+            model_name='tarjetaroja',
+            name='numero',
+            field=models.CharField(blank=True, max_length=50, unique=True, verbose_name='Número'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarjetas', '0015_numero_sequences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarjetaroja',
+            name='overdue_alerted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tarjetaroja',
+            index=models.Index(condition=models.Q(('fecha_final__isnull', False), ('is_active', True), ('overdue_alerted_at__isnull', True)), fields=['fecha_final'], name='tarjetas_overdue_pending_idx'),
+        ),
+    ]
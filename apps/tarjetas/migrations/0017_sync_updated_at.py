@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:01
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    # Las filas existentes toman su fecha de alta en lugar de la de la migración
+    apps.get_model('tarjetas', 'TarjetaComment').objects.update(updated_at=F('created_at'))
+    apps.get_model('tarjetas', 'TarjetaImage').objects.update(updated_at=F('uploaded_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarjetas', '0016_tarjetaroja_overdue_alerted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarjetacomment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tarjetaimage',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='tarjetacomment',
+            index=models.Index(fields=['updated_at', 'id'], name='tarjeta_comments_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarjetaimage',
+            index=models.Index(fields=['updated_at', 'id'], name='tarjeta_images_sync_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:39
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+import django.db.models.functions.comparison
+
+BUCKET_FIELDS = ['status', 'priority', 'sector', 'category_id', 'work_area_id', 'day']
+
+
+def merge_duplicate_buckets(apps, schema_editor):
+    # Las carreras anteriores a la restricción pudieron duplicar buckets: se suman en uno
+    TarjetaStats = apps.get_model('tarjetas', 'TarjetaStats')
+    duplicates = TarjetaStats.objects.values(*BUCKET_FIELDS).annotate(
+        total=Sum('count'), keep=Min('id'), rows=Count('id')
+    ).filter(rows__gt=1).order_by()
+
+    for row in duplicates:
+        keep, total = row['keep'], row['total']
+        bucket = {field: row[field] for field in BUCKET_FIELDS}
+        TarjetaStats.objects.filter(**bucket).exclude(pk=keep).delete()
+        TarjetaStats.objects.filter(pk=keep).update(count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarjetas', '0017_sync_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='tarjetastats',
+            constraint=models.UniqueConstraint(models.F('status'), models.F('priority'), models.F('sector'), django.db.models.functions.comparison.Coalesce('category', models.Value(0)), django.db.models.functions.comparison.Coalesce('work_area', models.Value(0)), models.F('day'), name='tarjeta_stats_bucket_unique'),
+        ),
+    ]
@@ -1,10 +1,60 @@
+import uuid
+
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
 from django.contrib.auth import get_user_model
+from apps.media.storage import get_blob_storage
 from apps.categories.models import Category, WorkArea
+from .tracking import FieldTrackerMixin
 
 User = get_user_model()
 
-class TarjetaRoja(models.Model):
+# Estados en los que una tarjeta con fecha_final pasada cuenta como vencida
+OVERDUE_STATUSES = ['open', 'in_progress', 'approved']
+# Estados en los que la tarjeta deja de acumular días abierta
+CLOSED_STATUSES = ['resolved', 'closed']
+
+class DaysBetween(models.Func):
+    """Días enteros entre dos fechas: DaysBetween(fin, inicio)"""
+    output_field = models.IntegerField()
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+class TarjetaRojaQuerySet(models.QuerySet):
+    def with_sla(self, today=None):
+        """
+        Anota ``sla_overdue`` y ``sla_days_open`` (las reglas de is_overdue y
+        days_open) en la consulta, para filtrar, ordenar y paginar por ellos.
+        """
+        if 'sla_days_open' in self.query.annotations:
+            return self
+        today = today or timezone.localdate()
+        end_date = models.Case(
+            models.When(status__in=CLOSED_STATUSES, closed_at__isnull=False,
+                        then=TruncDate('closed_at')),
+            default=models.Value(today),
+            output_field=models.DateField()
+        )
+        return self.annotate(
+            sla_overdue=models.ExpressionWrapper(
+                models.Q(fecha_final__isnull=False, fecha_final__lt=today)
+                & ~models.Q(status__in=CLOSED_STATUSES),
+                output_field=models.BooleanField()
+            ),
+            sla_days_open=DaysBetween(end_date, TruncDate('created_at')),
+        )
+
+class TarjetaRoja(FieldTrackerMixin, models.Model):
     STATUS_CHOICES = [
         ('open', 'Abierta'),
         ('pending_approval', 'Pendiente de Aprobación'),
@@ -24,7 +74,8 @@ class TarjetaRoja(models.Model):
     
     # Campos del formulario principal
     fecha = models.DateField(verbose_name='Fecha', default='2024-01-01')
-    numero = models.CharField(max_length=50, unique=True, verbose_name='Número', default='TR-000')
+    # Vacío: el servidor asigna el siguiente número de la serie (ver numbering.py)
+    numero = models.CharField(max_length=50, unique=True, blank=True, verbose_name='Número')
     sector = models.CharField(max_length=100, verbose_name='Sector', default='Sin especificar')
     descripcion = models.TextField(verbose_name='Descripción', default='Sin descripción')
     razon_motivo = models.TextField(verbose_name='Razón/Motivo', default='Sin especificar')
@@ -59,16 +110,48 @@ class TarjetaRoja(models.Model):
     
     # Metadatos
     is_active = models.BooleanField(default=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # default en lugar de auto_now_add: los imports conservan la fecha histórica
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
     approved_at = models.DateTimeField(null=True, blank=True)
     closed_at = models.DateTimeField(null=True, blank=True)
+    # Aviso de vencimiento ya enviado (ver overdue.py); se limpia al cambiar fecha_final
+    overdue_alerted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
+    objects = TarjetaRojaQuerySet.as_manager()
+    
+    # Cambios detectados en memoria por signals e historial (ver tracking.py)
+    tracked_fields = ('status', 'assigned_to_id', 'priority')
     
     class Meta:
         db_table = 'tarjetas_rojas'
         verbose_name = 'Tarjeta Roja'
         verbose_name_plural = 'Tarjetas Rojas'
         ordering = ['-created_at']
+        indexes = [
+            # Paginación por cursor sobre (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='tarjetas_created_id_idx'),
+            # MAX(updated_at) para los ETag de listados
+            models.Index(fields=['updated_at'], name='tarjetas_updated_idx'),
+            # Filtros del listado (solo tarjetas activas; parciales en PostgreSQL y SQLite)
+            models.Index(fields=['status', '-created_at', '-id'], name='tarjetas_status_idx',
+                         condition=models.Q(is_active=True)),
+            models.Index(fields=['priority', '-created_at', '-id'], name='tarjetas_priority_idx',
+                         condition=models.Q(is_active=True)),
+            models.Index(fields=['assigned_to', 'status', '-created_at'], name='tarjetas_assigned_idx',
+                         condition=models.Q(is_active=True)),
+            models.Index(fields=['created_by', '-created_at', '-id'], name='tarjetas_creator_idx',
+                         condition=models.Q(is_active=True)),
+            # Contador de vencidas del dashboard
+            models.Index(fields=['fecha_final'], name='tarjetas_overdue_idx',
+                         condition=models.Q(is_active=True, status__in=OVERDUE_STATUSES)),
+            # Escaneo de vencimientos: solo tarjetas con fecha final todavía sin aviso.
+            # Sin el estado en la condición: SQLite no usa índices parciales cuya
+            # condición depende de parámetros (status IN (?, ?, ?))
+            models.Index(fields=['fecha_final'], name='tarjetas_overdue_pending_idx',
+                         condition=models.Q(is_active=True, fecha_final__isnull=False,
+                                            overdue_alerted_at__isnull=True)),
+        ]
     
     def __str__(self):
         return f"TR-{self.numero} - {self.descripcion[:50]}"
@@ -77,21 +160,24 @@ class TarjetaRoja(models.Model):
     def code(self):
         return f"TR-{self.id:04d}"
     
+    # Si la consulta usó with_sla() se devuelven los valores calculados en SQL
     @property
     def is_overdue(self):
-        if self.fecha_final and self.status not in ['resolved', 'closed']:
-            from django.utils import timezone
-            return timezone.now().date() > self.fecha_final
+        if hasattr(self, 'sla_overdue'):
+            return bool(self.sla_overdue)
+        if self.fecha_final and self.status not in CLOSED_STATUSES:
+            return timezone.localdate() > self.fecha_final
         return False
     
     @property
     def days_open(self):
-        from django.utils import timezone
-        if self.status in ['resolved', 'closed'] and self.closed_at:
-            end_date = self.closed_at.date()
+        if hasattr(self, 'sla_days_open'):
+            return self.sla_days_open
+        if self.status in CLOSED_STATUSES and self.closed_at:
+            end_date = timezone.localdate(self.closed_at)
         else:
-            end_date = timezone.now().date()
-        return (end_date - self.created_at.date()).days
+            end_date = timezone.localdate()
+        return (end_date - timezone.localdate(self.created_at)).days
     
     def can_be_approved_by(self, user):
         return user.can_approve_tarjetas() and self.status == 'pending_approval'
@@ -100,32 +186,80 @@ class TarjetaRoja(models.Model):
         return (user == self.created_by and self.status in ['open', 'rejected']) or user.is_supervisor()
 
 class TarjetaImage(models.Model):
+    PROCESSING_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('processing', 'Procesando'),
+        ('ready', 'Lista'),
+        ('failed', 'Error'),
+    ]
+    
     tarjeta = models.ForeignKey(TarjetaRoja, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to='tarjetas/%Y/%m/%d/')
+    # Contenido deduplicado: ver apps.media.storage
+    image = models.ImageField(upload_to='tarjetas/%Y/%m/%d/', storage=get_blob_storage)
     description = models.CharField(max_length=200, blank=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
+    # Procesamiento en segundo plano: EXIF eliminado, recodificación y miniaturas
+    processing_status = models.CharField(max_length=20, choices=PROCESSING_CHOICES,
+                                         default='pending')
+    # {'small': 'tarjetas/.../foto_small.jpg', 'medium': ..., 'large': ...}
+    variants = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
     class Meta:
         db_table = 'tarjeta_images'
         verbose_name = 'Imagen de Tarjeta'
         verbose_name_plural = 'Imágenes de Tarjetas'
+        indexes = [
+            # Cambios desde el último /api/sync/
+            models.Index(fields=['updated_at', 'id'], name='tarjeta_images_sync_idx'),
+        ]
     
     def __str__(self):
         return f"Imagen de {self.tarjeta.code}"
 
+class TarjetaUpload(models.Model):
+    """Subida por partes (reanudable) de una imagen para una tarjeta"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tarjeta = models.ForeignKey(TarjetaRoja, on_delete=models.CASCADE, related_name='uploads')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tarjeta_uploads')
+    filename = models.CharField(max_length=255)
+    description = models.CharField(max_length=200, blank=True)
+    size = models.BigIntegerField(verbose_name='Tamaño total (bytes)')
+    received = models.BigIntegerField(default=0, verbose_name='Bytes recibidos')
+    # SHA-256 esperado del archivo completo (opcional, lo informa el cliente)
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'tarjeta_uploads'
+        verbose_name = 'Subida en curso'
+        verbose_name_plural = 'Subidas en curso'
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
 class TarjetaComment(models.Model):
     tarjeta = models.ForeignKey(TarjetaRoja, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     comment = models.TextField()
     is_internal = models.BooleanField(default=False, verbose_name='Comentario interno')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'tarjeta_comments'
         verbose_name = 'Comentario'
         verbose_name_plural = 'Comentarios'
         ordering = ['-created_at']
+        indexes = [
+            # Paginación por cursor de /tarjetas/{id}/comments/
+            models.Index(fields=['tarjeta', '-created_at', '-id'], name='tarjeta_comments_page_idx'),
+            # Cambios desde el último /api/sync/
+            models.Index(fields=['updated_at', 'id'], name='tarjeta_comments_sync_idx'),
+        ]
     
     def __str__(self):
         return f"Comentario en {self.tarjeta.code} por {self.user.full_name}"
@@ -143,6 +277,57 @@ class TarjetaHistory(models.Model):
         verbose_name = 'Historial'
         verbose_name_plural = 'Historial'
         ordering = ['-timestamp']
+        indexes = [
+            # Paginación por cursor de /tarjetas/{id}/history/
+            models.Index(fields=['tarjeta', '-timestamp', '-id'], name='tarjeta_history_page_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tarjeta.code} - {self.action} por {self.user.full_name}"
+
+class NumeroSequence(models.Model):
+    """Último correlativo asignado de cada serie de números de tarjeta"""
+    series = models.CharField(max_length=50, unique=True)
+    last_value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'tarjeta_numero_sequences'
+        verbose_name = 'Serie de Números'
+        verbose_name_plural = 'Series de Números'
+    
+    def __str__(self):
+        return f"{self.series}: {self.last_value}"
+
+class TarjetaStats(models.Model):
+    """Contadores agregados de tarjetas activas, mantenidos en cada alta/cambio/baja"""
+    status = models.CharField(max_length=20, choices=TarjetaRoja.STATUS_CHOICES)
+    priority = models.CharField(max_length=20, choices=TarjetaRoja.PRIORITY_CHOICES)
+    sector = models.CharField(max_length=100)
+    category = models.ForeignKey('categories.Category', on_delete=models.SET_NULL,
+                                null=True, blank=True, related_name='+')
+    work_area = models.ForeignKey('categories.WorkArea', on_delete=models.SET_NULL,
+                                 null=True, blank=True, related_name='+')
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'tarjeta_stats'
+        verbose_name = 'Estadística de Tarjetas'
+        verbose_name_plural = 'Estadísticas de Tarjetas'
+        indexes = [
+            models.Index(fields=['status', 'priority', 'sector', 'category', 'work_area', 'day'],
+                        name='tarjeta_stats_bucket_idx'),
+        ]
+        constraints = [
+            # Un solo contador por bucket. category/work_area son nulables y NULL
+            # no se compara igual a NULL en un índice único: se normalizan a 0
+            models.UniqueConstraint(
+                'status', 'priority', 'sector',
+                Coalesce('category', Value(0)), Coalesce('work_area', Value(0)), 'day',
+                name='tarjeta_stats_bucket_unique'
+            ),
+        ]
     
     def __str__(self):
-        return f"{self.tarjeta.code} - {self.action} por {self.user.full_name}"
\ No newline at end of file
+        return f"{self.day} {self.status}/{self.priority} {self.sector}: {self.count}"
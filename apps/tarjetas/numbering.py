@@ -0,0 +1,104 @@
+"""
+Numeración de tarjetas asignada por el servidor.
+
+Cada serie (por año, por sector o ambos, según ``TARJETA_NUMERO_FORMAT``) tiene
+una fila en ``NumeroSequence``. Un bloque de N números se reserva con un único
+``UPDATE ... SET last_value = last_value + N``: el bloqueo de la fila serializa
+a los workers concurrentes hasta el commit, así que dos procesos nunca reciben
+el mismo número y un rollback devuelve el bloque sin dejar huecos.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import NumeroSequence, TarjetaRoja
+
+SECTOR_CODE_LENGTH = 4
+
+
+def sector_code(sector):
+    """'Soldadura Norte' -> 'SOLD'"""
+    text = unicodedata.normalize('NFKD', sector or '')
+    text = re.sub(r'[^A-Za-z0-9]', '', text.encode('ascii', 'ignore').decode())
+    return text[:SECTOR_CODE_LENGTH].upper() or 'GEN'
+
+
+def series_for(tarjeta):
+    """Devuelve (serie, valores_del_formato) de una tarjeta sin número"""
+    values = {
+        'year': timezone.localtime(tarjeta.created_at or timezone.now()).year,
+        'sector': sector_code(tarjeta.sector),
+    }
+    # Solo los campos presentes en el formato separan series
+    used = [name for name in ('sector', 'year') if f'{{{name}' in settings.TARJETA_NUMERO_FORMAT]
+    series = '-'.join(str(values[name]) for name in used) or 'TR'
+    return series, values
+
+
+def reserve_block(series, count):
+    """Reserva ``count`` correlativos consecutivos de la serie; devuelve el primero"""
+    with transaction.atomic():
+        updated = NumeroSequence.objects.filter(series=series).update(
+            last_value=F('last_value') + count, updated_at=timezone.now()
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    NumeroSequence.objects.create(series=series, last_value=count)
+                return 1
+            except IntegrityError:
+                # Otro worker creó la serie al mismo tiempo
+                NumeroSequence.objects.filter(series=series).update(
+                    last_value=F('last_value') + count, updated_at=timezone.now()
+                )
+        # La fila sigue bloqueada por el UPDATE: el valor leído es el propio
+        last_value = NumeroSequence.objects.filter(series=series).values_list(
+            'last_value', flat=True
+        ).get()
+    return last_value - count + 1
+
+
+def _next_numeros(series, values, count, reserved=()):
+    """
+    Números libres de la serie. Los que ya existen (cargados a mano por
+    clientes anteriores a la numeración automática) se saltean, igual que los
+    de ``reserved``: los que el mismo lote trae del cliente y aún no se guardaron.
+    """
+    numeros = []
+    while len(numeros) < count:
+        missing = count - len(numeros)
+        first = reserve_block(series, missing)
+        candidates = [
+            settings.TARJETA_NUMERO_FORMAT.format(seq=seq, **values)
+            for seq in range(first, first + missing)
+        ]
+        taken = set(
+            TarjetaRoja.objects.filter(numero__in=candidates).values_list('numero', flat=True)
+        )
+        numeros.extend(
+            numero for numero in candidates if numero not in taken and numero not in reserved
+        )
+    return numeros
+
+
+def allocate_numeros(tarjetas):
+    """
+    Asigna número a las tarjetas (aún sin guardar) que no lo traen, con un
+    bloque por serie. Llamar dentro de la transacción que las inserta.
+    """
+    reserved = {tarjeta.numero for tarjeta in tarjetas if tarjeta.numero}
+    groups = defaultdict(list)
+    for tarjeta in tarjetas:
+        if not tarjeta.numero:
+            series, values = series_for(tarjeta)
+            groups[series].append((tarjeta, values))
+
+    for series, members in groups.items():
+        numeros = _next_numeros(series, members[0][1], len(members), reserved)
+        for (tarjeta, _), numero in zip(members, numeros):
+            tarjeta.numero = numero
@@ -0,0 +1,65 @@
+"""
+Avisos de tarjetas vencidas.
+
+Cada corrida busca las tarjetas abiertas cuya ``fecha_final`` pasó y que todavía
+no fueron avisadas, crea las notificaciones con un único ``bulk_create`` y las
+marca con ``overdue_alerted_at``. El índice parcial ``tarjetas_overdue_pending_idx``
+solo contiene las tarjetas pendientes de aviso, así que el costo de una corrida
+depende de cuántas vencieron desde la anterior y no del total de tarjetas abiertas.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.notifications.services import notify_tarjetas_overdue
+
+from .models import OVERDUE_STATUSES, TarjetaRoja
+
+# Tope de tarjetas por corrida; las restantes quedan para la siguiente
+SCAN_LIMIT = 5000
+
+
+def overdue_candidates(today):
+    """
+    Tarjetas vencidas sin aviso. Las que vencieron hace más de
+    ``OVERDUE_ALERT_LOOKBACK_DAYS`` (registros históricos importados, tarjetas
+    anteriores a los avisos) no son vencimientos nuevos y se ignoran.
+    """
+    since = today - timedelta(days=settings.OVERDUE_ALERT_LOOKBACK_DAYS)
+    return TarjetaRoja.objects.filter(
+        is_active=True,
+        status__in=OVERDUE_STATUSES,
+        overdue_alerted_at__isnull=True,
+        fecha_final__gte=since,
+        fecha_final__lt=today,
+    )
+
+
+def overdue_batch(today, limit=SCAN_LIMIT):
+    """Lote de una corrida; bloquea las filas, llamar dentro de una transacción"""
+    # skip_locked: dos corridas simultáneas no avisan la misma tarjeta
+    return (
+        overdue_candidates(today)
+        .select_for_update(skip_locked=True)
+        .only('id', 'fecha_final', 'priority', 'created_by_id', 'assigned_to_id', 'work_area_id')
+        .order_by('fecha_final', 'id')[:limit]
+    )
+
+
+def scan_overdue(today=None, limit=SCAN_LIMIT):
+    """Avisa las tarjetas vencidas desde la última corrida; devuelve (tarjetas, notificaciones)"""
+    today = today or timezone.localdate()
+    with transaction.atomic():
+        tarjetas = list(overdue_batch(today, limit))
+        if not tarjetas:
+            return 0, 0
+
+        notifications = notify_tarjetas_overdue(tarjetas)
+        # overdue_alerted_at no forma parte de la representación: updated_at
+        # (y con él los ETag) no cambia
+        TarjetaRoja.objects.filter(id__in=[tarjeta.id for tarjeta in tarjetas]).update(
+            overdue_alerted_at=timezone.now()
+        )
+    return len(tarjetas), len(notifications)
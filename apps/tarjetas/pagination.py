@@ -0,0 +1,68 @@
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+# Tope de ?per_page= en todos los listados
+MAX_PER_PAGE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def page_size(request, default=20):
+    """?per_page= acotado a MAX_PER_PAGE; ValueError si no es un entero positivo"""
+    per_page = int(request.GET.get('per_page', default))
+    if per_page < 1:
+        raise ValueError(per_page)
+    return min(per_page, MAX_PER_PAGE)
+
+
+def encode_cursor(obj, field='created_at'):
+    """Cursor opaco construido a partir de (field, id)"""
+    raw = f"{getattr(obj, field).isoformat()}|{obj.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+    if value is None:
+        raise InvalidCursor(cursor)
+    return value, pk
+
+
+def cursor_page(queryset, cursor, per_page, field='created_at'):
+    """
+    Consulta de una página keyset sobre (field, id) descendente, con una fila
+    de más para saber si hay otra página. InvalidCursor si el cursor no es válido.
+    """
+    queryset = queryset.order_by(f'-{field}', '-id')
+    
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        # field <= X acota el rango del índice; el OR resuelve los empates
+        queryset = queryset.filter(**{f'{field}__lte': value}).filter(
+            Q(**{f'{field}__lt': value}) | Q(id__lt=pk)
+        )
+    
+    return queryset[:per_page + 1]
+
+
+def paginate_by_cursor(queryset, cursor, per_page, field='created_at'):
+    """
+    Paginación keyset sobre (field, id) descendente.
+    No ejecuta COUNT y el costo por página no depende de la profundidad.
+    """
+    items = list(cursor_page(queryset, cursor, per_page, field))
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    next_cursor = encode_cursor(items[-1], field) if has_more and items else None
+    return items, next_cursor
@@ -0,0 +1,166 @@
+"""
+Índice de búsqueda de texto completo para tarjetas rojas.
+
+PostgreSQL: columna ``search_vector`` (tsvector) con índice GIN y la
+configuración ``es_unaccent`` (spanish + unaccent).
+SQLite: tabla virtual FTS5 ``tarjetas_search`` que replica los campos buscables.
+Otros motores usan la búsqueda por ``icontains``.
+"""
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_FIELDS = ['numero', 'descripcion', 'sector', 'quien_lo_hizo']
+SQLITE_TABLE = 'tarjetas_search'
+PG_CONFIG = 'es_unaccent'
+BATCH_SIZE = 500
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+_PG_VECTOR_SQL = f"""
+    setweight(to_tsvector('{PG_CONFIG}', coalesce(numero, '')), 'A') ||
+    setweight(to_tsvector('{PG_CONFIG}', coalesce(sector, '')), 'B') ||
+    setweight(to_tsvector('{PG_CONFIG}', coalesce(descripcion, '')), 'C') ||
+    setweight(to_tsvector('{PG_CONFIG}', coalesce(quien_lo_hizo, '')), 'D')
+"""
+
+
+def _vendor(using='default'):
+    return connections[using].vendor
+
+
+def _strip_accents(text):
+    normalized = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in normalized if not unicodedata.combining(c))
+
+
+def _light_stem(term):
+    """Stemming mínimo de plurales en español para SQLite (FTS5 no trae stemmer)"""
+    if len(term) > 4 and term.endswith('es'):
+        return term[:-2]
+    if len(term) > 3 and term.endswith('s'):
+        return term[:-1]
+    return term
+
+
+def _terms(text):
+    return [t.lower() for t in _TERM_RE.findall(text)]
+
+
+def _pg_query(terms):
+    # Prefijo en cada término para búsqueda mientras se escribe
+    return ' & '.join(f'{t}:*' for t in terms)
+
+
+def _sqlite_query(terms):
+    return ' '.join(f'"{_light_stem(_strip_accents(t))}"*' for t in terms)
+
+
+def search_tarjetas(queryset, text):
+    """
+    Filtra el queryset por texto y anota ``search_rank`` (mayor es más relevante).
+    """
+    terms = _terms(text)
+    if not terms:
+        return queryset
+
+    vendor = _vendor(queryset.db)
+
+    if vendor == 'postgresql':
+        query = _pg_query(terms)
+        tsquery = f"to_tsquery('{PG_CONFIG}', %s)"
+        return queryset.alias(
+            search_match=RawSQL(
+                f'"tarjetas_rojas"."search_vector" @@ {tsquery}',
+                [query], output_field=BooleanField()
+            )
+        ).filter(search_match=True).annotate(
+            search_rank=RawSQL(
+                f'ts_rank("tarjetas_rojas"."search_vector", {tsquery})',
+                [query], output_field=FloatField()
+            )
+        )
+
+    if vendor == 'sqlite':
+        # JOIN contra la tabla FTS5: el plan parte del MATCH y busca por rowid
+        return queryset.extra(
+            tables=[SQLITE_TABLE],
+            where=[
+                f'{SQLITE_TABLE}.rowid = "tarjetas_rojas"."id"',
+                f'{SQLITE_TABLE} MATCH %s',
+            ],
+            params=[_sqlite_query(terms)],
+            # bm25() es negativo: se invierte para que mayor sea mejor
+            select={'search_rank': f'-bm25({SQLITE_TABLE})'},
+        )
+
+    # Sin índice de texto: búsqueda por coincidencia parcial
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f'{field}__icontains': text})
+    return queryset.filter(condition)
+
+
+def is_ranked(queryset):
+    """Indica si el queryset trae ``search_rank`` para ordenar por relevancia"""
+    return 'search_rank' in queryset.query.annotations or 'search_rank' in queryset.query.extra_select
+
+
+def update_search_index(ids, using='default'):
+    """Reindexa las tarjetas indicadas (usar tras bulk_create o update masivos)"""
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        _update_batch(ids[start:start + BATCH_SIZE], using)
+
+
+def _update_batch(ids, using):
+    if not ids:
+        return
+
+    vendor = _vendor(using)
+    placeholders = ', '.join(['%s'] * len(ids))
+
+    with connections[using].cursor() as cursor:
+        if vendor == 'postgresql':
+            cursor.execute(
+                f'UPDATE tarjetas_rojas SET search_vector = {_PG_VECTOR_SQL} '
+                f'WHERE id IN ({placeholders})',
+                ids
+            )
+        elif vendor == 'sqlite':
+            cursor.execute(
+                f'DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({placeholders})', ids
+            )
+            cursor.execute(
+                f'INSERT INTO {SQLITE_TABLE} (rowid, {", ".join(SEARCH_FIELDS)}) '
+                f'SELECT id, {", ".join(SEARCH_FIELDS)} FROM tarjetas_rojas '
+                f'WHERE id IN ({placeholders})',
+                ids
+            )
+
+
+def remove_from_search_index(ids, using='default'):
+    ids = list(ids)
+    if not ids or _vendor(using) != 'sqlite':
+        # En PostgreSQL el vector vive en la misma fila
+        return
+
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({placeholders})', ids)
+
+
+def rebuild_search_index(using='default'):
+    vendor = _vendor(using)
+    with connections[using].cursor() as cursor:
+        if vendor == 'postgresql':
+            cursor.execute(f'UPDATE tarjetas_rojas SET search_vector = {_PG_VECTOR_SQL}')
+        elif vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {SQLITE_TABLE} (rowid, {", ".join(SEARCH_FIELDS)}) '
+                f'SELECT id, {", ".join(SEARCH_FIELDS)} FROM tarjetas_rojas'
+            )
@@ -1,15 +1,69 @@
 from rest_framework import serializers
+from django.db import transaction
 from .models import TarjetaRoja, TarjetaImage, TarjetaComment, TarjetaHistory
-from apps.users.serializers import UserSerializer
-from apps.categories.serializers import CategorySerializer, WorkAreaSerializer
+from apps.users.serializers import UserSerializer, UserStubSerializer
+from apps.categories.serializers import (
+    CategorySerializer, CategoryStubSerializer, WorkAreaSerializer, WorkAreaStubSerializer
+)
+from .stats import apply_stats_changes, stats_key
+
+USER_FIELDS = ['created_by', 'assigned_to', 'approved_by']
+
+# Entradas de comentarios e historial embebidas en el detalle; el resto se pagina
+RECENT_ENTRIES = 10
+
+EXPANDABLE_FIELDS = {
+    'created_by': UserSerializer,
+    'assigned_to': UserSerializer,
+    'approved_by': UserSerializer,
+    'category': CategorySerializer,
+    'work_area': WorkAreaSerializer,
+}
+
+def query_param_set(request, name):
+    """Lee un query param separado por comas (p. ej. ?fields=id,numero)"""
+    if request is None:
+        return set()
+    value = request.GET.get(name, '')
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+class SparseFieldsetMixin:
+    """
+    ``?fields=`` limita los campos devueltos y ``?expand=`` reemplaza las
+    referencias compactas por el serializer completo de ``EXPANDABLE_FIELDS``.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        
+        for name in query_param_set(request, 'expand') & set(EXPANDABLE_FIELDS):
+            if name in self.fields:
+                self.fields[name] = EXPANDABLE_FIELDS[name](read_only=True)
+        
+        fields = query_param_set(request, 'fields')
+        if fields:
+            for name in set(self.fields) - fields - {'id'}:
+                self.fields.pop(name)
 
 class TarjetaImageSerializer(serializers.ModelSerializer):
     uploaded_by = UserSerializer(read_only=True)
+    variants = serializers.SerializerMethodField()
     
     class Meta:
         model = TarjetaImage
-        fields = ['id', 'image', 'description', 'uploaded_by', 'uploaded_at']
-        read_only_fields = ['id', 'uploaded_by', 'uploaded_at']
+        fields = ['id', 'image', 'description', 'uploaded_by', 'uploaded_at',
+                 'processing_status', 'variants']
+        read_only_fields = ['id', 'uploaded_by', 'uploaded_at', 'processing_status']
+    
+    def get_variants(self, obj):
+        """URLs de las miniaturas; vacío mientras la imagen se procesa"""
+        storage = obj.image.storage
+        request = self.context.get('request')
+        urls = {}
+        for name, path in obj.variants.items():
+            url = storage.url(path)
+            urls[name] = request.build_absolute_uri(url) if request else url
+        return urls
 
 class TarjetaCommentSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -27,31 +81,44 @@ class TarjetaHistorySerializer(serializers.ModelSerializer):
         fields = ['id', 'action', 'old_value', 'new_value', 'user', 'timestamp']
         read_only_fields = ['id', 'user', 'timestamp']
 
-class TarjetaRojaListSerializer(serializers.ModelSerializer):
-    created_by = UserSerializer(read_only=True)
-    assigned_to = UserSerializer(read_only=True)
-    approved_by = UserSerializer(read_only=True)
-    category = CategorySerializer(read_only=True)
-    work_area = WorkAreaSerializer(read_only=True)
+class TarjetaRojaListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Solo ids: los datos de usuarios y categorías van una vez en 'included'
+    created_by = serializers.PrimaryKeyRelatedField(read_only=True)
+    assigned_to = serializers.PrimaryKeyRelatedField(read_only=True)
+    approved_by = serializers.PrimaryKeyRelatedField(read_only=True)
+    category = serializers.PrimaryKeyRelatedField(read_only=True)
+    work_area = serializers.PrimaryKeyRelatedField(read_only=True)
     code = serializers.ReadOnlyField()
     is_overdue = serializers.ReadOnlyField()
     days_open = serializers.ReadOnlyField()
+    thumbnail = serializers.SerializerMethodField()
     
     class Meta:
         model = TarjetaRoja
         fields = ['id', 'code', 'numero', 'fecha', 'sector', 'descripcion', 'status', 'priority', 
                  'created_by', 'assigned_to', 'approved_by', 'quien_lo_hizo', 'category', 'work_area',
-                 'created_at', 'updated_at', 'is_overdue', 'days_open']
+                 'created_at', 'updated_at', 'is_overdue', 'days_open', 'thumbnail']
+    
+    def get_thumbnail(self, obj):
+        """Miniatura de la primera imagen procesada (la vista la precarga en cover_images)"""
+        covers = getattr(obj, 'cover_images', None)
+        if covers is None:
+            covers = obj.images.filter(processing_status='ready').order_by('uploaded_at', 'id')[:1]
+        for image in covers:
+            return TarjetaImageSerializer(image, context=self.context).data['variants'].get('small')
+        return None
 
-class TarjetaRojaDetailSerializer(serializers.ModelSerializer):
-    created_by = UserSerializer(read_only=True)
-    assigned_to = UserSerializer(read_only=True)
-    approved_by = UserSerializer(read_only=True)
-    category = CategorySerializer(read_only=True)
-    work_area = WorkAreaSerializer(read_only=True)
+class TarjetaRojaDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    created_by = UserStubSerializer(read_only=True)
+    assigned_to = UserStubSerializer(read_only=True)
+    approved_by = UserStubSerializer(read_only=True)
+    category = CategoryStubSerializer(read_only=True)
+    work_area = WorkAreaStubSerializer(read_only=True)
     images = TarjetaImageSerializer(many=True, read_only=True)
-    comments = TarjetaCommentSerializer(many=True, read_only=True)
-    history = TarjetaHistorySerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
+    comments_count = serializers.SerializerMethodField()
+    history = serializers.SerializerMethodField()
+    history_count = serializers.SerializerMethodField()
     code = serializers.ReadOnlyField()
     is_overdue = serializers.ReadOnlyField()
     days_open = serializers.ReadOnlyField()
@@ -61,9 +128,70 @@ class TarjetaRojaDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'code', 'numero', 'fecha', 'sector', 'descripcion',
                  'razon_motivo', 'quien_lo_hizo', 'destino_final', 'fecha_final',
                  'status', 'priority', 'created_by', 'assigned_to', 'approved_by',
-                 'category', 'work_area', 'resolution_notes', 'images', 'comments', 'history',
+                 'category', 'work_area', 'resolution_notes', 'images',
+                 'comments', 'comments_count', 'history', 'history_count',
                  'created_at', 'updated_at', 'approved_at', 'closed_at',
                  'is_overdue', 'days_open']
+    
+    # Solo las últimas RECENT_ENTRIES: la vista las precarga en recent_comments /
+    # recent_history y anota los totales; sin eso se consultan aquí
+    def get_comments(self, obj):
+        comments = getattr(obj, 'recent_comments', None)
+        if comments is None:
+            comments = obj.comments.select_related('user').order_by('-created_at', '-id')[:RECENT_ENTRIES]
+        return TarjetaCommentSerializer(comments, many=True).data
+    
+    def get_comments_count(self, obj):
+        total = getattr(obj, 'comments_total', None)
+        return obj.comments.count() if total is None else total
+    
+    def get_history(self, obj):
+        history = getattr(obj, 'recent_history', None)
+        if history is None:
+            history = obj.history.select_related('user').order_by('-timestamp', '-id')[:RECENT_ENTRIES]
+        return TarjetaHistorySerializer(history, many=True).data
+    
+    def get_history_count(self, obj):
+        total = getattr(obj, 'history_total', None)
+        return obj.history.count() if total is None else total
+
+def build_included(tarjetas, request=None):
+    """
+    Mapas de referencias compactas para un listado: cada usuario, categoría y
+    área aparece una sola vez por respuesta. Los campos expandidos no se incluyen.
+    """
+    expand = query_param_set(request, 'expand')
+    fields = query_param_set(request, 'fields')
+    
+    def wanted(name):
+        return name not in expand and (not fields or name in fields)
+    
+    users, categories, work_areas = {}, {}, {}
+    for tarjeta in tarjetas:
+        for name in USER_FIELDS:
+            user = getattr(tarjeta, name) if wanted(name) else None
+            if user is not None:
+                users[user.id] = user
+        if wanted('category') and tarjeta.category is not None:
+            categories[tarjeta.category.id] = tarjeta.category
+        if wanted('work_area') and tarjeta.work_area is not None:
+            work_areas[tarjeta.work_area.id] = tarjeta.work_area
+    
+    return {
+        'users': {str(pk): UserStubSerializer(user).data for pk, user in users.items()},
+        'categories': {str(pk): CategoryStubSerializer(category).data
+                       for pk, category in categories.items()},
+        'work_areas': {str(pk): WorkAreaStubSerializer(work_area).data
+                       for pk, work_area in work_areas.items()},
+    }
+
+def initial_status_fields(user):
+    """Estado inicial de una tarjeta según el rol de quien la crea"""
+    # Si el usuario no es supervisor, la tarjeta necesita aprobación
+    if not user.is_supervisor():
+        return {'status': 'pending_approval'}
+    from django.utils import timezone
+    return {'status': 'approved', 'approved_by': user, 'approved_at': timezone.now()}
 
 class TarjetaRojaCreateSerializer(serializers.ModelSerializer):
     assigned_to_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
@@ -107,17 +235,20 @@ class TarjetaRojaCreateSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({'work_area_id': 'Área de trabajo no encontrada'})
         
         validated_data['created_by'] = self.context['request'].user
+        validated_data.update(initial_status_fields(self.context['request'].user))
         
-        # Si el usuario no es supervisor, la tarjeta necesita aprobación
-        if not self.context['request'].user.is_supervisor():
-            validated_data['status'] = 'pending_approval'
-        else:
-            validated_data['status'] = 'approved'
-            validated_data['approved_by'] = self.context['request'].user
-            from django.utils import timezone
-            validated_data['approved_at'] = timezone.now()
-        
-        return super().create(validated_data)
+        with transaction.atomic():
+            tarjeta = super().create(validated_data)
+            apply_stats_changes([(None, stats_key(tarjeta))])
+        return tarjeta
+
+class TarjetaRojaBulkItemSerializer(TarjetaRojaCreateSerializer):
+    """
+    Validación por ítem de la carga masiva. La unicidad de ``numero`` y las
+    claves foráneas se verifican para todo el lote con una consulta por modelo.
+    """
+    class Meta(TarjetaRojaCreateSerializer.Meta):
+        extra_kwargs = {'numero': {'validators': []}}
 
 class TarjetaRojaUpdateSerializer(serializers.ModelSerializer):
     assigned_to_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
@@ -129,6 +260,8 @@ class TarjetaRojaUpdateSerializer(serializers.ModelSerializer):
         fields = ['numero', 'fecha', 'sector', 'descripcion', 'razon_motivo',
                  'quien_lo_hizo', 'destino_final', 'fecha_final', 'priority',
                  'assigned_to_id', 'category_id', 'work_area_id', 'status', 'resolution_notes']
+        # El número asignado no se puede vaciar
+        extra_kwargs = {'numero': {'allow_blank': False}}
     
     def update(self, instance, validated_data):
         assigned_to_id = validated_data.pop('assigned_to_id', None)
@@ -179,6 +312,14 @@ class TarjetaRojaUpdateSerializer(serializers.ModelSerializer):
                 validated_data['closed_at'] = timezone.now()
             elif new_status == 'resolved' and 'fecha_final' not in validated_data:
                 from django.utils import timezone
-                validated_data['fecha_final'] = timezone.now().date()
+                validated_data['fecha_final'] = timezone.localdate()
+        
+        # Con una nueva fecha final la tarjeta vuelve a avisarse si vence
+        if validated_data.get('fecha_final', instance.fecha_final) != instance.fecha_final:
+            validated_data['overdue_alerted_at'] = None
         
-        return super().update(instance, validated_data)
\ No newline at end of file
+        with transaction.atomic():
+            old_key = stats_key(instance)
+            tarjeta = super().update(instance, validated_data)
+            apply_stats_changes([(old_key, stats_key(tarjeta))])
+        return tarjeta
\ No newline at end of file
@@ -0,0 +1,33 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from apps.categories.models import Category, WorkArea
+from .models import TarjetaRoja
+from .numbering import allocate_numeros
+from .search import SEARCH_FIELDS, update_search_index, remove_from_search_index
+from .stats import detach_stats
+
+@receiver(pre_save, sender=TarjetaRoja)
+def assign_numero(sender, instance, raw=False, **kwargs):
+    """Tarjetas creadas sin número reciben el siguiente de su serie"""
+    if not raw and instance._state.adding and not instance.numero:
+        allocate_numeros([instance])
+
+@receiver(post_save, sender=TarjetaRoja)
+def sync_search_index(sender, instance, using, update_fields=None, **kwargs):
+    """Mantener el índice de búsqueda al día con cada guardado"""
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    update_search_index([instance.pk], using=using)
+
+@receiver(post_delete, sender=TarjetaRoja)
+def drop_from_search_index(sender, instance, using, **kwargs):
+    remove_from_search_index([instance.pk], using=using)
+
+@receiver(pre_delete, sender=Category)
+def detach_category_stats(sender, instance, **kwargs):
+    """Antes del SET_NULL: los contadores de la categoría pasan al bucket sin categoría"""
+    detach_stats('category_id', instance.pk)
+
+@receiver(pre_delete, sender=WorkArea)
+def detach_work_area_stats(sender, instance, **kwargs):
+    detach_stats('work_area_id', instance.pk)
@@ -0,0 +1,252 @@
+"""
+Estadísticas del dashboard de tarjetas rojas.
+
+Los contadores por estado, prioridad y sector se leen de la tabla agregada
+``TarjetaStats``, que se actualiza en la misma transacción que cada alta,
+cambio de estado/prioridad o baja lógica. El resultado se guarda en caché por
+unos segundos y las peticiones concurrentes que encuentran la caché vacía
+esperan al primer cálculo en lugar de repetirlo.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import OVERDUE_STATUSES, TarjetaRoja, TarjetaStats
+
+CACHE_KEY = 'tarjetas:dashboard_stats'
+LOCK_KEY = 'tarjetas:dashboard_stats:lock'
+LOCK_TIMEOUT = 10
+POLL_INTERVAL = 0.05
+
+DASHBOARD_STATUSES = ['open', 'pending_approval', 'in_progress', 'resolved']
+
+BUCKET_FIELDS = ['status', 'priority', 'sector', 'category_id', 'work_area_id', 'day']
+BULK_BUCKETS_THRESHOLD = 50
+BULK_BUCKETS_BATCH = 300
+
+_local_lock = threading.Lock()
+
+
+def stats_key(tarjeta):
+    """Bucket de ``TarjetaStats`` al que pertenece la tarjeta (None si está inactiva)"""
+    if not tarjeta.is_active:
+        return None
+    return (
+        tarjeta.status,
+        tarjeta.priority,
+        tarjeta.sector,
+        tarjeta.category_id,
+        tarjeta.work_area_id,
+        timezone.localdate(tarjeta.created_at),
+    )
+
+
+def apply_stats_changes(changes):
+    """
+    Aplica una lista de pares (bucket_anterior, bucket_nuevo) a la tabla agregada.
+    Un alta es (None, key) y una baja lógica (key, None).
+    """
+    deltas = Counter()
+    for old_key, new_key in changes:
+        if old_key == new_key:
+            continue
+        if old_key is not None:
+            deltas[old_key] -= 1
+        if new_key is not None:
+            deltas[new_key] += 1
+
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    with transaction.atomic():
+        if len(deltas) > BULK_BUCKETS_THRESHOLD:
+            _apply_bulk(deltas)
+            return
+
+        for key, delta in deltas.items():
+            _add_to_bucket(key, delta)
+
+
+def _add_to_bucket(key, delta):
+    """UPDATE del bucket o, si no existe, INSERT (único por bucket: ver el modelo)"""
+    bucket = dict(zip(BUCKET_FIELDS, key))
+    if TarjetaStats.objects.filter(**bucket).update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            TarjetaStats.objects.create(count=delta, **bucket)
+    except IntegrityError:
+        # Otro proceso creó el bucket entre el UPDATE y el INSERT
+        TarjetaStats.objects.filter(**bucket).update(count=F('count') + delta)
+
+
+def _apply_bulk(deltas):
+    """
+    Variante para altas masivas (imports): los buckets nuevos se insertan con
+    bulk_create y los existentes se incrementan con un UPDATE por bloque.
+    """
+    rows = TarjetaStats.objects.filter(day__in={key[-1] for key in deltas}).values_list(
+        'id', *BUCKET_FIELDS
+    )
+    existing = {tuple(key): pk for pk, *key in rows}
+
+    new = {key: delta for key, delta in deltas.items() if key not in existing}
+    try:
+        with transaction.atomic():
+            TarjetaStats.objects.bulk_create([
+                TarjetaStats(count=delta, **dict(zip(BUCKET_FIELDS, key)))
+                for key, delta in new.items()
+            ], batch_size=BULK_BUCKETS_BATCH)
+    except IntegrityError:
+        # Otro proceso creó alguno de los buckets: de a uno, con reintento
+        for key, delta in new.items():
+            _add_to_bucket(key, delta)
+
+    increments = [(existing[key], delta) for key, delta in deltas.items() if key in existing]
+    for start in range(0, len(increments), BULK_BUCKETS_BATCH):
+        chunk = increments[start:start + BULK_BUCKETS_BATCH]
+        # count = count + CASE ...: atómico aunque otro proceso actualice el bucket
+        TarjetaStats.objects.filter(pk__in=[pk for pk, _ in chunk]).update(
+            count=F('count') + Case(
+                *[When(pk=pk, then=Value(delta)) for pk, delta in chunk],
+                default=Value(0), output_field=IntegerField()
+            )
+        )
+
+
+def detach_stats(field, pk):
+    """
+    Pasa los buckets de una categoría o área que se borra (``field`` es
+    'category_id' o 'work_area_id') al bucket sin ella, igual que el SET_NULL
+    de sus tarjetas. El SET_NULL directo sobre la tabla agregada podría chocar
+    con un bucket sin categoría ya existente.
+    """
+    position = BUCKET_FIELDS.index(field)
+    with transaction.atomic():
+        rows = list(TarjetaStats.objects.select_for_update().filter(**{field: pk}).values_list(
+            'id', *BUCKET_FIELDS, 'count'
+        ))
+        if not rows:
+            return
+        TarjetaStats.objects.filter(id__in=[row[0] for row in rows]).delete()
+
+        deltas = Counter()
+        for _, *key, count in rows:
+            key[position] = None
+            deltas[tuple(key)] += count
+        for key, delta in deltas.items():
+            if delta:
+                _add_to_bucket(key, delta)
+
+
+def compute_stats_buckets():
+    """Recalcula los buckets desde ``tarjetas_rojas`` (O(filas))"""
+    buckets = TarjetaRoja.objects.filter(is_active=True).annotate(
+        day=TruncDate('created_at')
+    ).values(*BUCKET_FIELDS).annotate(total=Count('id')).order_by()
+
+    return {tuple(row[field] for field in BUCKET_FIELDS): row['total'] for row in buckets}
+
+
+def stored_stats_buckets():
+    rows = TarjetaStats.objects.values(*BUCKET_FIELDS).annotate(
+        total=Sum('count')
+    ).order_by()
+    return {
+        tuple(row[field] for field in BUCKET_FIELDS): row['total']
+        for row in rows if row['total']
+    }
+
+
+def rebuild_stats():
+    expected = compute_stats_buckets()
+    with transaction.atomic():
+        TarjetaStats.objects.all().delete()
+        TarjetaStats.objects.bulk_create(
+            [TarjetaStats(count=total, **dict(zip(BUCKET_FIELDS, key)))
+             for key, total in expected.items()],
+            batch_size=1000
+        )
+    return expected
+
+
+def overdue_tarjetas(today):
+    """Tarjetas activas vencidas a ``today`` (índice parcial tarjetas_overdue_idx)"""
+    return TarjetaRoja.objects.filter(
+        is_active=True,
+        fecha_final__lt=today,
+        status__in=OVERDUE_STATUSES
+    )
+
+
+def compute_dashboard_stats():
+    # Los contadores salen de la tabla agregada: O(buckets), no O(tarjetas)
+    status_counts = dict(
+        TarjetaStats.objects.values_list('status').annotate(total=Sum('count')).order_by()
+    )
+    priority_counts = dict(
+        TarjetaStats.objects.values_list('priority').annotate(total=Sum('count')).order_by()
+    )
+    sector_stats = TarjetaStats.objects.values('sector').annotate(
+        total=Sum('count')
+    ).filter(total__gt=0).order_by('-total')[:10]
+
+    # Vencidas depende de la fecha actual: consulta por rango sobre fecha_final
+    overdue = overdue_tarjetas(timezone.localdate()).count()
+
+    status_stats = {status: status_counts.get(status, 0) for status in DASHBOARD_STATUSES}
+    status_stats['overdue'] = overdue
+
+    return {
+        'total_tarjetas': sum(status_counts.values()),
+        'status_stats': status_stats,
+        'priority_stats': {
+            priority: priority_counts.get(priority, 0)
+            for priority, _ in TarjetaRoja.PRIORITY_CHOICES
+        },
+        'sector_stats': list(sector_stats),
+    }
+
+
+def _compute_and_store():
+    stats = compute_dashboard_stats()
+    cache.set(CACHE_KEY, stats, settings.DASHBOARD_STATS_CACHE_TTL)
+    return stats
+
+
+def get_dashboard_stats():
+    stats = cache.get(CACHE_KEY)
+    if stats is not None:
+        return stats
+
+    # Un solo hilo por proceso calcula; el resto espera y reutiliza el resultado
+    with _local_lock:
+        stats = cache.get(CACHE_KEY)
+        if stats is not None:
+            return stats
+
+        # Entre procesos/workers el candado vive en la caché compartida
+        if cache.add(LOCK_KEY, 1, LOCK_TIMEOUT):
+            try:
+                return _compute_and_store()
+            finally:
+                cache.delete(LOCK_KEY)
+
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            stats = cache.get(CACHE_KEY)
+            if stats is not None:
+                return stats
+
+        # El worker que tenía el candado no terminó a tiempo
+        return _compute_and_store()
+
+
+def invalidate_dashboard_stats():
+    cache.delete(CACHE_KEY)
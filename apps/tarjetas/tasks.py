@@ -0,0 +1,19 @@
+from formokaizen_backend.background import background_task
+
+
+@background_task
+def process_tarjeta_image(image_id):
+    from .images import process_image
+    process_image(image_id)
+
+
+@background_task
+def requeue_stale_images():
+    from .images import requeue_stale_images
+    return requeue_stale_images()
+
+
+@background_task
+def scan_overdue_tarjetas():
+    from .overdue import scan_overdue
+    return scan_overdue()
@@ -0,0 +1,500 @@
+import csv
+import io
+import re
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import QuerySet
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.categories.models import Category, WorkArea
+from .models import TarjetaRoja, TarjetaStats
+from .importer import _text
+from .overdue import overdue_batch
+from .pagination import MAX_PER_PAGE, cursor_page, encode_cursor
+from .stats import BULK_BUCKETS_THRESHOLD, apply_stats_changes, overdue_tarjetas
+from .views import tarjetas_list_queryset
+
+User = get_user_model()
+
+
+class ListQueryCountTests(TestCase):
+    """El costo en consultas de los listados no depende de la cantidad de filas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.supervisor = User.objects.create_user(
+            username='sup', email='sup@example.com', password='x', role='supervisor'
+        )
+        cls.user = User.objects.create_user(username='op', email='op@example.com', password='x')
+        categories = []
+        for i in range(5):
+            category = Category.objects.create(name=f'Categoría {i}', created_by=cls.supervisor)
+            for j in range(3):
+                WorkArea.objects.create(name=f'Área {i}.{j}', category=category,
+                                        responsible=cls.supervisor)
+            categories.append(category)
+        for i in range(100):
+            category = categories[i % len(categories)]
+            TarjetaRoja.objects.create(
+                descripcion=f'Tarjeta {i}', created_by=cls.user, assigned_to=cls.supervisor,
+                category=category, work_area=category.work_areas.first()
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    # Incluye los MAX(updated_at) del ETag: tarjetas, categorías, áreas y usuarios
+    def test_tarjetas_list_with_expanded_category(self):
+        with self.assertNumQueries(10):
+            response = self.client.get('/api/tarjetas/?per_page=100&expand=category')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 100)
+
+    def test_tarjetas_list_cost_does_not_grow_with_page_size(self):
+        with self.assertNumQueries(10):
+            self.client.get('/api/tarjetas/?per_page=10&expand=category')
+
+    def test_categories_list(self):
+        with self.assertNumQueries(6):
+            response = self.client.get('/api/categories/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 5)
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='op', email='op@example.com', password='x')
+        # Dos grupos con el mismo created_at: el orden lo desempata el id
+        tied = timezone.now() - timedelta(days=1)
+        cls.tarjetas = [
+            TarjetaRoja.objects.create(
+                descripcion=f'Tarjeta {i}', created_by=cls.user,
+                created_at=tied if i < 4 else tied - timedelta(hours=1)
+            )
+            for i in range(7)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, **params):
+        return self.client.get('/api/tarjetas/', {'pagination': 'cursor', **params})
+
+    def walk(self, per_page):
+        ids, cursor, pages = [], None, 0
+        while True:
+            params = {'per_page': per_page}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.get(**params)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.data['results'])
+            pages += 1
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                return ids, pages
+
+    def test_cursor_round_trip_with_created_at_ties(self):
+        expected = [
+            tarjeta.id for tarjeta in
+            sorted(self.tarjetas, key=lambda tarjeta: (tarjeta.created_at, tarjeta.id), reverse=True)
+        ]
+        for per_page in (1, 2, 3, 7):
+            ids, pages = self.walk(per_page)
+            # Sin repetidos ni faltantes, aunque un corte caiga entre empates
+            self.assertEqual(ids, expected)
+            self.assertEqual(pages, -(-len(expected) // per_page))
+
+    def test_order_is_stable_across_requests(self):
+        first = [item['id'] for item in self.get(per_page=3).data['results']]
+        second = [item['id'] for item in self.get(per_page=3).data['results']]
+        self.assertEqual(first, second)
+
+    def test_tampered_cursor(self):
+        valid = self.get(per_page=2).data['next_cursor']
+        for cursor in (valid[:-3] + '!!!', 'no-es-un-cursor', 'eHx5', 'MjAyNC0wMS0wMXx4'):
+            response = self.get(cursor=cursor)
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.data['error'], 'Cursor inválido')
+
+    def test_bad_per_page(self):
+        for value in ('0', '-5', 'abc', '1.5'):
+            self.assertEqual(self.get(per_page=value).status_code, 400, value)
+            self.assertEqual(
+                self.client.get('/api/tarjetas/', {'per_page': value}).status_code, 400, value
+            )
+        self.assertEqual(self.client.get('/api/tarjetas/', {'page': '0'}).status_code, 400)
+
+    def test_per_page_is_capped(self):
+        response = self.get(per_page=1000)
+        self.assertEqual(response.data['per_page'], MAX_PER_PAGE)
+
+
+class ConditionalGetTests(TestCase):
+    """El ETag cambia cuando cambian los datos embebidos, no solo la tarjeta"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='op', email='op@example.com', password='x')
+        cls.category = Category.objects.create(name='Seguridad', created_by=cls.user)
+        cls.work_area = WorkArea.objects.create(name='Prensas', category=cls.category,
+                                                responsible=cls.user)
+        cls.tarjeta = TarjetaRoja.objects.create(
+            descripcion='Fuga', created_by=cls.user, assigned_to=cls.user,
+            category=cls.category, work_area=cls.work_area
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_related_change_breaks_304(self, url, change):
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+    def rename_category(self):
+        self.category.name = 'Seguridad industrial'
+        self.category.save()
+
+    def rename_work_area(self):
+        self.work_area.name = 'Prensas 2'
+        self.work_area.save()
+
+    def rename_user(self):
+        self.user.first_name = 'Ana'
+        self.user.save()
+
+    def test_list_category_rename(self):
+        response = self.assert_related_change_breaks_304('/api/tarjetas/', self.rename_category)
+        category = response.data['included']['categories'][str(self.category.pk)]
+        self.assertEqual(category['name'], 'Seguridad industrial')
+
+    def test_list_work_area_and_user_changes(self):
+        self.assert_related_change_breaks_304('/api/tarjetas/', self.rename_work_area)
+        self.assert_related_change_breaks_304('/api/tarjetas/', self.rename_user)
+
+    def test_list_cursor_category_rename(self):
+        self.assert_related_change_breaks_304(
+            '/api/tarjetas/?pagination=cursor', self.rename_category
+        )
+
+    def test_detail_related_changes(self):
+        url = f'/api/tarjetas/{self.tarjeta.pk}/'
+        self.assert_related_change_breaks_304(url, self.rename_category)
+        self.assert_related_change_breaks_304(url, self.rename_work_area)
+        self.assert_related_change_breaks_304(url, self.rename_user)
+
+
+class StatsBucketTests(TestCase):
+    DAY = date(2026, 3, 2)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='op', email='op@example.com', password='x')
+        cls.category = Category.objects.create(name='Seguridad', created_by=cls.user)
+        cls.work_area = WorkArea.objects.create(name='Prensas', category=cls.category,
+                                                responsible=cls.user)
+
+    def key(self, category=None, work_area=None, day=DAY):
+        return ('open', 'medium', 'Planta', category, work_area, day)
+
+    def counts(self):
+        return list(TarjetaStats.objects.order_by('id').values_list('count', flat=True))
+
+    def test_one_row_per_bucket_even_without_category(self):
+        bucket = dict(status='open', priority='medium', sector='Planta', day=self.DAY)
+        TarjetaStats.objects.create(count=1, **bucket)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TarjetaStats.objects.create(count=1, **bucket)
+
+    def test_soft_delete_after_creates(self):
+        key = self.key(self.category.pk, self.work_area.pk)
+        apply_stats_changes([(None, key)] * 5)
+        apply_stats_changes([(key, None)])
+        self.assertEqual(self.counts(), [4])
+
+    def test_insert_race_retries_the_update(self):
+        key = self.key()
+        apply_stats_changes([(None, key)] * 2)
+
+        real_update = QuerySet.update
+        calls = []
+
+        def racy_update(queryset, **kwargs):
+            # El primer UPDATE llega antes de que el otro proceso confirme su INSERT
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else real_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', racy_update):
+            apply_stats_changes([(None, key)])
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.counts(), [3])
+
+    def test_bulk_changes_reuse_existing_buckets(self):
+        existing = self.key()
+        apply_stats_changes([(None, existing)])
+
+        keys = [existing] + [
+            self.key(day=self.DAY + timedelta(days=i)) for i in range(1, BULK_BUCKETS_THRESHOLD + 1)
+        ]
+        apply_stats_changes([(None, key) for key in keys])
+
+        self.assertEqual(TarjetaStats.objects.count(), len(keys))
+        self.assertEqual(TarjetaStats.objects.get(day=self.DAY).count, 2)
+
+    def test_deleting_a_category_merges_into_the_bucket_without_it(self):
+        apply_stats_changes([(None, self.key())] * 2)
+        apply_stats_changes([(None, self.key(self.category.pk))] * 3)
+        apply_stats_changes([(None, self.key(self.category.pk, self.work_area.pk))])
+
+        self.category.delete()
+
+        self.assertEqual(
+            list(TarjetaStats.objects.values_list('category_id', 'work_area_id', 'count')),
+            [(None, None, 6)]
+        )
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='op', email='op@example.com', password='x')
+        TarjetaRoja.objects.create(
+            descripcion='=HYPERLINK("http://example.com","ver")', razon_motivo='-1+2',
+            resolution_notes='Sin fórmula', created_by=cls.user
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, format):
+        response = self.client.get(f'/api/tarjetas/export/?format={format}')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_csv_neutralizes_formulas(self):
+        content = self.export('csv').decode('utf-8')
+        self.assertTrue(content.startswith('\ufeffid,numero,'))
+        row = next(csv.DictReader(io.StringIO(content.lstrip('\ufeff'))))
+        self.assertEqual(row['descripcion'], '\'=HYPERLINK("http://example.com","ver")')
+        self.assertEqual(row['razon_motivo'], "'-1+2")
+        self.assertEqual(row['resolution_notes'], 'Sin fórmula')
+        # El import de la misma planilla recupera el texto original
+        self.assertEqual(_text(row['razon_motivo']), '-1+2')
+
+    def test_xlsx_stores_formulas_as_text(self):
+        from openpyxl import load_workbook
+
+        sheet = load_workbook(io.BytesIO(self.export('xlsx'))).active
+        headers = [cell.value for cell in sheet[1]]
+        cell = sheet.cell(row=2, column=headers.index('descripcion') + 1)
+        self.assertEqual(cell.data_type, 's')
+        self.assertEqual(cell.value, '\'=HYPERLINK("http://example.com","ver")')
+
+
+class FieldTrackerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='op', email='op@example.com', password='x')
+        cls.other = User.objects.create_user(username='op2', email='op2@example.com', password='x')
+
+    def test_instance_built_in_code_tracks_after_first_save(self):
+        tarjeta = TarjetaRoja(descripcion='Fuga', created_by=self.user)
+        tarjeta.status = 'pending_approval'
+        tarjeta.save()
+        # El alta no cuenta como cambio
+        self.assertEqual(tarjeta.saved_changes, {})
+
+        tarjeta.status = 'approved'
+        tarjeta.save()
+        self.assertEqual(tarjeta.saved_changes, {'status': ('pending_approval', 'approved')})
+
+    def test_loaded_instance_reports_changes_without_queries(self):
+        tarjeta = TarjetaRoja.objects.create(descripcion='Fuga', created_by=self.user)
+        tarjeta = TarjetaRoja.objects.get(pk=tarjeta.pk)
+        tarjeta.assigned_to = self.other
+        with self.assertNumQueries(0):
+            changes = tarjeta.tracked_changes()
+        self.assertEqual(changes, {'assigned_to_id': (None, self.other.id)})
+
+    def test_update_fields_only_counts_listed_fields(self):
+        tarjeta = TarjetaRoja.objects.create(descripcion='Fuga', created_by=self.user)
+        tarjeta.status = 'in_progress'
+        tarjeta.priority = 'critical'
+        tarjeta.save(update_fields=['status'])
+
+        self.assertEqual(tarjeta.saved_changes, {'status': ('open', 'in_progress')})
+        # La prioridad no se escribió: sigue pendiente contra el valor guardado
+        self.assertEqual(tarjeta.tracked_changes(), {'priority': ('medium', 'critical')})
+
+        tarjeta.save()
+        self.assertEqual(tarjeta.saved_changes, {'priority': ('medium', 'critical')})
+        self.assertEqual(tarjeta.tracked_changes(), {})
+
+    def test_update_fields_by_relation_name(self):
+        tarjeta = TarjetaRoja.objects.create(descripcion='Fuga', created_by=self.user)
+        tarjeta.assigned_to = self.other
+        tarjeta.status = 'in_progress'
+        tarjeta.save(update_fields=['assigned_to'])
+        self.assertEqual(tarjeta.saved_changes, {'assigned_to_id': (None, self.other.id)})
+        self.assertEqual(tarjeta.tracked_changes(), {'status': ('open', 'in_progress')})
+
+    def test_positional_update_fields(self):
+        tarjeta = TarjetaRoja.objects.create(descripcion='Fuga', created_by=self.user)
+        tarjeta.status = 'in_progress'
+        tarjeta.priority = 'critical'
+        tarjeta.save(False, False, None, ['status'])
+        self.assertEqual(tarjeta.saved_changes, {'status': ('open', 'in_progress')})
+        self.assertEqual(tarjeta.tracked_changes(), {'priority': ('medium', 'critical')})
+
+    def test_deferred_fields_are_not_loaded(self):
+        tarjeta = TarjetaRoja.objects.create(descripcion='Fuga', created_by=self.user)
+        tarjeta = TarjetaRoja.objects.only('id', 'resolution_notes').get(pk=tarjeta.pk)
+        tarjeta.resolution_notes = 'Reparado'
+        # Solo el UPDATE: no se leen status/priority/assigned_to diferidos
+        with self.assertNumQueries(1):
+            tarjeta.save(update_fields=['resolution_notes'])
+        self.assertEqual(tarjeta.saved_changes, {})
+
+    def test_refresh_from_db_moves_the_snapshot(self):
+        tarjeta = TarjetaRoja.objects.create(descripcion='Fuga', created_by=self.user)
+        TarjetaRoja.objects.filter(pk=tarjeta.pk).update(status='in_progress')
+        tarjeta.refresh_from_db()
+        self.assertEqual(tarjeta.tracked_changes(), {})
+        self.assertEqual(tarjeta.previous_value('status'), 'in_progress')
+
+
+class BulkNumberingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='op', email='op@example.com', password='x')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def bulk(self, items):
+        return self.client.post('/api/tarjetas/bulk/', {'tarjetas': items}, format='json')
+
+    def test_server_numbers_skip_client_numbers_of_the_same_batch(self):
+        year = timezone.localdate().year
+        # El cliente trae justo el próximo número de la serie
+        response = self.bulk([{'numero': f'TR-{year}-00001'}, {}, {}])
+
+        self.assertEqual(response.status_code, 201)
+        numeros = [result['numero'] for result in response.data['results']]
+        self.assertEqual(numeros, [f'TR-{year}-00001', f'TR-{year}-00002', f'TR-{year}-00003'])
+
+        # El siguiente lote sigue la serie sin chocar
+        response = self.bulk([{'numero': f'TR-{year}-00005'}, {}, {}])
+        self.assertEqual(response.status_code, 201)
+        numeros = [result['numero'] for result in response.data['results']]
+        self.assertEqual(numeros, [f'TR-{year}-00005', f'TR-{year}-00004', f'TR-{year}-00006'])
+
+
+# Recorrido completo de la tabla (no de un índice) según el motor
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on tarjetas_rojas\b'),
+    'sqlite': re.compile(r'\bSCAN (TABLE )?tarjetas_rojas\b(?! USING)'),
+}
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN de las consultas que arman el listado y el dashboard (con los mismos
+    builders que usan las vistas): ninguna recorre toda la tabla y cada una usa
+    el índice creado para ella. Los índices parciales solo se exigen en
+    PostgreSQL: SQLite sin ANALYZE elige por heurística y no usa un índice
+    parcial cuya condición depende de parámetros.
+    """
+    PAGE = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='op', email='op@example.com', password='x')
+
+    def explain(self, queryset):
+        if connection.vendor != 'postgresql':
+            return queryset.explain()
+        # Con pocas filas el planner elige Seq Scan aunque exista el índice:
+        # desactivarlo muestra si hay un índice utilizable, sin importar el volumen
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def assert_plan(self, queryset, index, partial=True):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f'Motor no soportado: {connection.vendor}')
+        plan = self.explain(queryset)
+        self.assertIsNone(pattern.search(plan), f'Recorre toda la tabla:\n{plan}')
+        if partial and connection.vendor != 'postgresql':
+            return
+        self.assertIn(index, plan)
+
+    def listing(self, **params):
+        request = RequestFactory().get('/api/tarjetas/', params)
+        request.user = self.user
+        return tarjetas_list_queryset(request)
+
+    def cursor_page(self, queryset):
+        # Página siguiente: incluye el filtro del cursor
+        last = TarjetaRoja(id=1000, created_at=timezone.now())
+        return cursor_page(queryset, encode_cursor(last), self.PAGE)
+
+    def test_list_first_page(self):
+        self.assert_plan(self.listing()[:self.PAGE], 'tarjetas_created_id_idx', partial=False)
+
+    def test_list_cursor_page(self):
+        self.assert_plan(self.cursor_page(self.listing()), 'tarjetas_created_id_idx', partial=False)
+
+    def test_list_by_status(self):
+        self.assert_plan(
+            self.cursor_page(self.listing(status='pending_approval')), 'tarjetas_status_idx'
+        )
+
+    def test_list_by_priority(self):
+        self.assert_plan(
+            self.cursor_page(self.listing(priority='critical')), 'tarjetas_priority_idx'
+        )
+
+    def test_list_assigned_to_me(self):
+        self.assert_plan(
+            self.cursor_page(self.listing(assigned_to='me')), 'tarjetas_assigned_idx'
+        )
+
+    def test_list_assigned_by_status(self):
+        self.assert_plan(
+            self.cursor_page(self.listing(assigned_to='me', status='in_progress')),
+            'tarjetas_assigned_idx'
+        )
+
+    def test_list_created_by_me(self):
+        self.assert_plan(
+            self.cursor_page(self.listing(created_by='me')), 'tarjetas_creator_idx'
+        )
+
+    def test_dashboard_overdue_count(self):
+        self.assert_plan(overdue_tarjetas(timezone.localdate()), 'tarjetas_overdue_idx')
+
+    def test_overdue_scan(self):
+        self.assert_plan(overdue_batch(timezone.localdate()), 'tarjetas_overdue_pending_idx')
@@ -0,0 +1,73 @@
+"""
+Seguimiento de cambios en memoria.
+
+Al instanciar (también al cargar desde la base) se guardan los valores de
+``tracked_fields``. Signals, historial y notificaciones comparan contra esa foto
+en lugar de volver a leer la fila: un post_save que consulta la base ya ve el
+valor nuevo y no detecta el cambio.
+
+Durante ``save()`` (incluidos pre_save y post_save) ``tracked_changes()``
+devuelve lo que se está guardando. Al terminar, el diff queda en
+``saved_changes`` y la foto pasa a ser lo guardado. Con ``update_fields`` solo
+cuentan los campos de la lista; los demás siguen pendientes. El alta no cuenta
+como cambio: ``saved_changes`` queda vacío.
+"""
+
+
+class FieldTrackerMixin:
+    # Nombres de atributo (attname): 'assigned_to_id', no 'assigned_to'
+    tracked_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.saved_changes = {}
+        self._reset_tracker()
+
+    def _reset_tracker(self, fields=None):
+        if not hasattr(self, '_tracked_initial'):
+            self._tracked_initial = {}
+        for name in self.tracked_fields if fields is None else fields:
+            # Un campo diferido (.only()) no se lee: eso costaría una consulta
+            if name in self.tracked_fields and name in self.__dict__:
+                self._tracked_initial[name] = self.__dict__[name]
+
+    def _tracked_names(self, update_fields):
+        if update_fields is None:
+            return self.tracked_fields
+        attnames = {self._meta.get_field(name).attname for name in update_fields}
+        return [name for name in self.tracked_fields if name in attnames]
+
+    def tracked_changes(self, update_fields=None):
+        """
+        {campo: (valor de la foto, valor actual)} de los campos seguidos que
+        cambiaron. No incluye los campos diferidos que no se cargaron.
+        """
+        initial = getattr(self, '_tracked_initial', {})
+        return {
+            name: (initial[name], self.__dict__[name])
+            for name in self._tracked_names(update_fields)
+            if name in initial and name in self.__dict__
+            and initial[name] != self.__dict__[name]
+        }
+
+    def previous_value(self, name):
+        """Valor cargado de un campo seguido (None si no se cargó)"""
+        return getattr(self, '_tracked_initial', {}).get(name)
+
+    # Misma firma que Model.save: update_fields también puede llegar posicional
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        adding = self._state.adding
+        super().save(force_insert=force_insert, force_update=force_update,
+                     using=using, update_fields=update_fields)
+        self.saved_changes = {} if adding else self.tracked_changes(update_fields)
+        self._reset_tracker(
+            None if update_fields is None else self._tracked_names(update_fields)
+        )
+
+    save.alters_data = True
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._reset_tracker(
+            None if fields is None else self._tracked_names(fields)
+        )
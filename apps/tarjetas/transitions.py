@@ -0,0 +1,119 @@
+"""
+Cambios de estado masivos de tarjetas rojas.
+
+Cada acción sólo aplica desde un estado concreto: las tarjetas se bloquean,
+se actualizan con un único UPDATE condicionado al estado actual y el
+historial, los comentarios y las notificaciones se insertan con
+``bulk_create``. Las tarjetas cuyo estado ya no coincide se informan como
+omitidas.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from apps.notifications.outbox import publish
+
+from .models import TarjetaRoja, TarjetaComment, TarjetaHistory
+from .stats import apply_stats_changes, stats_key
+
+MAX_BULK_TRANSITION = 1000
+
+# acción: (estado requerido, estado nuevo)
+TRANSITIONS = {
+    'approve': ('pending_approval', 'approved'),
+    'reject': ('pending_approval', 'rejected'),
+    'in_progress': ('approved', 'in_progress'),
+    'resolve': ('in_progress', 'resolved'),
+    'close': ('resolved', 'closed'),
+}
+
+# Campos necesarios para el bucket de estadísticas y las notificaciones
+LOCK_FIELDS = [
+    'id', 'status', 'priority', 'sector', 'category_id', 'work_area_id',
+    'created_at', 'is_active', 'created_by_id', 'assigned_to_id',
+]
+
+
+def transition_updates(action, user, now):
+    """Columnas que escribe el UPDATE, equivalentes a las del cambio individual"""
+    updates = {'status': TRANSITIONS[action][1], 'updated_at': now}
+    if action == 'approve':
+        updates.update(approved_by=user, approved_at=now)
+    elif action == 'resolve':
+        updates['fecha_final'] = timezone.localdate(now)
+    elif action == 'close':
+        updates['closed_at'] = now
+    return updates
+
+
+def bulk_transition(ids, action, user, comment=''):
+    """
+    Aplica ``action`` a las tarjetas indicadas.
+    Devuelve (ids actualizados, lista de omitidas con su estado actual).
+    """
+    from_status, to_status = TRANSITIONS[action]
+    ids = list(dict.fromkeys(ids))
+    now = timezone.now()
+
+    with transaction.atomic():
+        # Bloquea las filas candidatas hasta el commit (no-op en SQLite)
+        candidates = list(
+            TarjetaRoja.objects.select_for_update().filter(
+                id__in=ids, is_active=True, status=from_status
+            ).only(*LOCK_FIELDS).order_by('id')
+        )
+
+        if candidates:
+            # El filtro por estado evita pisar un cambio concurrente
+            written = TarjetaRoja.objects.filter(
+                id__in=[tarjeta.id for tarjeta in candidates], status=from_status
+            ).update(**transition_updates(action, user, now))
+            if written != len(candidates):
+                # Otra transacción movió alguna fila entre el SELECT y el UPDATE
+                # (backends sin bloqueo de filas): solo siguen las que escribimos
+                ours = set(TarjetaRoja.objects.filter(
+                    id__in=[tarjeta.id for tarjeta in candidates],
+                    status=to_status, updated_at=now
+                ).values_list('id', flat=True))
+                candidates = [tarjeta for tarjeta in candidates if tarjeta.id in ours]
+
+        if candidates:
+            changes = []
+            for tarjeta in candidates:
+                old_key = stats_key(tarjeta)
+                tarjeta.status = to_status
+                changes.append((old_key, stats_key(tarjeta)))
+            apply_stats_changes(changes)
+
+            TarjetaHistory.objects.bulk_create([
+                TarjetaHistory(
+                    tarjeta=tarjeta, user=user, action=action,
+                    old_value=from_status, new_value=to_status
+                )
+                for tarjeta in candidates
+            ], batch_size=1000)
+
+            comments = []
+            if comment:
+                comments = TarjetaComment.objects.bulk_create([
+                    TarjetaComment(tarjeta=tarjeta, user=user, comment=comment, is_internal=True)
+                    for tarjeta in candidates
+                ], batch_size=1000)
+
+            publish(
+                'tarjeta_status_changed',
+                tarjeta_ids=[tarjeta.id for tarjeta in candidates], status=to_status,
+                sender_id=user.id, comment_ids=[comment.id for comment in comments]
+            )
+
+    updated = {tarjeta.id for tarjeta in candidates}
+    remaining = [pk for pk in ids if pk not in updated]
+    current = dict(
+        TarjetaRoja.objects.filter(id__in=remaining, is_active=True).values_list('id', 'status')
+    ) if remaining else {}
+
+    skipped = [
+        {'id': pk, 'status': current[pk]} if pk in current
+        else {'id': pk, 'error': 'Tarjeta no encontrada'}
+        for pk in remaining
+    ]
+    return [tarjeta.id for tarjeta in candidates], skipped
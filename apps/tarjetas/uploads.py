@@ -0,0 +1,236 @@
+"""
+Subidas de imágenes de tarjetas: por partes (reanudables) y múltiples.
+
+Cada parte se escribe en un archivo temporal en el mismo volumen que los
+blobs, leyendo el cuerpo del request por bloques: la memoria usada no depende
+del tamaño del archivo. Al finalizar se calcula el SHA-256 leyendo el archivo
+del disco y se entrega al almacenamiento, que lo mueve sin copiarlo.
+
+``attach_images`` resuelve el caso opuesto: varias fotos en un solo request
+multipart, validadas y guardadas en paralelo e insertadas con un bulk_create.
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.validators import validate_image_file_extension
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from apps.media.services import acquire_blobs
+from apps.media.storage import blob_storage, hash_content
+
+from .models import TarjetaImage, TarjetaUpload
+
+PARTIAL_DIR = 'uploads/partial'
+MAX_UPLOAD_SIZE = 100 * 1024 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+READ_SIZE = 64 * 1024
+UPLOAD_TTL = timedelta(hours=24)
+
+MAX_IMAGES_PER_REQUEST = 10
+IMAGE_THREADS = 4
+
+
+class UploadError(Exception):
+    def __init__(self, message, status_code=400, **extra):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.extra = extra
+
+
+class SessionFile(File):
+    """Archivo ya en disco: el almacenamiento lo mueve y reutiliza el hash calculado"""
+    def __init__(self, path, name, sha256):
+        super().__init__(open(path, 'rb'), name)
+        self.path = path
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def partial_path(upload):
+    return blob_storage.path(f'{PARTIAL_DIR}/{upload.id}.part')
+
+
+def create_upload(tarjeta, user, filename, size, description='', sha256=''):
+    if size <= 0 or size > MAX_UPLOAD_SIZE:
+        raise UploadError(f'El tamaño debe estar entre 1 byte y {MAX_UPLOAD_SIZE} bytes')
+
+    upload = TarjetaUpload.objects.create(
+        tarjeta=tarjeta, user=user, filename=os.path.basename(filename)[:255],
+        size=size, description=description, sha256=sha256.lower()
+    )
+    path = partial_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return upload
+
+
+def append_chunk(upload_id, user, offset, length, stream, chunk_sha256=None):
+    """
+    Escribe ``length`` bytes de ``stream`` a partir de ``offset``. El offset debe
+    coincidir con lo recibido hasta ahora; si no, el cliente debe reanudar
+    desde ``received``.
+    """
+    if length <= 0 or length > MAX_CHUNK_SIZE:
+        raise UploadError(f'Cada parte debe tener entre 1 y {MAX_CHUNK_SIZE} bytes')
+
+    with transaction.atomic():
+        # Serializa las partes concurrentes de la misma subida
+        upload = _locked_upload(upload_id, user)
+
+        if offset != upload.received:
+            raise UploadError('Offset inválido', status_code=409, received=upload.received)
+        if offset + length > upload.size:
+            raise UploadError('La parte excede el tamaño declarado')
+
+        digest = hashlib.sha256()
+        written = 0
+        with open(partial_path(upload), 'r+b') as target:
+            target.seek(offset)
+            while written < length:
+                block = stream.read(min(READ_SIZE, length - written))
+                if not block:
+                    break
+                digest.update(block)
+                target.write(block)
+                written += len(block)
+            # Descarta restos de un intento anterior que no llegó a confirmarse
+            target.truncate()
+
+        if written != length:
+            raise UploadError('La parte llegó incompleta', received=upload.received)
+        if chunk_sha256 and digest.hexdigest() != chunk_sha256.lower():
+            raise UploadError('Checksum de la parte inválido', received=upload.received)
+
+        upload.received = offset + length
+        upload.save(update_fields=['received', 'updated_at'])
+        return upload
+
+
+def complete_upload(upload_id, user):
+    """Convierte la subida completa en una TarjetaImage"""
+    with transaction.atomic():
+        upload = _locked_upload(upload_id, user)
+        if upload.received != upload.size:
+            raise UploadError('La subida está incompleta', status_code=409, received=upload.received)
+
+        path = partial_path(upload)
+        digest = hashlib.sha256()
+        with open(path, 'rb') as source:
+            for block in iter(lambda: source.read(READ_SIZE), b''):
+                digest.update(block)
+        sha256 = digest.hexdigest()
+
+        if upload.sha256 and upload.sha256 != sha256:
+            raise UploadError('El checksum del archivo no coincide', sha256=sha256)
+
+        try:
+            with Image.open(path) as image:
+                image.verify()
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+            raise UploadError('El archivo no es una imagen válida')
+
+        content = SessionFile(path, upload.filename, sha256)
+        try:
+            image = TarjetaImage(
+                tarjeta_id=upload.tarjeta_id, uploaded_by=user, description=upload.description
+            )
+            image.image.save(upload.filename, content, save=False)
+            image.save()
+        finally:
+            content.close()
+
+        upload.delete()
+
+    # Si el blob ya existía el archivo parcial no se movió
+    if os.path.exists(path):
+        os.remove(path)
+    return image
+
+
+def discard_upload(upload_id, user):
+    with transaction.atomic():
+        upload = _locked_upload(upload_id, user)
+        path = partial_path(upload)
+        upload.delete()
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def purge_expired_uploads(ttl=UPLOAD_TTL):
+    """Borra las subidas abandonadas; devuelve cuántas se eliminaron"""
+    expired = list(TarjetaUpload.objects.filter(updated_at__lt=timezone.now() - ttl))
+    for upload in expired:
+        path = partial_path(upload)
+        if os.path.exists(path):
+            os.remove(path)
+    TarjetaUpload.objects.filter(id__in=[upload.id for upload in expired]).delete()
+    return len(expired)
+
+
+def _store_image(upload):
+    """
+    Valida y guarda una foto (corre en un hilo: Pillow y hashlib liberan el GIL
+    en los tramos pesados). Devuelve (nombre_en_storage, None) o (None, errores).
+    """
+    try:
+        validate_image_file_extension(upload)
+        with Image.open(upload) as image:
+            image.verify()
+    except ValidationError as exc:
+        return None, exc.messages
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        return None, ['El archivo no es una imagen válida']
+
+    # El hash calculado aquí lo reutiliza ContentAddressedStorage
+    upload.sha256 = hash_content(upload)
+    field = TarjetaImage._meta.get_field('image')
+    name = field.generate_filename(None, upload.name)
+    return field.storage.save(name, upload, max_length=field.max_length), None
+
+
+def attach_images(tarjeta, user, files, descriptions=()):
+    """
+    Adjunta varias fotos a una tarjeta. Devuelve un resultado por archivo y las
+    TarjetaImage creadas (para encolar su procesamiento).
+    """
+    descriptions = list(descriptions)
+    with ThreadPoolExecutor(max_workers=min(IMAGE_THREADS, len(files))) as pool:
+        stored = list(pool.map(_store_image, files))
+
+    pending = []
+    results = [None] * len(files)
+    for index, (name, errors) in enumerate(stored):
+        if errors:
+            results[index] = {'index': index, 'status': 'error', 'errors': {'image': errors}}
+            continue
+        description = descriptions[index] if index < len(descriptions) else ''
+        pending.append((index, TarjetaImage(
+            tarjeta=tarjeta, uploaded_by=user, image=name, description=description[:200]
+        )))
+
+    images = []
+    if pending:
+        with transaction.atomic():
+            images = TarjetaImage.objects.bulk_create([image for _, image in pending])
+            # bulk_create no dispara los signals de apps.media
+            acquire_blobs([image.image.name for image in images])
+
+    for (index, _), image in zip(pending, images):
+        results[index] = {'index': index, 'status': 'created', 'image': image}
+    return results, images
+
+
+def _locked_upload(upload_id, user):
+    try:
+        return TarjetaUpload.objects.select_for_update().get(id=upload_id, user=user)
+    except TarjetaUpload.DoesNotExist:
+        raise UploadError('Subida no encontrada', status_code=404)
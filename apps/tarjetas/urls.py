@@ -3,9 +3,19 @@ from . import views
 
 urlpatterns = [
     path('', views.tarjetas_list, name='tarjetas_list'),
+    path('bulk/', views.tarjetas_bulk_create, name='tarjetas_bulk_create'),
+    path('export/', views.tarjetas_export, name='tarjetas_export'),
+    path('import/', views.tarjetas_import, name='tarjetas_import'),
+    path('bulk-transition/', views.tarjetas_bulk_transition, name='tarjetas_bulk_transition'),
     path('<int:pk>/', views.tarjeta_detail, name='tarjeta_detail'),
+    path('<int:pk>/comments/', views.tarjeta_comments, name='tarjeta_comments'),
+    path('<int:pk>/history/', views.tarjeta_history, name='tarjeta_history'),
     path('<int:pk>/approve/', views.approve_tarjeta, name='approve_tarjeta'),
     path('<int:pk>/upload-image/', views.upload_image, name='upload_image'),
+    path('<int:pk>/uploads/', views.create_tarjeta_upload, name='create_tarjeta_upload'),
+    path('uploads/<uuid:upload_id>/', views.tarjeta_upload_detail, name='tarjeta_upload_detail'),
+    path('uploads/<uuid:upload_id>/complete/', views.complete_tarjeta_upload,
+         name='complete_tarjeta_upload'),
     path('<int:pk>/add-comment/', views.add_comment, name='add_comment'),
     path('dashboard/stats/', views.dashboard_stats, name='dashboard_stats'),
 ]
\ No newline at end of file
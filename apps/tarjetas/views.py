@@ -1,78 +1,236 @@
+import re
+
 from rest_framework import status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Q, prefetch_related_objects
 from django.utils import timezone
-from .models import TarjetaRoja, TarjetaImage, TarjetaComment, TarjetaHistory
+from .models import TarjetaRoja, TarjetaImage, TarjetaComment, TarjetaHistory, TarjetaUpload
 from .serializers import (
     TarjetaRojaListSerializer, TarjetaRojaDetailSerializer, 
     TarjetaRojaCreateSerializer, TarjetaRojaUpdateSerializer,
-    TarjetaImageSerializer, TarjetaCommentSerializer
+    TarjetaImageSerializer, TarjetaCommentSerializer, TarjetaHistorySerializer,
+    RECENT_ENTRIES, build_included, query_param_set
+)
+from apps.categories.models import WorkArea, attach_tarjeta_counts
+from .bulk import MAX_BULK_ITEMS, bulk_create_tarjetas
+from .export import EXPORTERS, CSVRenderer, NDJSONRenderer, XLSXRenderer
+from .importer import ImportFormatError, import_tarjetas
+from .conditional import (
+    as_of_today, embedded_querysets, last_updated, make_etag, not_modified, related_count,
+    set_validators, tarjeta_fingerprint
+)
+from .pagination import InvalidCursor, page_size, paginate_by_cursor
+from .search import is_ranked, search_tarjetas
+from .stats import apply_stats_changes, get_dashboard_stats, stats_key
+from .tasks import process_tarjeta_image
+from .transitions import MAX_BULK_TRANSITION, TRANSITIONS, bulk_transition
+from .uploads import (
+    MAX_CHUNK_SIZE, MAX_IMAGES_PER_REQUEST, UploadError, append_chunk, attach_images,
+    complete_upload, create_upload, discard_upload
 )
 
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+# ?age=: rangos de días abierta (inclusive; None = sin límite)
+AGE_BUCKETS = {
+    '0-7': (0, 7),
+    '8-30': (8, 30),
+    '31-90': (31, 90),
+    '90+': (91, None),
+}
+
+# ?ordering=: nombre público -> campo o anotación
+ORDERING_FIELDS = {
+    'days_open': 'sla_days_open',
+    'created_at': 'created_at',
+    'fecha_final': 'fecha_final',
+}
+
+# Campo seguido -> sufijo de la acción en el historial ('updated_assigned_to', ...)
+HISTORY_FIELDS = {
+    'status': 'status',
+    'assigned_to_id': 'assigned_to',
+    'priority': 'priority',
+}
+
+def filter_tarjetas(request, queryset):
+    """Aplica los filtros de listado comunes a partir de los query params"""
+    status_filter = request.GET.get('status')
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+    
+    sector_filter = request.GET.get('sector')
+    if sector_filter:
+        queryset = queryset.filter(sector__icontains=sector_filter)
+    
+    priority_filter = request.GET.get('priority')
+    if priority_filter:
+        queryset = queryset.filter(priority=priority_filter)
+    
+    assigned_to_filter = request.GET.get('assigned_to')
+    if assigned_to_filter:
+        if assigned_to_filter == 'me':
+            queryset = queryset.filter(assigned_to=request.user)
+        else:
+            queryset = queryset.filter(assigned_to_id=assigned_to_filter)
+    
+    created_by_filter = request.GET.get('created_by')
+    if created_by_filter:
+        if created_by_filter == 'me':
+            queryset = queryset.filter(created_by=request.user)
+        else:
+            queryset = queryset.filter(created_by_id=created_by_filter)
+    
+    overdue_filter = request.GET.get('overdue')
+    if overdue_filter in ('true', 'false'):
+        queryset = queryset.with_sla().filter(sla_overdue=overdue_filter == 'true')
+    
+    age_condition = Q()
+    for bucket in query_param_set(request, 'age') & AGE_BUCKETS.keys():
+        low, high = AGE_BUCKETS[bucket]
+        condition = Q(sla_days_open__gte=low)
+        if high is not None:
+            condition &= Q(sla_days_open__lte=high)
+        age_condition |= condition
+    if age_condition:
+        queryset = queryset.with_sla().filter(age_condition)
+    
+    search = request.GET.get('search')
+    if search:
+        queryset = search_tarjetas(queryset, search)
+    
+    return queryset
+
+def ordering_param(request):
+    """Convierte ?ordering= en campos de order_by; None si no se pidió, ValueError si es inválido"""
+    ordering = request.GET.get('ordering')
+    if not ordering:
+        return None
+    field = ORDERING_FIELDS.get(ordering.lstrip('-'))
+    if field is None:
+        raise ValueError(ordering)
+    return (f'-{field}' if ordering.startswith('-') else field, '-id')
+
+def prepare_expanded(tarjetas, request):
+    """
+    Precarga lo que necesitan los serializers completos de ``expand=`` para que
+    el costo en consultas no dependa de la cantidad de filas.
+    """
+    if 'category' in query_param_set(request, 'expand'):
+        categories = [tarjeta.category for tarjeta in tarjetas if tarjeta.category_id]
+        attach_tarjeta_counts(categories)
+        prefetch_related_objects(
+            categories,
+            'created_by',
+            Prefetch('work_areas', queryset=WorkArea.objects.select_related('responsible'))
+        )
+    if 'work_area' in query_param_set(request, 'expand'):
+        work_areas = [tarjeta.work_area for tarjeta in tarjetas if tarjeta.work_area_id]
+        prefetch_related_objects(work_areas, 'responsible')
+    return tarjetas
+
+def tarjetas_list_queryset(request):
+    """Queryset del listado con sus filtros, antes de ordenar y paginar"""
+    queryset = TarjetaRoja.objects.filter(is_active=True).with_sla().select_related(
+        'created_by', 'assigned_to', 'approved_by', 'category', 'work_area'
+    ).prefetch_related(
+        Prefetch(
+            'images',
+            queryset=TarjetaImage.objects.filter(processing_status='ready').order_by(
+                'uploaded_at', 'id'
+            )[:1],
+            to_attr='cover_images'
+        )
+    )
+    return filter_tarjetas(request, queryset)
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def tarjetas_list(request):
     if request.method == 'GET':
-        queryset = TarjetaRoja.objects.filter(is_active=True).select_related(
-            'created_by', 'assigned_to', 'approved_by', 'category', 'work_area'
-        )
-        
-        # Filtros
-        status_filter = request.GET.get('status')
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
+        queryset = tarjetas_list_queryset(request)
         
-        sector_filter = request.GET.get('sector')
-        if sector_filter:
-            queryset = queryset.filter(sector__icontains=sector_filter)
+        try:
+            ordering = ordering_param(request)
+        except ValueError:
+            return Response({
+                'error': f'Orden inválido. Opciones: {", ".join(ORDERING_FIELDS)} (prefijo - para descendente)'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        priority_filter = request.GET.get('priority')
-        if priority_filter:
-            queryset = queryset.filter(priority=priority_filter)
+        try:
+            per_page = page_size(request)
+            page = int(request.GET.get('page', 1))
+            if page < 1:
+                raise ValueError(page)
+        except ValueError:
+            return Response({
+                'error': 'per_page y page deben ser enteros positivos'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        assigned_to_filter = request.GET.get('assigned_to')
-        if assigned_to_filter:
-            if assigned_to_filter == 'me':
-                queryset = queryset.filter(assigned_to=request.user)
-            else:
-                queryset = queryset.filter(assigned_to_id=assigned_to_filter)
+        today, last_modified = as_of_today(
+            last_updated(TarjetaRoja.objects.all(), *embedded_querysets())
+        )
         
-        created_by_filter = request.GET.get('created_by')
-        if created_by_filter:
-            if created_by_filter == 'me':
-                queryset = queryset.filter(created_by=request.user)
-            else:
-                queryset = queryset.filter(created_by_id=created_by_filter)
+        # Paginación por cursor (opcional): sin COUNT y con costo constante por página
+        cursor = request.GET.get('cursor')
+        if cursor is not None or request.GET.get('pagination') == 'cursor':
+            if ordering:
+                return Response({
+                    'error': 'ordering no se puede combinar con la paginación por cursor'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            etag = make_etag(request, last_modified, *today)
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+            
+            try:
+                tarjetas, next_cursor = paginate_by_cursor(queryset, cursor, per_page)
+            except InvalidCursor:
+                return Response({'error': 'Cursor inválido'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            prepare_expanded(tarjetas, request)
+            serializer = TarjetaRojaListSerializer(tarjetas, many=True, context={'request': request})
+            
+            return set_validators(Response({
+                'results': serializer.data,
+                'included': build_included(tarjetas, request),
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }), etag, last_modified)
         
-        search = request.GET.get('search')
-        if search:
-            queryset = queryset.filter(
-                Q(numero__icontains=search) |
-                Q(descripcion__icontains=search) |
-                Q(sector__icontains=search) |
-                Q(quien_lo_hizo__icontains=search)
-            )
+        # Con búsqueda y sin orden explícito, ordenar por relevancia
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        elif is_ranked(queryset):
+            queryset = queryset.order_by('-search_rank', '-created_at')
         
         # Paginación básica
-        page = int(request.GET.get('page', 1))
-        per_page = int(request.GET.get('per_page', 20))
         start = (page - 1) * per_page
         end = start + per_page
         
         total_count = queryset.count()
-        tarjetas = queryset[start:end]
         
-        serializer = TarjetaRojaListSerializer(tarjetas, many=True)
+        etag = make_etag(request, last_modified, total_count, *today)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
         
-        return Response({
+        tarjetas = prepare_expanded(list(queryset[start:end]), request)
+        
+        serializer = TarjetaRojaListSerializer(tarjetas, many=True, context={'request': request})
+        
+        return set_validators(Response({
             'results': serializer.data,
+            'included': build_included(tarjetas, request),
             'count': total_count,
             'page': page,
             'per_page': per_page,
             'total_pages': (total_count + per_page - 1) // per_page
-        })
+        }), etag, last_modified)
     
     elif request.method == 'POST':
         serializer = TarjetaRojaCreateSerializer(data=request.data, context={'request': request})
@@ -88,26 +246,136 @@ def tarjetas_list(request):
             )
             
             return Response(
-                TarjetaRojaDetailSerializer(tarjeta).data, 
+                TarjetaRojaDetailSerializer(tarjeta, context={'request': request}).data, 
                 status=status.HTTP_201_CREATED
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def tarjetas_bulk_create(request):
+    """Alta de un lote de tarjetas (sincronización de tablets de planta)"""
+    items = request.data.get('tarjetas') if isinstance(request.data, dict) else request.data
+    
+    if not isinstance(items, list) or not items:
+        return Response({
+            'error': 'Se requiere una lista de tarjetas'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if len(items) > MAX_BULK_ITEMS:
+        return Response({
+            'error': f'El lote no puede superar {MAX_BULK_ITEMS} tarjetas'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        results = bulk_create_tarjetas(items, request.user)
+    except IntegrityError:
+        # Otro cliente registró alguno de los números mientras se validaba el lote
+        return Response({
+            'error': 'Conflicto de números de tarjeta, reintente el lote'
+        }, status=status.HTTP_409_CONFLICT)
+    
+    created = sum(1 for result in results if result['status'] == 'created')
+    
+    return Response({
+        'created': created,
+        'failed': len(results) - created,
+        'results': results
+    }, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([CSVRenderer, NDJSONRenderer, XLSXRenderer])
+def tarjetas_export(request):
+    """
+    Exporta las tarjetas que cumplen los filtros del listado. El formato se
+    elige con ``?format=csv|ndjson|xlsx`` o el header Accept (CSV por defecto).
+    """
+    queryset = filter_tarjetas(request, TarjetaRoja.objects.filter(is_active=True))
+    return EXPORTERS[request.accepted_renderer.format](queryset)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def tarjetas_import(request):
+    """Importa un registro histórico (CSV o XLSX) subido como ``file``"""
+    if not request.user.is_admin():
+        return Response({
+            'error': 'Solo los administradores pueden importar tarjetas'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    upload = request.FILES.get('file')
+    if not upload:
+        return Response({'error': 'Debe enviar un archivo'}, status=status.HTTP_400_BAD_REQUEST)
+
+    dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true')
+    try:
+        summary = import_tarjetas(
+            upload, upload.name, request.user,
+            encoding=request.data.get('encoding') or 'utf-8-sig',
+            dry_run=dry_run
+        )
+    except ImportFormatError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    except (LookupError, UnicodeDecodeError):
+        return Response({
+            'error': 'No se pudo leer el archivo con la codificación indicada'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    summary['dry_run'] = dry_run
+    if summary['failed'] and not summary['created']:
+        response_status = status.HTTP_400_BAD_REQUEST
+    elif summary['created'] and not dry_run:
+        response_status = status.HTTP_201_CREATED
+    else:
+        response_status = status.HTTP_200_OK
+    return Response(summary, status=response_status)
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def tarjeta_detail(request, pk):
+    if request.method == 'GET':
+        # Huella liviana antes del prefetch: un cliente al día recibe 304
+        fingerprint = tarjeta_fingerprint(pk)
+        if fingerprint is None:
+            return Response({'error': 'Tarjeta no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        
+        parts, last_modified = fingerprint
+        etag = make_etag(request, *parts)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+    
     try:
-        tarjeta = TarjetaRoja.objects.select_related(
+        # Solo las últimas entradas de comentarios e historial, más los totales
+        tarjeta = TarjetaRoja.objects.with_sla().select_related(
             'created_by', 'assigned_to', 'approved_by', 'category', 'work_area'
         ).prefetch_related(
-            'images', 'comments__user', 'history__user'
+            'images__uploaded_by',
+            Prefetch(
+                'comments',
+                queryset=TarjetaComment.objects.select_related('user').order_by(
+                    '-created_at', '-id'
+                )[:RECENT_ENTRIES],
+                to_attr='recent_comments'
+            ),
+            Prefetch(
+                'history',
+                queryset=TarjetaHistory.objects.select_related('user').order_by(
+                    '-timestamp', '-id'
+                )[:RECENT_ENTRIES],
+                to_attr='recent_history'
+            )
+        ).annotate(
+            comments_total=related_count(TarjetaComment),
+            history_total=related_count(TarjetaHistory)
         ).get(pk=pk, is_active=True)
     except TarjetaRoja.DoesNotExist:
         return Response({'error': 'Tarjeta no encontrada'}, status=status.HTTP_404_NOT_FOUND)
     
     if request.method == 'GET':
-        serializer = TarjetaRojaDetailSerializer(tarjeta)
-        return Response(serializer.data)
+        prepare_expanded([tarjeta], request)
+        serializer = TarjetaRojaDetailSerializer(tarjeta, context={'request': request})
+        return set_validators(Response(serializer.data), etag, last_modified)
     
     elif request.method == 'PUT':
         if not tarjeta.can_be_edited_by(request.user):
@@ -115,36 +383,26 @@ def tarjeta_detail(request, pk):
                 'error': 'No tienes permisos para editar esta tarjeta'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        # Guardar valores anteriores para el historial
-        old_values = {
-            'status': tarjeta.status,
-            'assigned_to': tarjeta.assigned_to_id,
-            'priority': tarjeta.priority
-        }
-        
         serializer = TarjetaRojaUpdateSerializer(tarjeta, data=request.data, partial=True)
         if serializer.is_valid():
             updated_tarjeta = serializer.save()
             
             # Crear entradas en el historial para cambios importantes
-            for field in ['status', 'assigned_to', 'priority']:
-                if field in request.data:
-                    old_value = old_values[field]
-                    if field == 'assigned_to':
-                        new_value = request.data.get('assigned_to_id')
-                    else:
-                        new_value = getattr(updated_tarjeta, field)
-                    
-                    if old_value != new_value:
-                        TarjetaHistory.objects.create(
-                            tarjeta=updated_tarjeta,
-                            user=request.user,
-                            action=f'updated_{field}',
-                            old_value=str(old_value) if old_value else '',
-                            new_value=str(new_value) if new_value else ''
-                        )
+            # (saved_changes: diff en memoria del último save, ver tracking.py)
+            TarjetaHistory.objects.bulk_create([
+                TarjetaHistory(
+                    tarjeta=updated_tarjeta,
+                    user=request.user,
+                    action=f'updated_{HISTORY_FIELDS[field]}',
+                    old_value=str(old_value) if old_value else '',
+                    new_value=str(new_value) if new_value else ''
+                )
+                for field, (old_value, new_value) in updated_tarjeta.saved_changes.items()
+            ])
             
-            return Response(TarjetaRojaDetailSerializer(updated_tarjeta).data)
+            return Response(
+                TarjetaRojaDetailSerializer(updated_tarjeta, context={'request': request}).data
+            )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
@@ -153,17 +411,59 @@ def tarjeta_detail(request, pk):
                 'error': 'No tienes permisos para eliminar esta tarjeta'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        tarjeta.is_active = False
-        tarjeta.save()
-        
-        TarjetaHistory.objects.create(
-            tarjeta=tarjeta,
-            user=request.user,
-            action='deleted'
-        )
+        with transaction.atomic():
+            old_key = stats_key(tarjeta)
+            tarjeta.is_active = False
+            tarjeta.save()
+            apply_stats_changes([(old_key, None)])
+            
+            TarjetaHistory.objects.create(
+                tarjeta=tarjeta,
+                user=request.user,
+                action='deleted'
+            )
         
         return Response({'message': 'Tarjeta eliminada exitosamente'})
 
+def paginate_subresource(request, pk, queryset, serializer_class, field):
+    """Página por cursor de comentarios o historial de una tarjeta, del más nuevo al más viejo"""
+    if not TarjetaRoja.objects.filter(pk=pk, is_active=True).exists():
+        return Response({'error': 'Tarjeta no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        per_page = page_size(request)
+    except ValueError:
+        return Response({'error': 'per_page debe ser un entero positivo'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        items, next_cursor = paginate_by_cursor(
+            queryset.filter(tarjeta_id=pk), request.GET.get('cursor'), per_page, field
+        )
+    except InvalidCursor:
+        return Response({'error': 'Cursor inválido'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'results': serializer_class(items, many=True).data,
+        'next_cursor': next_cursor,
+        'per_page': per_page
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def tarjeta_comments(request, pk):
+    return paginate_subresource(
+        request, pk, TarjetaComment.objects.select_related('user'),
+        TarjetaCommentSerializer, 'created_at'
+    )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def tarjeta_history(request, pk):
+    return paginate_subresource(
+        request, pk, TarjetaHistory.objects.select_related('user'),
+        TarjetaHistorySerializer, 'timestamp'
+    )
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def approve_tarjeta(request, pk):
@@ -178,6 +478,7 @@ def approve_tarjeta(request, pk):
         }, status=status.HTTP_403_FORBIDDEN)
     
     action = request.data.get('action')  # 'approve' or 'reject'
+    old_key = stats_key(tarjeta)
     
     if action == 'approve':
         tarjeta.status = 'approved'
@@ -190,28 +491,70 @@ def approve_tarjeta(request, pk):
     else:
         return Response({'error': 'Acción inválida'}, status=status.HTTP_400_BAD_REQUEST)
     
-    tarjeta.save()
-    
-    # Agregar comentario si se proporciona
-    comment_text = request.data.get('comment')
-    if comment_text:
-        TarjetaComment.objects.create(
+    with transaction.atomic():
+        tarjeta.save()
+        apply_stats_changes([(old_key, stats_key(tarjeta))])
+        
+        # Agregar comentario si se proporciona
+        comment_text = request.data.get('comment')
+        if comment_text:
+            TarjetaComment.objects.create(
+                tarjeta=tarjeta,
+                user=request.user,
+                comment=comment_text,
+                is_internal=True
+            )
+        
+        TarjetaHistory.objects.create(
             tarjeta=tarjeta,
             user=request.user,
-            comment=comment_text,
-            is_internal=True
+            action=action,
+            new_value=tarjeta.status
         )
     
-    TarjetaHistory.objects.create(
-        tarjeta=tarjeta,
-        user=request.user,
-        action=action,
-        new_value=tarjeta.status
+    return Response({
+        'message': message,
+        'tarjeta': TarjetaRojaDetailSerializer(tarjeta, context={'request': request}).data
+    })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def tarjetas_bulk_transition(request):
+    """Cambio de estado de varias tarjetas en una sola operación (supervisores)"""
+    if not request.user.can_approve_tarjetas():
+        return Response({
+            'error': 'No tienes permisos para cambiar el estado de tarjetas en lote'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    action = request.data.get('action')
+    if action not in TRANSITIONS:
+        return Response({
+            'error': f'Acción inválida. Opciones: {", ".join(TRANSITIONS)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    ids = request.data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        return Response({'error': 'Se requiere una lista de ids'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if len(ids) > MAX_BULK_TRANSITION:
+        return Response({
+            'error': f'El lote no puede superar {MAX_BULK_TRANSITION} tarjetas'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        ids = [int(pk) for pk in ids]
+    except (TypeError, ValueError):
+        return Response({'error': 'Los ids deben ser enteros'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    updated, skipped = bulk_transition(
+        ids, action, request.user, comment=request.data.get('comment') or ''
     )
     
     return Response({
-        'message': message,
-        'tarjeta': TarjetaRojaDetailSerializer(tarjeta).data
+        'action': action,
+        'status': TRANSITIONS[action][1],
+        'updated': updated,
+        'skipped': skipped
     })
 
 @api_view(['POST'])
@@ -222,13 +565,148 @@ def upload_image(request, pk):
     except TarjetaRoja.DoesNotExist:
         return Response({'error': 'Tarjeta no encontrada'}, status=status.HTTP_404_NOT_FOUND)
     
-    serializer = TarjetaImageSerializer(data=request.data)
+    # Varias fotos en un request: campo 'images' repetido (y 'descriptions' en el mismo orden)
+    files = request.FILES.getlist('images')
+    if files:
+        return upload_images(request, tarjeta, files)
+    
+    serializer = TarjetaImageSerializer(data=request.data, context={'request': request})
     if serializer.is_valid():
         image = serializer.save(tarjeta=tarjeta, uploaded_by=request.user)
-        return Response(TarjetaImageSerializer(image).data, status=status.HTTP_201_CREATED)
+        # EXIF, recodificación y miniaturas se hacen en segundo plano
+        transaction.on_commit(lambda: process_tarjeta_image.enqueue(image.id))
+        return Response(
+            TarjetaImageSerializer(image, context={'request': request}).data,
+            status=status.HTTP_201_CREATED
+        )
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+def upload_images(request, tarjeta, files):
+    if len(files) > MAX_IMAGES_PER_REQUEST:
+        return Response({
+            'error': f'No se pueden subir más de {MAX_IMAGES_PER_REQUEST} imágenes por request'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    results, images = attach_images(
+        tarjeta, request.user, files, request.data.getlist('descriptions')
+    )
+    transaction.on_commit(lambda: [process_tarjeta_image.enqueue(image.id) for image in images])
+    
+    for result in results:
+        if result['status'] == 'created':
+            result['image'] = TarjetaImageSerializer(result['image'], context={'request': request}).data
+    
+    return Response({
+        'created': len(images),
+        'failed': len(results) - len(images),
+        'results': results
+    }, status=status.HTTP_201_CREATED if images else status.HTTP_400_BAD_REQUEST)
+
+def upload_response(upload):
+    return {
+        'id': str(upload.id),
+        'filename': upload.filename,
+        'size': upload.size,
+        'received': upload.received,
+        'max_chunk_size': MAX_CHUNK_SIZE,
+    }
+
+def upload_error(exc):
+    return Response({'error': exc.message, **exc.extra}, status=exc.status_code)
+
+def parse_chunk_range(request):
+    """
+    (offset, largo) de la parte: ``Content-Range: bytes 0-1048575/5242880`` o
+    ``?offset=`` con el largo de Content-Length.
+    """
+    length = int(request.META.get('CONTENT_LENGTH') or 0)
+    match = CONTENT_RANGE_RE.match(request.META.get('HTTP_CONTENT_RANGE', ''))
+    if match:
+        start, end = int(match.group(1)), int(match.group(2))
+        if end - start + 1 != length:
+            raise ValueError('Content-Range no coincide con Content-Length')
+        return start, length
+    return int(request.GET['offset']), length
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_tarjeta_upload(request, pk):
+    """Inicia una subida por partes de una imagen"""
+    try:
+        tarjeta = TarjetaRoja.objects.get(pk=pk, is_active=True)
+    except TarjetaRoja.DoesNotExist:
+        return Response({'error': 'Tarjeta no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        size = int(request.data.get('size'))
+    except (TypeError, ValueError):
+        return Response({'error': 'Se requiere el tamaño del archivo'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    filename = request.data.get('filename')
+    if not filename:
+        return Response({'error': 'Se requiere el nombre del archivo'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        upload = create_upload(
+            tarjeta, request.user, filename, size,
+            description=request.data.get('description', ''),
+            sha256=request.data.get('sha256', '')
+        )
+    except UploadError as exc:
+        return upload_error(exc)
+    
+    return Response(upload_response(upload), status=status.HTTP_201_CREATED)
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def tarjeta_upload_detail(request, upload_id):
+    if request.method == 'GET':
+        # Para reanudar: el cliente continúa desde 'received'
+        upload = TarjetaUpload.objects.filter(id=upload_id, user=request.user).first()
+        if upload is None:
+            return Response({'error': 'Subida no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(upload_response(upload))
+    
+    elif request.method == 'PUT':
+        try:
+            offset, length = parse_chunk_range(request)
+        except (KeyError, ValueError):
+            return Response({
+                'error': 'Se requiere Content-Range u offset y Content-Length'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # El cuerpo se lee por bloques desde el stream, sin pasar por request.data
+        try:
+            upload = append_chunk(
+                upload_id, request.user, offset, length, request.stream,
+                chunk_sha256=request.META.get('HTTP_X_CHUNK_SHA256')
+            )
+        except UploadError as exc:
+            return upload_error(exc)
+        return Response(upload_response(upload))
+    
+    elif request.method == 'DELETE':
+        try:
+            discard_upload(upload_id, request.user)
+        except UploadError as exc:
+            return upload_error(exc)
+        return Response({'message': 'Subida cancelada'})
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def complete_tarjeta_upload(request, upload_id):
+    try:
+        image = complete_upload(upload_id, request.user)
+    except UploadError as exc:
+        return upload_error(exc)
+    
+    transaction.on_commit(lambda: process_tarjeta_image.enqueue(image.id))
+    return Response(
+        TarjetaImageSerializer(image, context={'request': request}).data,
+        status=status.HTTP_201_CREATED
+    )
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def add_comment(request, pk):
@@ -239,7 +717,9 @@ def add_comment(request, pk):
     
     serializer = TarjetaCommentSerializer(data=request.data)
     if serializer.is_valid():
-        comment = serializer.save(tarjeta=tarjeta, user=request.user)
+        # El evento de notificación se registra en la misma transacción
+        with transaction.atomic():
+            comment = serializer.save(tarjeta=tarjeta, user=request.user)
         return Response(TarjetaCommentSerializer(comment).data, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -252,39 +732,4 @@ def dashboard_stats(request):
             'error': 'No tienes permisos para ver estadísticas'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    # Estadísticas generales
-    total_tarjetas = TarjetaRoja.objects.filter(is_active=True).count()
-    open_tarjetas = TarjetaRoja.objects.filter(is_active=True, status='open').count()
-    pending_approval = TarjetaRoja.objects.filter(is_active=True, status='pending_approval').count()
-    in_progress = TarjetaRoja.objects.filter(is_active=True, status='in_progress').count()
-    resolved = TarjetaRoja.objects.filter(is_active=True, status='resolved').count()
-    overdue = TarjetaRoja.objects.filter(is_active=True).filter(
-        fecha_final__lt=timezone.now().date(),
-        status__in=['open', 'in_progress', 'approved']
-    ).count()
-    
-    # Estadísticas por prioridad
-    priority_stats = {}
-    for priority, _ in TarjetaRoja.PRIORITY_CHOICES:
-        priority_stats[priority] = TarjetaRoja.objects.filter(
-            is_active=True, priority=priority
-        ).count()
-    
-    # Estadísticas por sector
-    from django.db.models import Count
-    sector_stats = TarjetaRoja.objects.filter(is_active=True).values('sector').annotate(
-        total=Count('id')
-    ).order_by('-total')[:10]
-    
-    return Response({
-        'total_tarjetas': total_tarjetas,
-        'status_stats': {
-            'open': open_tarjetas,
-            'pending_approval': pending_approval,
-            'in_progress': in_progress,
-            'resolved': resolved,
-            'overdue': overdue
-        },
-        'priority_stats': priority_stats,
-        'sector_stats': list(sector_stats)
-    })
\ No newline at end of file
+    return Response(get_dashboard_stats())
\ No newline at end of file
@@ -2,6 +2,7 @@ from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.utils import timezone
 from .models import Team, TeamMembership, TeamProject
 from .serializers import (
@@ -120,22 +121,23 @@ def add_team_member(request, pk):
             'error': 'El usuario ya es miembro de este equipo'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Crear o reactivar membresía
-    membership, created = TeamMembership.objects.get_or_create(
-        team=team,
-        user=user,
-        defaults={
-            'role': role,
-            'added_by': request.user,
-            'is_active': True
-        }
-    )
-    
-    if not created:
-        membership.is_active = True
-        membership.role = role
-        membership.left_at = None
-        membership.save()
+    # Crear o reactivar membresía (con su evento de notificación)
+    with transaction.atomic():
+        membership, created = TeamMembership.objects.get_or_create(
+            team=team,
+            user=user,
+            defaults={
+                'role': role,
+                'added_by': request.user,
+                'is_active': True
+            }
+        )
+        
+        if not created:
+            membership.is_active = True
+            membership.role = role
+            membership.left_at = None
+            membership.save()
     
     serializer = TeamMembershipSerializer(membership)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -165,7 +167,8 @@ def team_member_detail(request, pk, member_pk):
     elif request.method == 'DELETE':
         membership.is_active = False
         membership.left_at = timezone.now()
-        membership.save()
+        with transaction.atomic():
+            membership.save()
         return Response({'message': 'Miembro removido del equipo'})
 
 @api_view(['GET', 'POST'])
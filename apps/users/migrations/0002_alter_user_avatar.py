@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:31
+
+import apps.media.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, storage=apps.media.storage.get_blob_storage, upload_to='avatars/'),
+        ),
+    ]
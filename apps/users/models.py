@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from apps.media.storage import get_blob_storage
 
 class User(AbstractUser):
     ROLE_CHOICES = [
@@ -14,7 +15,7 @@ class User(AbstractUser):
     phone = models.CharField(max_length=20, blank=True)
     department = models.CharField(max_length=100, blank=True)
     position = models.CharField(max_length=100, blank=True)
-    avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    avatar = models.ImageField(upload_to='avatars/', storage=get_blob_storage, null=True, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -26,6 +27,10 @@ class User(AbstractUser):
         db_table = 'users'
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
+        indexes = [
+            # MAX(updated_at) para los ETag de tarjetas (usuarios embebidos)
+            models.Index(fields=['updated_at'], name='users_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_full_name()} ({self.email})"
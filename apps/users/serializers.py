@@ -10,6 +10,13 @@ class UserSerializer(serializers.ModelSerializer):
                  'is_active', 'created_at', 'full_name']
         read_only_fields = ['id', 'created_at', 'full_name']
 
+class UserStubSerializer(serializers.ModelSerializer):
+    """Referencia compacta a un usuario"""
+    class Meta:
+        model = User
+        fields = ['id', 'full_name']
+        read_only_fields = fields
+
 class UserCreateSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
     password_confirm = serializers.CharField(write_only=True)
@@ -0,0 +1,7 @@
+try:
+    from .celery import app as celery_app
+except ImportError:
+    # Celery es opcional: sin él las tareas corren en el pool local de background.py
+    celery_app = None
+
+__all__ = ('celery_app',)
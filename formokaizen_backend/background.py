@@ -0,0 +1,87 @@
+"""
+Ejecución de tareas en segundo plano.
+
+Con ``CELERY_ENABLED`` las tareas se encolan en Celery/Redis. Sin Celery se
+envían a un pool de procesos local (contexto ``spawn``: cada worker arranca
+Django y abre sus propias conexiones a la base de datos).
+"""
+import importlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+try:
+    from celery import shared_task
+except ImportError:
+    shared_task = None
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _run(module, name, args):
+    # Se resuelve por nombre: la función decorada no se puede serializar con pickle
+    func = getattr(importlib.import_module(module), name)
+    return func.run(*args)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.BACKGROUND_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return _executor
+
+
+def _log_failure(future):
+    exc = future.exception()
+    if exc is not None:
+        logger.error('Falló una tarea en segundo plano: %r', exc)
+
+
+class BackgroundTask:
+    def __init__(self, func):
+        self.func = func
+        self.module = func.__module__
+        self.name = func.__name__
+        self.celery_task = shared_task(func) if shared_task is not None else None
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+    def run(self, *args):
+        return self.func(*args)
+
+    def enqueue(self, *args):
+        """Encola la tarea; los argumentos deben ser serializables (ids, no instancias)"""
+        if settings.BACKGROUND_TASKS_EAGER:
+            return self.func(*args)
+
+        if settings.CELERY_ENABLED and self.celery_task is not None:
+            return self.celery_task.delay(*args)
+
+        future = _get_executor().submit(_run, self.module, self.name, args)
+        future.add_done_callback(_log_failure)
+        return future
+
+
+def background_task(func):
+    """
+    Decorador: ``tarea.enqueue(*args)`` la ejecuta fuera del request y
+    ``tarea(*args)`` la ejecuta en el momento.
+    """
+    return BackgroundTask(func)
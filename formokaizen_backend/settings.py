@@ -33,11 +33,13 @@ THIRD_PARTY_APPS = [
 ]
 
 LOCAL_APPS = [
+    'apps.media',
     'apps.users',
     'apps.categories',
     'apps.tarjetas',
     'apps.teams',
     'apps.notifications',
+    'apps.sync',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -78,6 +80,18 @@ DATABASES = {
     'default': env.db(default='sqlite:///db.sqlite3')
 }
 
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://')
+}
+
+# Segundos que se reutilizan las estadísticas del dashboard
+DASHBOARD_STATS_CACHE_TTL = env.int('DASHBOARD_STATS_CACHE_TTL', default=30)
+
+# Formato de los números de tarjeta asignados por el servidor. {seq} es el
+# correlativo de la serie; {year} (año de alta) y {sector} (código del sector)
+# definen series separadas.
+TARJETA_NUMERO_FORMAT = env('TARJETA_NUMERO_FORMAT', default='TR-{year}-{seq:05d}')
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -103,7 +117,7 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_ROOT = env('MEDIA_ROOT', default=os.path.join(BASE_DIR, 'media'))
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -142,12 +156,51 @@ CORS_ALLOW_CREDENTIALS = True
 CELERY_BROKER_URL = env('REDIS_URL', default='redis://localhost:6379')
 CELERY_RESULT_BACKEND = env('REDIS_URL', default='redis://localhost:6379')
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Tareas en segundo plano: Celery si está habilitado, si no un pool de procesos local
+CELERY_ENABLED = env.bool('CELERY_ENABLED', default=False)
+BACKGROUND_WORKERS = env.int('BACKGROUND_WORKERS', default=2)
+# Ejecuta las tareas en el mismo proceso (desarrollo y scripts)
+BACKGROUND_TASKS_EAGER = env.bool('BACKGROUND_TASKS_EAGER', default=False)
+
+# Avisos de tarjetas vencidas (apps/tarjetas/overdue.py): cada cuántos segundos
+# se buscan vencimientos nuevos y hasta cuántos días atrás cuentan como nuevos
+OVERDUE_SCAN_INTERVAL = env.int('OVERDUE_SCAN_INTERVAL', default=3600)
+OVERDUE_ALERT_LOOKBACK_DAYS = env.int('OVERDUE_ALERT_LOOKBACK_DAYS', default=30)
+# Emails de notificaciones (apps/notifications/delivery.py): cada cuántos segundos
+# se envía lo pendiente; lo acumulado por destinatario sale en un único resumen
+NOTIFICATION_EMAIL_INTERVAL = env.int('NOTIFICATION_EMAIL_INTERVAL', default=300)
+
+CELERY_BEAT_SCHEDULE = {
+    'scan-overdue-tarjetas': {
+        'task': 'apps.tarjetas.tasks.scan_overdue_tarjetas',
+        'schedule': OVERDUE_SCAN_INTERVAL,
+    },
+    # Imágenes que quedaron en 'processing' porque el worker murió
+    'requeue-stale-images': {
+        'task': 'apps.tarjetas.tasks.requeue_stale_images',
+        'schedule': 600,
+    },
+    # Red de seguridad: eventos del outbox cuyo encolado se perdió
+    'dispatch-notifications': {
+        'task': 'apps.notifications.tasks.dispatch_notifications',
+        'schedule': 60,
+    },
+    'send-notification-emails': {
+        'task': 'apps.notifications.tasks.send_notification_emails',
+        'schedule': NOTIFICATION_EMAIL_INTERVAL,
+    },
+}
+
+EMAIL_BACKEND = env('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = env('EMAIL_HOST', default='localhost')
-EMAIL_PORT = env('EMAIL_PORT', default=587)
+EMAIL_PORT = env.int('EMAIL_PORT', default=587)
 EMAIL_HOST_USER = env('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', default='')
-EMAIL_USE_TLS = True
+EMAIL_USE_TLS = env.bool('EMAIL_USE_TLS', default=True)
+EMAIL_USE_SSL = env.bool('EMAIL_USE_SSL', default=False)
+EMAIL_TIMEOUT = env.int('EMAIL_TIMEOUT', default=30)
+DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='FormoKaizen <no-reply@formokaizen.local>')
+EMAIL_SUBJECT_PREFIX = env('EMAIL_SUBJECT_PREFIX', default='[FormoKaizen] ')
 
 LOGGING = {
     'version': 1,
@@ -10,6 +10,7 @@ urlpatterns = [
     path('api/tarjetas/', include('apps.tarjetas.urls')),
     path('api/teams/', include('apps.teams.urls')),
     path('api/notifications/', include('apps.notifications.urls')),
+    path('api/sync/', include('apps.sync.urls')),
 ]
 
 if settings.DEBUG: